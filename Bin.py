@@ -1,47 +1,46 @@
-def combine_mif_to_binary(mif_file, output):
-    combined_lines = []
+from mif import MifReader, MifWriter, HEADER, BEGIN, DATA, END, row_converter
+
+def combine_mif_to_binary(mif_file, output, words_per_line=8, width=16):
+    """
+    Rewrites a MIF with DATA_RADIX = BIN and words_per_line words packed per line.
+    Words are width bits wide (16 by default, the width of the split _High/_Low MIFs).
+    """
     buffer = []
     base_addr = None
+    to_binary = None
 
-    with open(mif_file, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.rstrip()
-
+    with open(mif_file, "r", encoding="utf-8") as f, MifWriter(output) as out:
+        reader = MifReader(f)
+        for record in reader:
             # Preserve header
-            if line.startswith(("WIDTH", "DEPTH", "ADDRESS_RADIX", "DATA_RADIX", "CONTENT", "BEGIN")):
+            if record.kind in (HEADER, BEGIN):
                 # Convert DATA_RADIX to BIN
-                if "DATA_RADIX" in line:
-                    line = "DATA_RADIX = BIN;"
-                combined_lines.append(line)
+                if record.address == "DATA_RADIX":
+                    out.line("DATA_RADIX = BIN;")
+                else:
+                    out.line(record.line)
                 continue
 
-            if line.startswith("END"):
+            if record.kind == END:
                 if buffer:
-                    binary_str = "".join([f"{int(val, 16):016b}" for val in buffer])
-                    combined_lines.append(f"{base_addr} : {binary_str} ;")
-                combined_lines.append("END;")
+                    out.line(f"{base_addr} : {to_binary(buffer)} ;")
+                out.line("END;")
                 break
 
-            if ":" in line and ";" in line:
-                parts = line.split(":")
-                addr = parts[0].strip()
-                data = parts[1].replace(";", "").strip()
-
+            if record.kind == DATA:
+                if to_binary is None:
+                    to_binary = row_converter(width, reader.data_radix, "BIN")
                 if len(buffer) == 0:
-                    base_addr = addr
+                    base_addr = reader.format_address(record.address)
 
-                buffer.append(data)
+                buffer.append(record.data)
 
-                if len(buffer) == 8:
-                    binary_str = "".join([f"{int(val, 16):016b}" for val in buffer])
-                    combined_lines.append(f"{base_addr} : {binary_str} ;")
+                if len(buffer) == words_per_line:
+                    out.line(f"{base_addr} : {to_binary(buffer)} ;")
                     buffer = []
                     base_addr = None
             else:
-                combined_lines.append(line)
-
-    with open(output, "w", encoding="utf-8") as out:
-        out.write("\n".join(combined_lines))
+                out.line(record.line)
 
     print(f"Binary MIF saved: {output}")
     return output
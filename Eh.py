@@ -1,60 +1,55 @@
-def combine_mif_dual_output(mif_file, hex_output, bin_output):
-    hex_lines = []
-    bin_lines = []
+from mif import MifReader, MifWriter, HEADER, BEGIN, DATA, END, row_converter
+
+def combine_mif_dual_output(mif_file, hex_output, bin_output, words_per_line=8, width=16):
+    """
+    Writes the same MIF twice with words_per_line words packed per line:
+    once with DATA_RADIX = HEX and once with DATA_RADIX = BIN.
+    Words are width bits wide (16 by default, the width of the split _High/_Low MIFs).
+    """
     buffer = []
     base_addr = None
-
-    with open(mif_file, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.rstrip()
-
-            # Pass header to both files
-            if line.startswith(("WIDTH", "DEPTH", "ADDRESS_RADIX", "CONTENT", "BEGIN")):
-                hex_lines.append(line)
-                bin_lines.append(line)
+    to_hex = to_binary = None
+
+    with open(mif_file, "r", encoding="utf-8") as f, \
+            MifWriter(hex_output) as hex_out, MifWriter(bin_output) as bin_out:
+        reader = MifReader(f)
+        for record in reader:
+            if record.kind == HEADER and record.address == "DATA_RADIX":
+                hex_out.line("DATA_RADIX = HEX;")
+                bin_out.line("DATA_RADIX = BIN;")
                 continue
 
-            if "DATA_RADIX" in line:
-                hex_lines.append("DATA_RADIX = HEX;")
-                bin_lines.append("DATA_RADIX = BIN;")
+            # Pass header to both files
+            if record.kind in (HEADER, BEGIN):
+                hex_out.line(record.line)
+                bin_out.line(record.line)
                 continue
 
-            if line.startswith("END"):
+            if record.kind == END:
                 if buffer:
-                    hex_str = "".join(buffer)
-                    bin_str = "".join([f"{int(x, 16):016b}" for x in buffer])
-                    hex_lines.append(f"{base_addr} : {hex_str} ;")
-                    bin_lines.append(f"{base_addr} : {bin_str} ;")
-                hex_lines.append("END;")
-                bin_lines.append("END;")
+                    hex_out.line(f"{base_addr} : {to_hex(buffer)} ;")
+                    bin_out.line(f"{base_addr} : {to_binary(buffer)} ;")
+                hex_out.line("END;")
+                bin_out.line("END;")
                 break
 
-            if ":" in line and ";" in line:
-                addr, data = line.split(":")
-                addr = addr.strip()
-                data = data.replace(";", "").strip()
-
+            if record.kind == DATA:
+                if to_hex is None:
+                    to_hex = row_converter(width, reader.data_radix, "HEX")
+                    to_binary = row_converter(width, reader.data_radix, "BIN")
                 if len(buffer) == 0:
-                    base_addr = addr
+                    base_addr = reader.format_address(record.address)
 
-                buffer.append(data)
+                buffer.append(record.data)
 
-                if len(buffer) == 8:
-                    hex_str = "".join(buffer)
-                    bin_str = "".join([f"{int(x, 16):016b}" for x in buffer])
-                    hex_lines.append(f"{base_addr} : {hex_str} ;")
-                    bin_lines.append(f"{base_addr} : {bin_str} ;")
+                if len(buffer) == words_per_line:
+                    hex_out.line(f"{base_addr} : {to_hex(buffer)} ;")
+                    bin_out.line(f"{base_addr} : {to_binary(buffer)} ;")
                     buffer = []
                     base_addr = None
             else:
-                hex_lines.append(line)
-                bin_lines.append(line)
-
-    with open(hex_output, "w", encoding="utf-8") as f:
-        f.write("\n".join(hex_lines))
-
-    with open(bin_output, "w", encoding="utf-8") as f:
-        f.write("\n".join(bin_lines))
+                hex_out.line(record.line)
+                bin_out.line(record.line)
 
     print(f"Saved hex output: {hex_output}")
     print(f"Saved binary output: {bin_output}")
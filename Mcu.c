@@ -79,7 +79,7 @@ void HAL_UART_RxCpltCallback(UART_HandleTypeDef *huart)
                 uint8_t* data = &rx_buffer[3];
                 send_packet(OPCODE_ACK, addr, data, len);
             } else {
-                send_packet(OPCODE_NACK, 0x00, NULL, 0);
+                send_packet(OPCODE_NACK, rx_buffer[1], NULL, 0);  // echo the address so the host knows which packet to resend
             }
             state = WAIT_START;
             break;
@@ -110,7 +110,7 @@ void parse_byte(uint8_t byte) {
                 }
             } else {
                 printf("[NACK] Invalid checksum. Dropping packet.\r\n");
-                send_packet(OPCODE_NACK, 0x00, NULL, 0);
+                send_packet(OPCODE_NACK, packet_buffer[1], NULL, 0);  // echo the address so the host knows which packet to resend
             }
             state = WAIT_START;
             break;
@@ -1,43 +1,48 @@
-import serial
 import time
 
+from eeprom_link import OPCODE_WRITE, OPCODE_READ, OPCODE_ACK
+from frame_codec import FrameCodec
+
 # Adjust COM port for your board (Windows: 'COMx', Linux: '/dev/ttyUSB0')
 PORT = 'COM3'    # change this to your actual COM port
 BAUD = 9600
 
-ser = serial.Serial(PORT, BAUD, timeout=1)
-time.sleep(2)  # give STM32 time to reset
-
-def calc_checksum(data):
-    cs = sum(data)
-    return [(cs >> 8) & 0xFF, cs & 0xFF]
+# Same framing as Mcu2.c checks: 1-byte XOR of everything after 0xAA, opcodes from Mcu.h.
+codec = FrameCodec()
 
-def send_packet(packet):
-    ser.write(bytearray(packet))
+def send_packet(ser, packet):
+    ser.write(packet)
     print(f"Sent: {[hex(b) for b in packet]}")
 
-def read_response(expected_len):
+def read_response(ser, expected_len):
     resp = ser.read(expected_len)
     print(f"Received: {[hex(b) for b in resp]}")
-    return resp
-
-# === Write Test ===
-# Write 3 bytes (0xDE, 0xAD, 0xBE) to address 0x10
-data = [0xAA, 0x01, 0x10, 0x03, 0xDE, 0xAD, 0xBE]
-checksum = calc_checksum(data)
-packet = data + checksum
-send_packet(packet)
-ack = ser.read(1)
-print(f"ACK? {ack.hex() if ack else 'No response'}")
-
-time.sleep(0.5)
-
-# === Read Test ===
-# Request 3 bytes from address 0x10
-read_cmd = [0xAA, 0x02, 0x10, 0x03]
-read_checksum = calc_checksum(read_cmd)
-read_packet = read_cmd + read_checksum
-send_packet(read_packet)
-read_response(5)  # 3 data + 2 checksum
-
-ser.close()
+    frames = codec.decoder().feed(resp)
+    for frame in frames:
+        kind = "ACK" if frame.opcode == OPCODE_ACK else "NACK"
+        print(f"{kind} addr 0x{frame.address:02X} data {frame.data.hex()}")
+    return frames
+
+def main():
+    import serial
+
+    ser = serial.Serial(PORT, BAUD, timeout=1)
+    time.sleep(2)  # give STM32 time to reset
+
+    # === Write Test ===
+    # Write 3 bytes (0xDE, 0xAD, 0xBE) to address 0x10
+    packet = codec.encode(OPCODE_WRITE, 0x10, bytes([0xDE, 0xAD, 0xBE]))
+    send_packet(ser, packet)
+    if not read_response(ser, len(packet)):  # the ACK echoes address and data
+        print("ACK? No response")
+
+    # === Read Test ===
+    # Request 3 bytes from address 0x10
+    read_packet = codec.encode(OPCODE_READ, 0x10, bytes([3]))
+    send_packet(ser, read_packet)
+    read_response(ser, 8)  # ACK header + 3 data + checksum
+
+    ser.close()
+
+if __name__ == "__main__":
+    main()
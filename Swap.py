@@ -1,44 +1,11 @@
-def combine_mif_8words(mif_file, output):
-    combined_lines = []
-    buffer = []
-    base_addr = None
-
-    with open(mif_file, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.rstrip()
-
-            if line.startswith(("WIDTH", "DEPTH", "ADDRESS_RADIX", "DATA_RADIX", "CONTENT", "BEGIN")):
-                combined_lines.append(line)
-                continue
-
-            if line.startswith("END"):
-                if buffer:
-                    # Write remaining buffered values
-                    data_str = "".join(buffer)
-                    combined_lines.append(f"{base_addr} : {data_str} ;")
-                combined_lines.append("END;")
-                break
-
-            if ":" in line and ";" in line:
-                parts = line.split(":")
-                addr = parts[0].strip()
-                data = parts[1].replace(";", "").strip()
-
-                if len(buffer) == 0:
-                    base_addr = addr
-
-                buffer.append(data)
-
-                if len(buffer) == 8:
-                    data_str = "".join(buffer)
-                    combined_lines.append(f"{base_addr} : {data_str} ;")
-                    buffer = []
-                    base_addr = None
-            else:
-                combined_lines.append(line)
-
-    with open(output, "w", encoding="utf-8") as out:
-        out.write("\n".join(combined_lines))
-
+from mif import reshape_mif
+
+def combine_mif_8words(mif_file, output, words_per_line=8, width=16):
+    """
+    Packs every words_per_line consecutive width-bit words into one wide word, first word
+    in the most significant position. Addresses are renumbered and WIDTH/DEPTH rewritten
+    to match (16-bit words, 8 per line: WIDTH = 128, DEPTH / 8).
+    """
+    reshape_mif(mif_file, output, width * words_per_line, input_width=width)
     print(f"File saved: {output}")
     return output
@@ -0,0 +1,232 @@
+"""
+asyncio client for the 0xAA UART protocol, for driving several boards from one event loop.
+
+Transports are objects with
+    async read()        -> bytes, waits until at least one byte is available
+    async write(data)
+    close()
+PollingTransport turns any non-blocking pyserial-like object (write, read, in_waiting)
+into one: a serial.Serial opened with timeout=0 (see open_serial) or, for tests and
+benchmarks, a device_sim.SimulatedPort.
+
+AsyncEepromClient frames requests with a frame_codec.FrameCodec, matches each reply to its
+request (the board answers in order and echoes the request's address in ACKs and NACKs,
+so a reply goes to the oldest open request with its address), and retries NACKed,
+mismatched or timed-out packets.
+
+Command line (all ports are written at the same time):
+    python -m async_link FontRomCombined.bin --port COM3 --port COM4 [--address-size 3]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from collections import deque
+
+from eeprom_link import (OPCODE_WRITE, OPCODE_READ, OPCODE_ACK, OPCODE_NACK, MAX_PAYLOAD, MAX_RETRIES,
+                         address_size_for, format_stats)
+from frame_codec import FrameCodec, SPECS
+
+class PollingTransport:
+    """Async transport over a non-blocking pyserial-like port, polled every interval seconds."""
+    def __init__(self, port, interval=0.002):
+        self.port = port
+        self.interval = interval
+
+    async def read(self):
+        while True:
+            waiting = self.port.in_waiting
+            if waiting:
+                return self.port.read(waiting)
+            await asyncio.sleep(self.interval)
+
+    async def write(self, data):
+        self.port.write(data)
+
+    def close(self):
+        self.port.close()
+
+def open_serial(port, baud=9600, interval=0.002):
+    """Opens a serial port (pyserial) for use with AsyncEepromClient."""
+    import serial  # pyserial is only needed for real hardware
+
+    return PollingTransport(serial.Serial(port, baud, timeout=0), interval)
+
+class AsyncEepromClient:
+    """
+    Request/response client for one board. Use as "async with" or call start()/close().
+    window is the number of packets write_image keeps in flight. A request is retried when
+    it is NACKed, its reply does not match or no reply comes within timeout seconds; after
+    max_retries retries it fails with OSError.
+    """
+    def __init__(self, transport, framing=None, window=8, chunk_size=32, timeout=0.5, max_retries=MAX_RETRIES):
+        if not 1 <= chunk_size <= MAX_PAYLOAD:
+            raise ValueError(f"chunk_size must be between 1 and {MAX_PAYLOAD}")
+        self.transport = transport
+        self.framing = framing or FrameCodec()
+        self.window = window
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._decoder = self.framing.decoder(max_length=MAX_PAYLOAD)
+        self._open = deque()  # [address, future], in the order the requests were sent
+        self._reader = None
+        self.retransmits = 0
+        self.nacks = 0
+        self.timeouts = 0
+
+    async def start(self):
+        self._reader = asyncio.ensure_future(self._read_replies())
+        return self
+
+    async def close(self):
+        if self._reader:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+        self.transport.close()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def _read_replies(self):
+        while True:
+            data = await self.transport.read()
+            for frame in self._decoder.feed(data):
+                if frame.opcode not in (OPCODE_ACK, OPCODE_NACK):
+                    continue
+                for entry in self._open:
+                    if entry[0] == frame.address:
+                        self._open.remove(entry)
+                        if not entry[1].done():
+                            entry[1].set_result(frame)
+                        break
+                # No open request: a late reply to one that was already retried.
+
+    async def request(self, opcode, address, data=b"", check=None, length=None):
+        """
+        Sends one frame and returns the ACK frame for it. check(frame) can reject an ACK
+        (return False) to have the request retried. length is for no_payload requests.
+        """
+        packet = self.framing.encode(opcode, address, data, length)
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.retransmits += 1
+            entry = [address, loop.create_future()]
+            self._open.append(entry)
+            await self.transport.write(packet)
+            try:
+                reply = await asyncio.wait_for(entry[1], self.timeout)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                if entry in self._open:
+                    self._open.remove(entry)
+                continue
+            if reply.opcode == OPCODE_NACK:
+                self.nacks += 1
+            elif check is None or check(reply):
+                return reply
+        raise OSError(f"No good reply for address 0x{address:X} after {self.max_retries} retries")
+
+    async def write(self, address, data):
+        data = bytes(data)
+        await self.request(OPCODE_WRITE, address, data, lambda reply: reply.data == data)
+
+    async def read(self, address, count):
+        """
+        Reads count bytes (at most MAX_PAYLOAD) with the READ opcode. Mcu.c echoes a READ's
+        1-byte count payload, so a 1-byte read asks for 2 bytes (see EepromLink.read_ranges).
+        """
+        if OPCODE_READ in self.framing.spec.no_payload:
+            reply = await self.request(OPCODE_READ, address, b"", lambda reply: len(reply.data) == count, count)
+            return reply.data
+        offset = 0
+        if count == 1:
+            offset = 1 if address > 0 else 0
+        size = max(count, 2)
+        reply = await self.request(OPCODE_READ, address - offset, bytes([size]),
+                                   lambda reply: len(reply.data) == size)
+        return reply.data[offset:offset + count]
+
+    async def write_image(self, data, base_address=0):
+        """Writes data in chunk_size packets, window at a time; returns transfer statistics."""
+        data = bytes(data)
+        chunks = [(base_address + start, data[start:start + self.chunk_size])
+                  for start in range(0, len(data), self.chunk_size)]
+        for address, chunk in chunks:
+            self.framing.encode(OPCODE_WRITE, address, chunk)  # fail before sending anything
+        slots = asyncio.Semaphore(self.window)
+        before = (self.retransmits, self.nacks, self.timeouts)
+        started = time.perf_counter()
+
+        async def send(address, chunk):
+            async with slots:
+                await self.write(address, chunk)
+
+        await asyncio.gather(*(send(address, chunk) for address, chunk in chunks))
+        seconds = time.perf_counter() - started
+        return {
+            "bytes": len(data),
+            "packets": len(chunks),
+            "retransmits": self.retransmits - before[0],
+            "nacks": self.nacks - before[1],
+            "timeouts": self.timeouts - before[2],
+            "seconds": seconds,
+            "bytes_per_second": len(data) / seconds if seconds else 0.0,
+        }
+
+async def provision(transports, image, base_address=0, **client_options):
+    """
+    Writes the same image through every transport concurrently. Returns one result per
+    transport, in order: the statistics dict, or the exception that stopped it.
+    """
+    async def one(transport):
+        async with AsyncEepromClient(transport, **client_options) as client:
+            return await client.write_image(image, base_address)
+
+    return await asyncio.gather(*(one(transport) for transport in transports), return_exceptions=True)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="async_link", description="Write an image to several boards at once.")
+    parser.add_argument("image", help="binary image, e.g. FontRomCombined.bin")
+    parser.add_argument("--port", action="append", required=True, help="serial port, repeat for more boards")
+    parser.add_argument("--baud", type=int, default=9600)
+    parser.add_argument("--address", type=lambda text: int(text, 0), default=0, help="start address")
+    parser.add_argument("--address-size", type=int,
+                        help="address bytes per frame (default: enough for the image)")
+    parser.add_argument("--framing", choices=sorted(SPECS), default="xor8", help="checksum variant")
+    parser.add_argument("--window", type=int, default=8, help="packets in flight per board")
+    parser.add_argument("--chunk-size", type=int, default=32, help=f"bytes per packet (max {MAX_PAYLOAD})")
+    parser.add_argument("--timeout", type=float, default=0.5, help="seconds before a packet is resent")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    with open(args.image, "rb") as f:
+        image = f.read()
+    try:
+        transports = [open_serial(port, args.baud) for port in args.port]
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    address_size = args.address_size or address_size_for(args.address + len(image))
+    results = asyncio.run(provision(transports, image, args.address,
+                                    framing=FrameCodec(args.framing, address_size), window=args.window,
+                                    chunk_size=args.chunk_size, timeout=args.timeout))
+    failed = 0
+    for port, result in zip(args.port, results):
+        if isinstance(result, BaseException):
+            failed += 1
+            print(f"{port}: Error: {result}", file=sys.stderr)
+        else:
+            print(f"{port}: wrote {format_stats(result)}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,294 @@
+"""
+Automatic choice of forced_height, max_width and threshold for every ROM section.
+
+For each section the search tries forced heights and max widths around its box (the grid,
+e.g. 17x39 or 26x58, or the canvas minus the padding for sections without a grid, e.g.
+16x28 for 16x32) and a range of thresholds, and scores every candidate on the glyph
+arrays, placed exactly as render_glyphs places them:
+
+    height_fill  forced height / box height, capped at 1 (use the resolution)
+    distinct     how far each glyph is from its closest neighbour, as a fraction of its
+                 ink pixels (legibility: 'O' vs '0', 'l' vs 'I')
+    failed       glyphs the real render would reject (they do not fit the canvas)
+    clipped      glyphs with ink outside the box
+    vanished     glyphs with grey pixels but not a single pixel above the threshold
+    collisions   glyphs whose bitmap is identical to another glyph's
+    squash       how much wide glyphs are compressed by max_width
+    ink_error    |share of pixels on - mean grey level| (stroke weight kept by the threshold)
+
+score = sum of SCORE_WEIGHTS[metric] * metric; penalties have negative weights.
+
+The expensive step, drawing every glyph at the font size of a forced height, is done once
+per height; resizes are cached per target size and thresholds are applied to the cached
+grey arrays, so one height costs about as much as a single render of the font. Heights
+are spread over a process pool whose workers keep their font faces open (load_font).
+
+Command line:
+    python -m autofit --ttf font.ttf [--workers 4] [--write-layout fitted.json]
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from fontrom import (load_font, DEFAULT_CHAR_LIST, PUNCTUATION_SET, PUNCTUATION_SCALE,
+                     NARROW_CHARS, NARROW_CHAR_SCALE)
+from rom_layout import load_rom_layout, apply_section_overrides, save_rom_layout
+
+SCORE_WEIGHTS = {
+    "height_fill": 1.0,
+    "distinct": 1.0,
+    "failed": -4.0,
+    "clipped": -2.0,
+    "vanished": -2.0,
+    "collisions": -2.0,
+    "squash": -1.0,
+    "ink_error": -2.0,
+}
+THRESHOLDS = (64, 96, 128, 160, 192)
+# Candidate sizes run from MIN_FILL to MAX_FILL times the box.
+MIN_FILL = 0.6
+MAX_FILL = 1.1
+
+def section_box(section):
+    """(width, height) the glyphs of a section should fit in."""
+    if section["grid_width"] is not None and section["grid_height"] is not None:
+        return section["grid_width"], section["grid_height"]
+    if section["canvas_width"] == 32 and section["canvas_height"] == 64:
+        return 17, 39  # render_glyphs' default grid for 32x64 canvases
+    return (section["canvas_width"],
+            section["canvas_height"] - section["padding_top"] - section["padding_bottom"])
+
+def _uses_grid(section):
+    return section["grid_width"] is not None or (section["canvas_width"], section["canvas_height"]) == (32, 64)
+
+def _draw_glyphs(ttf_path, chars, forced_height):
+    """{char: grey array} drawn at forced_height's font size, like render_glyphs does."""
+    from PIL import Image, ImageDraw
+
+    font = load_font(ttf_path, forced_height * 2)
+    drawn = {}
+    for char in chars:
+        (width, height), (offset_x, offset_y) = font.font.getsize(char)
+        if char == " " or width == 0 or height == 0:
+            continue
+        image = Image.new('L', (width, height), 0)
+        ImageDraw.Draw(image).text((-offset_x, -offset_y), char, font=font, fill=255)
+        drawn[char] = image
+    return drawn
+
+def _target_size(char, image, forced_height, max_width):
+    """(scaled_width, target_height, natural_width) with render_glyphs' rules."""
+    aspect_ratio = image.width / image.height
+    if char in PUNCTUATION_SET:
+        target_height = int(forced_height * PUNCTUATION_SCALE)
+        natural = target_height * aspect_ratio
+    elif char in NARROW_CHARS:
+        target_height = forced_height
+        natural = target_height * aspect_ratio * NARROW_CHAR_SCALE
+    else:
+        target_height = forced_height
+        natural = target_height * aspect_ratio
+    return min(int(natural), max_width), target_height, natural
+
+def _placement(char, section, box, width, height):
+    """Top-left corner of a glyph relative to the box, or None if the render would fail."""
+    box_width, box_height = box
+    if _uses_grid(section):
+        top = box_height - height if char in PUNCTUATION_SET else max((box_height - height) // 2, 0)
+        left = max((box_width - width) // 2, 0)
+        canvas_top, canvas_left = top, left
+    else:
+        top = 0
+        left = (section["canvas_width"] - width) // 2
+        canvas_top, canvas_left = section["padding_top"], left
+    if (canvas_top < 0 or canvas_left < 0 or canvas_top + height > section["canvas_height"]
+            or canvas_left + width > section["canvas_width"]):
+        return None
+    return top, left
+
+def score_metrics(metrics):
+    return sum(SCORE_WEIGHTS[name] * value for name, value in metrics.items())
+
+def _evaluate(glyphs, section, box, forced_height):
+    """
+    Metrics for one candidate. glyphs is a list of (char, grey, bitmap, natural_width):
+    the resized grey array, the same above the threshold and the unclamped width.
+    Every metric is a share of the glyphs, so an empty list is a ValueError.
+    """
+    box_width, box_height = box
+    count = len(glyphs)
+    if not count:
+        raise ValueError(f"No glyphs to score at forced height {forced_height}: "
+                         "the characters are all blank or missing from the font")
+    failed = clipped = vanished = 0
+    squash = ink_error = 0.0
+    boxed = np.zeros((count, box_height, box_width), dtype=bool)
+    for i, (char, grey, binary, natural) in enumerate(glyphs):
+        height, width = binary.shape
+        squash += max(0.0, 1.0 - width / natural) if natural else 0.0
+        if grey.any() and not binary.any():
+            vanished += 1
+        ink_error += abs(binary.mean() - grey.mean() / 255.0)
+        corner = _placement(char, section, box, width, height)
+        if corner is None:
+            failed += 1
+            continue
+        top, left = corner
+        visible = binary[:max(box_height - top, 0), :max(box_width - left, 0)]
+        if visible.sum() < binary.sum():
+            clipped += 1
+        boxed[i, top:top + visible.shape[0], left:left + visible.shape[1]] = visible
+
+    flat = boxed.reshape(count, -1).astype(np.float32)
+    ink = flat.sum(axis=1)
+    # Hamming distance between every pair of glyphs.
+    distances = ink[:, None] + ink[None, :] - 2 * (flat @ flat.T)
+    np.fill_diagonal(distances, np.inf)
+    nearest = distances.min(axis=1) if count > 1 else np.full(count, np.inf)
+    collisions = int(np.count_nonzero(nearest == 0))
+    distinct = np.minimum(nearest / np.maximum(ink, 1), 1.0)
+
+    return {
+        "height_fill": min(forced_height / box_height, 1.0),
+        "distinct": float(distinct.mean()) if count > 1 else 1.0,
+        "failed": failed / count,
+        "clipped": clipped / count,
+        "vanished": vanished / count,
+        "collisions": collisions / count,
+        "squash": squash / count,
+        "ink_error": ink_error / count,
+    }
+
+def score_forced_height(ttf_path, chars, section, forced_height, max_widths, thresholds=THRESHOLDS):
+    """
+    Scores every (max_width, threshold) candidate for one forced height.
+    Returns a list of {"forced_height", "max_width", "threshold", "score", "metrics"}.
+    """
+    from PIL import Image
+
+    box = section_box(section)
+    drawn = _draw_glyphs(ttf_path, chars, forced_height)
+    resized = {}  # (char, width, height) -> grey array, shared by every max_width/threshold
+    candidates = []
+    for max_width in max_widths:
+        sized = []
+        for char, image in drawn.items():
+            width, height, natural = _target_size(char, image, forced_height, max_width)
+            if width < 1 or height < 1:
+                sized.append((char, np.zeros((max(height, 1), max(width, 1)), dtype=np.uint8), natural))
+                continue
+            key = (char, width, height)
+            grey = resized.get(key)
+            if grey is None:
+                grey = resized[key] = np.array(image.resize((width, height), Image.Resampling.LANCZOS))
+            sized.append((char, grey, natural))
+        for threshold in thresholds:
+            glyphs = [(char, grey, grey > threshold, natural) for char, grey, natural in sized]
+            metrics = _evaluate(glyphs, section, box, forced_height)
+            candidates.append({"forced_height": forced_height, "max_width": max_width,
+                               "threshold": threshold, "score": score_metrics(metrics),
+                               "metrics": metrics})
+    return candidates
+
+def candidate_sizes(section, min_fill=MIN_FILL, max_fill=MAX_FILL):
+    """(forced heights, max widths) to try for a section."""
+    box_width, box_height = section_box(section)
+    heights = range(max(int(box_height * min_fill), 1), int(box_height * max_fill) + 1)
+    widths = range(max(int(box_width * min_fill), 1), int(box_width * max_fill) + 1)
+    return list(heights), list(widths)
+
+def autofit(ttf_path, layout, char_list=None, sections=None, workers=None, thresholds=THRESHOLDS):
+    """
+    Searches every section (or the named sections) of layout.
+    Returns {section name: candidates sorted best first}.
+    """
+    chars = list(dict.fromkeys(char_list or DEFAULT_CHAR_LIST))
+    selected = [section for section in layout["sections"] if sections is None or section["name"] in sections]
+    tasks = []
+    for section in selected:
+        heights, widths = candidate_sizes(section)
+        tasks += [(section, height, widths) for height in heights]
+
+    if workers and workers > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            futures = [pool.submit(score_forced_height, ttf_path, chars, section, height, widths, thresholds)
+                       for section, height, widths in tasks]
+            scored = [future.result() for future in futures]
+    else:
+        scored = [score_forced_height(ttf_path, chars, section, height, widths, thresholds)
+                  for section, height, widths in tasks]
+
+    results = {section["name"]: [] for section in selected}
+    for (section, _, _), candidates in zip(tasks, scored):
+        results[section["name"]] += candidates
+    for candidates in results.values():
+        candidates.sort(key=lambda candidate: candidate["score"], reverse=True)
+    return results
+
+def best_overrides(results):
+    """{section: {"forced_height", "max_width", "threshold"}} of the best candidates."""
+    return {name: {key: candidates[0][key] for key in ("forced_height", "max_width", "threshold")}
+            for name, candidates in results.items() if candidates}
+
+def _format_candidate(candidate):
+    metrics = candidate["metrics"]
+    return (f"height {candidate['forced_height']:3d} width {candidate['max_width']:3d} "
+            f"threshold {candidate['threshold']:3d}  score {candidate['score']:+.3f}  "
+            f"(distinct {metrics['distinct']:.2f}, clipped {metrics['clipped']:.0%}, "
+            f"failed {metrics['failed']:.0%}, squash {metrics['squash']:.2f}, ink error {metrics['ink_error']:.3f})")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="autofit",
+                                     description="Find forced height, max width and threshold for every section.")
+    parser.add_argument("--ttf", required=True, help="TTF/TTC font file")
+    parser.add_argument("--layout", help="ROM layout JSON (default: rom_layout.json)")
+    parser.add_argument("--chars", help="characters to fit (default: built-in list)")
+    parser.add_argument("--section", action="append", help="only fit this section (repeatable)")
+    parser.add_argument("--workers", type=int, default=1, help="processes (0 = one per CPU, default 1)")
+    parser.add_argument("--top", type=int, default=5, help="candidates to show per section")
+    parser.add_argument("--write-layout", metavar="FILE", help="save the layout with the best parameters")
+    parser.add_argument("--json", metavar="FILE", help="save every scored candidate")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not os.path.exists(args.ttf):
+        raise SystemExit(f"Invalid TTF font path: {args.ttf}")
+    try:
+        layout = load_rom_layout(args.layout)
+        known = [section["name"] for section in layout["sections"]]
+        for name in args.section or []:
+            if name not in known:
+                raise ValueError(f"Unknown section '{name}' (layout has: {', '.join(known)})")
+        results = autofit(args.ttf, layout, list(args.chars) if args.chars else None,
+                          args.section, args.workers or os.cpu_count())
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    for name, candidates in results.items():
+        current = next(section for section in layout["sections"] if section["name"] == name)
+        print(f"{name} (box {'x'.join(map(str, section_box(current)))}, now height {current['forced_height']} "
+              f"width {current['max_width']} threshold {current['threshold']}):")
+        for candidate in candidates[:args.top]:
+            print("  " + _format_candidate(candidate))
+    overrides = best_overrides(results)
+    options = []
+    for name, values in overrides.items():
+        options += [f"--forced-height {name}={values['forced_height']}", f"--max-width {name}={values['max_width']}",
+                    f"--threshold {name}={values['threshold']}"]
+    print("fontrom options: " + " ".join(options))
+    if args.write_layout:
+        save_rom_layout(apply_section_overrides(layout, overrides), args.write_layout)
+        print(f"Fitted layout saved as {args.write_layout}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+"""
+Times and memory-profiles every stage of the font-to-ROM pipeline and the MIF tools on
+reproducible synthetic inputs, writes the results as JSON and compares two runs.
+
+Stages: generate_xbm_data, write_mif, split_mif, write_combined_binary (fontrom) and
+combine_mif_to_binary (Bin.py), combine_mif_dual_output (Eh.py), combine_mif_8words
+(Swap.py). Glyph stages run for every character-set size (printable code points from
+U+0020 upwards, so 95 is ASCII); MIF stages run on seeded random 16-bit MIFs of every
+size. Each case is timed best-of --repeat, then run once more under tracemalloc for its
+peak Python allocation (--no-memory skips that pass, which is slow on large MIFs).
+
+    python benchmarks/bench_pipeline.py --output run.json [--glyphs 95,1000,4000] [--mif-sizes 64K,16M,256M]
+    python benchmarks/bench_pipeline.py --output new.json --baseline old.json
+    python benchmarks/bench_pipeline.py --compare old.json new.json [--tolerance 0.1]
+
+The font is the bundled benchmarks/fonts/DejaVuSans.ttf (Bitstream Vera license, see
+benchmarks/fonts/LICENSE-DejaVu.txt), so every machine renders the same outlines; --ttf
+overrides it. The font's SHA-256 is stored with the results, and --compare warns when two
+runs used different fonts or inputs.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fontrom
+from Bin import combine_mif_to_binary
+from Eh import combine_mif_dual_output
+from Swap import combine_mif_8words
+from glyph_cache import font_file_hash
+
+# Font shipped with the benchmarks, so results from different machines can be compared.
+DEFAULT_FONT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts", "DejaVuSans.ttf")
+
+# Render arguments of the 32x64_orig section: forced height, max width, canvas, padding, grid.
+RENDER_ARGS = (39, 17, 32, 64, 0, 2, 17, 39)
+
+def char_set(count):
+    """The first count printable characters from U+0020 on (ASCII first)."""
+    chars = []
+    code_point = 0x20
+    while len(chars) < count:
+        char = chr(code_point)
+        if char.isprintable() and not 0xD800 <= code_point <= 0xDFFF:
+            chars.append(char)
+        code_point += 1
+    return chars
+
+def write_synthetic_mif(path, size, seed=0):
+    """A 16-bit HEX MIF of about size bytes with seeded random contents."""
+    rng = random.Random(seed)
+    line_bytes = len("0000 : 0000;\n")
+    depth = max(size // line_bytes, 1)
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        f.write(f"DEPTH = {depth};\nWIDTH = 16;\nADDRESS_RADIX = HEX;\nDATA_RADIX = HEX;\nCONTENT BEGIN\n")
+        digits = max(4, len(f"{depth - 1:X}"))
+        for start in range(0, depth, 4096):
+            words = rng.randbytes(2 * min(4096, depth - start)).hex().upper()
+            f.write("".join(f"{start + i:0{digits}X} : {words[4 * i:4 * i + 4]};\n"
+                            for i in range(len(words) // 4)))
+        f.write("END;\n")
+    return depth
+
+def parse_size(text):
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+    text = text.strip().upper()
+    if text[-1:] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+def measure(func, repeat, memory):
+    """Returns (best seconds, peak traced bytes or None, result of the last call)."""
+    best = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                func()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return best, peak, result
+
+def run(args, work_dir):
+    results = []
+
+    def record(stage, case, func, input_bytes=None):
+        seconds, peak, result = measure(func, args.repeat, not args.no_memory)
+        results.append({"stage": stage, "case": case, "seconds": seconds,
+                        "peak_bytes": peak, "input_bytes": input_bytes})
+        memory = f", peak {peak / (1 << 20):.1f} MB" if peak is not None else ""
+        print(f"  {stage} [{case}]: {seconds:.4f} s{memory}", flush=True)
+        return result
+
+    print(f"Font {args.ttf}")
+    rom_mifs = None
+    for count in args.glyphs:
+        chars = char_set(count)
+        case = f"{count} glyphs"
+        atlas = record("generate_xbm_data", case,
+                       lambda: fontrom.generate_xbm_data(args.ttf, chars, *RENDER_ARGS, workers=1))
+        mif_path = os.path.join(work_dir, f"glyphs_{count}.mif")
+        record("write_mif", case, lambda: fontrom.write_mif(atlas, mif_path, 32, 64))
+        high, low = mif_path[:-4] + "_High.mif", mif_path[:-4] + "_Low.mif"
+        record("split_mif", case, lambda: fontrom.split_mif(mif_path, high, low), os.path.getsize(mif_path))
+        if len(atlas) <= 96 and rom_mifs is None:
+            # The combined ROM only has room for 96 glyphs in its smallest 32x64 part.
+            small = fontrom.generate_xbm_data(args.ttf, chars, 28, 13, 16, 32, 2, 2, workers=1)
+            small_path = os.path.join(work_dir, f"glyphs_{count}_16x32.mif")
+            with contextlib.redirect_stdout(io.StringIO()):
+                fontrom.write_mif(small, small_path, 16, 32)
+            rom_mifs = (small_path, low, high, low, high)
+            record("write_combined_binary", case,
+                   lambda: fontrom.write_combined_binary(*rom_mifs, os.path.join(work_dir, "combined.bin")))
+
+    for size in args.mif_sizes:
+        mif_path = os.path.join(work_dir, f"synthetic_{size}.mif")
+        write_synthetic_mif(mif_path, size, args.seed)
+        case = f"{os.path.getsize(mif_path)} bytes"
+        input_bytes = os.path.getsize(mif_path)
+        out = os.path.join(work_dir, "out.mif")
+        record("combine_mif_to_binary", case, lambda: combine_mif_to_binary(mif_path, out), input_bytes)
+        record("combine_mif_dual_output", case,
+               lambda: combine_mif_dual_output(mif_path, out, out + ".bin"), input_bytes)
+        record("combine_mif_8words", case, lambda: combine_mif_8words(mif_path, out), input_bytes)
+        os.remove(mif_path)
+    return results
+
+def run_metadata(args):
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "font": os.path.basename(args.ttf),
+        "font_sha256": font_file_hash(args.ttf),
+        "glyphs": args.glyphs,
+        "mif_sizes": args.mif_sizes,
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+def compare(old, new, tolerance):
+    """
+    Prints every (stage, case) present in both runs with its change in time and peak
+    memory. Returns the list of regressions: slower or bigger by more than tolerance.
+    """
+    for key in ("font_sha256", "seed"):
+        if old["meta"].get(key) != new["meta"].get(key):
+            print(f"Warning: runs differ in {key}; results may not be comparable")
+    baseline = {(entry["stage"], entry["case"]): entry for entry in old["results"]}
+    regressions = []
+    for entry in new["results"]:
+        before = baseline.get((entry["stage"], entry["case"]))
+        if before is None:
+            continue
+        changes = []
+        for key, label in [("seconds", "time"), ("peak_bytes", "memory")]:
+            if before.get(key) and entry.get(key) is not None:
+                ratio = entry[key] / before[key]
+                changes.append(f"{label} {ratio - 1:+.1%}")
+                if ratio > 1 + tolerance:
+                    regressions.append((entry["stage"], entry["case"], label, ratio))
+        print(f"  {entry['stage']} [{entry['case']}]: {', '.join(changes)}")
+    for stage, case, label, ratio in regressions:
+        print(f"REGRESSION {stage} [{case}]: {label} x{ratio:.2f}")
+    return regressions
+
+def load_results(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the font-to-ROM pipeline and MIF tools.")
+    parser.add_argument("--ttf", default=DEFAULT_FONT,
+                        help="font to render (default: the bundled benchmarks/fonts/DejaVuSans.ttf)")
+    parser.add_argument("--glyphs", default="95,1000",
+                        help="comma-separated character-set sizes (default %(default)s)")
+    parser.add_argument("--mif-sizes", default="64K,4M",
+                        help="comma-separated synthetic MIF sizes, K/M/G suffixes (default %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case, best is kept")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the synthetic MIFs")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare this run with an earlier results file")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="only compare two results files")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="allowed slowdown/growth before a case counts as a regression")
+    args = parser.parse_args(argv)
+    args.glyphs = [int(value) for value in args.glyphs.split(",") if value]
+    args.mif_sizes = [parse_size(value) for value in args.mif_sizes.split(",") if value]
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.compare:
+        return 1 if compare(load_results(args.compare[0]), load_results(args.compare[1]), args.tolerance) else 0
+
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as work_dir:
+        report = {"meta": run_metadata(args), "results": run(args, work_dir)}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+        print(f"Results written to {args.output}")
+    if args.baseline:
+        return 1 if compare(load_results(args.baseline), report, args.tolerance) else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""
+Compares the per-word HEX -> BIN conversion the MIF tools used to do
+(f"{int(word, 16):016b}" for every word) with mif.row_converter, which converts a whole row per call.
+
+    python benchmarks/bench_radix.py [--words N] [--width BITS] [--per-line N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mif import row_converter
+
+def per_word_hex_to_bin(rows, width):
+    return ["".join([f"{int(word, 16):0{width}b}" for word in row]) for row in rows]
+
+def per_word_bin_to_hex(rows, width):
+    digits = (width + 3) // 4
+    return ["".join([f"{int(word, 2):0{digits}X}" for word in row]) for row in rows]
+
+def table_convert(rows, convert):
+    return [convert(row) for row in rows]
+
+def best_of(repeat, func, *args):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark MIF radix conversion.")
+    parser.add_argument("--words", type=int, default=1 << 20)
+    parser.add_argument("--width", type=int, default=16)
+    parser.add_argument("--per-line", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    digits = (args.width + 3) // 4
+    words = [f"{rng.getrandbits(args.width):0{digits}X}" for _ in range(args.words)]
+    hex_rows = [words[i:i + args.per_line] for i in range(0, len(words), args.per_line)]
+    bin_rows = [[f"{int(word, 16):0{args.width}b}" for word in row] for row in hex_rows]
+
+    cases = [
+        ("HEX->BIN", per_word_hex_to_bin, hex_rows, row_converter(args.width, "HEX", "BIN")),
+        ("BIN->HEX", per_word_bin_to_hex, bin_rows, row_converter(args.width, "BIN", "HEX")),
+    ]
+    print(f"{args.words} words, {args.width} bits, {args.per_line} per line, best of {args.repeat}")
+    for name, baseline, rows, convert in cases:
+        old_time, old = best_of(args.repeat, baseline, rows, args.width)
+        new_time, new = best_of(args.repeat, table_convert, rows, convert)
+        if old != new:
+            raise SystemExit(f"{name}: outputs differ")
+        print(f"  {name}: per-word {old_time:.3f}s, row {new_time:.3f}s "
+              f"({old_time / new_time:.1f}x)")
+
+if __name__ == "__main__":
+    main()
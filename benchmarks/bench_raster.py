@@ -0,0 +1,72 @@
+"""
+Compares the two rasterization engines of fontrom ("resample": 2x render + LANCZOS resize,
+"direct": draw at the target size) on every section of a ROM layout: render time (best of
+--repeat), how many glyphs could take the direct path, and a pixel diff against the
+resample output (pixels that differ per glyph, worst glyphs listed).
+
+    python benchmarks/bench_raster.py --ttf font.ttf [--layout rom_layout.json] [--chars ...]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fontrom
+from rom_layout import load_rom_layout
+
+def render(ttf_path, chars, section, raster):
+    return fontrom.render_glyphs(ttf_path, chars, *fontrom._section_render_args(section), raster=raster)
+
+def best_time(repeat, func, *args):
+    best = None
+    for _ in range(repeat):
+        fontrom._FONT_CACHE.clear()  # every run opens its faces, as a fresh build does
+        started = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def direct_glyphs(results):
+    """Glyphs that went through the direct path: no time recorded for resize."""
+    return sum(1 for _, rows, _, timings in results if rows is not None and timings and timings[1] == 0.0)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare fontrom's rasterization engines.")
+    parser.add_argument("--ttf", required=True)
+    parser.add_argument("--layout", help="ROM layout JSON (default: rom_layout.json)")
+    parser.add_argument("--chars", help="characters (default: fontrom's built-in list)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--worst", type=int, default=5, help="glyphs with most differing pixels to list")
+    args = parser.parse_args(argv)
+
+    chars = list(dict.fromkeys(args.chars or fontrom.DEFAULT_CHAR_LIST))
+    layout = load_rom_layout(args.layout)
+    total = {"resample": 0.0, "direct": 0.0}
+    for section in layout["sections"]:
+        old_time, old = best_time(args.repeat, render, args.ttf, chars, section, "resample")
+        new_time, new = best_time(args.repeat, render, args.ttf, chars, section, "direct")
+        total["resample"] += old_time
+        total["direct"] += new_time
+        diffs = []
+        for (char, old_rows, _, _), (_, new_rows, _, _) in zip(old, new):
+            if old_rows is None or new_rows is None:
+                continue
+            differing = int(np.unpackbits(np.bitwise_xor(old_rows, new_rows)).sum())
+            diffs.append((differing, int(np.unpackbits(old_rows).sum()), char))
+        changed = [diff for diff in diffs if diff[0]]
+        print(f"{section['name']}: resample {old_time * 1000:.1f} ms, direct {new_time * 1000:.1f} ms "
+              f"({old_time / new_time:.2f}x); {direct_glyphs(new)}/{len(new)} glyphs drawn directly")
+        print(f"  {len(changed)} glyphs differ, {sum(diff[0] for diff in diffs)} pixels "
+              f"of {sum(diff[1] for diff in diffs)} ink pixels")
+        for differing, ink, char in sorted(changed, reverse=True)[:args.worst]:
+            print(f"    {char!r}: {differing} pixels differ ({ink} ink pixels)")
+    print(f"All sections: resample {total['resample'] * 1000:.1f} ms, direct {total['direct'] * 1000:.1f} ms "
+          f"({total['resample'] / total['direct']:.2f}x)")
+
+if __name__ == "__main__":
+    main()
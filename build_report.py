@@ -0,0 +1,170 @@
+"""
+Build instrumentation: where a font ROM build spends its time and which glyphs drop out.
+
+A BuildReport is made active for the duration of a build (build_font_rom(report=...) or
+"with report.activate():"). While one is active:
+  - stage(name) blocks in fontrom add their wall time to report.stages
+    (render, combine, export, ...),
+  - record_glyphs() collects every glyph's outcome (rendered, cached, skipped, failed)
+    and its draw/resize/threshold/pack times, measured in whichever process rendered it,
+  - cProfile (profile=True) and tracemalloc (trace_memory=True) run in this process.
+With no active report both hooks do nothing, so the library pays nothing for them.
+
+report.write(path) saves everything as JSON.
+"""
+import cProfile
+import json
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Sub-stages timed for every rendered glyph, in the order render_glyphs returns them.
+GLYPH_STAGES = ("draw", "resize", "threshold", "pack")
+
+_ACTIVE = None
+
+@contextmanager
+def stage(name):
+    """Times the block as stage name of the active report (if any)."""
+    report = _ACTIVE
+    if report is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        report.add_stage(name, time.perf_counter() - started)
+
+def record_glyphs(section, results, cached=()):
+    """Adds render_glyphs() results for a section to the active report (if any)."""
+    if _ACTIVE is not None:
+        _ACTIVE.add_glyphs(section, results, cached)
+
+class BuildReport:
+    """
+    Timings and glyph outcomes of one build. info is free-form metadata (font, output
+    directory, ...) copied into the report as it is.
+    """
+    def __init__(self, profile=False, trace_memory=False, top=25):
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.top = top
+        self.info = {}
+        self.stages = {}
+        self.glyph_stages = dict.fromkeys(GLYPH_STAGES, 0.0)
+        self.glyphs = []
+        self.seconds = 0.0
+        self.profile_stats = None
+        self.memory = None
+
+    def add_stage(self, name, seconds):
+        entry = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+        entry["seconds"] += seconds
+        entry["calls"] += 1
+
+    def add_glyphs(self, section, results, cached=()):
+        for char, packed_rows, error, timings in results:
+            if char in cached:
+                status = "cached"
+            elif error is not None:
+                status = "failed"
+            elif packed_rows is None:
+                status = "skipped"
+            else:
+                status = "rendered"
+            entry = {"section": section, "char": char, "code_point": ord(char), "status": status,
+                     "seconds": sum(timings) if timings else 0.0}
+            if error is not None:
+                entry["error"] = error
+            self.glyphs.append(entry)
+            if timings:
+                for name, seconds in zip(GLYPH_STAGES, timings):
+                    self.glyph_stages[name] += seconds
+
+    def counts(self):
+        """{section: {status: number of glyphs}}."""
+        counts = {}
+        for glyph in self.glyphs:
+            section = counts.setdefault(glyph["section"], dict.fromkeys(
+                ("rendered", "cached", "skipped", "failed"), 0))
+            section[glyph["status"]] += 1
+        return counts
+
+    def failures(self):
+        return [glyph for glyph in self.glyphs if glyph["status"] in ("failed", "skipped")]
+
+    @contextmanager
+    def activate(self):
+        global _ACTIVE
+        previous = _ACTIVE
+        _ACTIVE = self
+        profiler = cProfile.Profile() if self.profile else None
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if profiler:
+            profiler.enable()
+        started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.seconds += time.perf_counter() - started
+            if profiler:
+                profiler.disable()
+                self.profile_stats = _profile_entries(profiler, self.top)
+            if self.trace_memory:
+                self.memory = _memory_entries(self.top)
+                if started_tracing:
+                    tracemalloc.stop()
+            _ACTIVE = previous
+
+    def to_dict(self):
+        return {
+            "info": self.info,
+            "seconds": self.seconds,
+            "stages": self.stages,
+            "glyph_stages": self.glyph_stages,
+            "sections": self.counts(),
+            "failures": self.failures(),
+            "slowest_glyphs": sorted(self.glyphs, key=lambda glyph: glyph["seconds"], reverse=True)[:self.top],
+            "glyphs": self.glyphs,
+            "profile": self.profile_stats,
+            "memory": self.memory,
+        }
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=1, ensure_ascii=False)
+        print(f"Build report saved as {path}")
+
+    def summary(self):
+        """A few lines for the console: total time, stage times and dropped glyphs."""
+        lines = [f"Build took {self.seconds:.2f} s"]
+        for name, entry in sorted(self.stages.items(), key=lambda item: -item[1]["seconds"]):
+            lines.append(f"  {name}: {entry['seconds']:.3f} s")
+        for glyph in self.failures():
+            lines.append(f"  {glyph['section']}: {glyph['char']!r} {glyph['status']}"
+                         + (f" ({glyph['error']})" if "error" in glyph else ""))
+        return "\n".join(lines)
+
+def _profile_entries(profiler, top):
+    """The top functions by cumulative time as JSON-friendly dicts."""
+    stats = pstats.Stats(profiler)
+    entries = []
+    for (filename, line, function), (_, calls, total, cumulative, _) in stats.stats.items():
+        entries.append({"function": f"{filename}:{line}({function})", "calls": calls,
+                        "total_seconds": total, "cumulative_seconds": cumulative})
+    entries.sort(key=lambda entry: entry["cumulative_seconds"], reverse=True)
+    return entries[:top]
+
+def _memory_entries(top):
+    current, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    return {
+        "current_bytes": current,
+        "peak_bytes": peak,
+        "top_allocations": [{"where": str(stat.traceback), "bytes": stat.size, "blocks": stat.count}
+                            for stat in snapshot.statistics("lineno")[:top]],
+    }
@@ -0,0 +1,176 @@
+"""
+Character sets given as ranges, and the code point -> glyph index table of a ROM.
+
+Character set specs are comma- or whitespace-separated items:
+    0x20-0x7E  U+2190..U+2193  0xB0  U+41  ascii  latin1  cyrillic  default
+Code points are always hexadecimal and always written with a 0x or U+ prefix (either
+case). A bare number is rejected rather than guessed at, since "41" would be "A" read as
+hex but ")" read as decimal. Named sets are listed in NAMED_SETS ("default" is fontrom's built-in list). A charset
+file holds the same items, one or more per line, with "#" comments; a line starting
+with "text:" adds the characters that follow literally (e.g. a CJK subset). Characters
+keep the order they are listed in (the ROM order); repeats are dropped.
+
+The code-point table maps characters to glyph indices without scanning. Consecutive code
+points with consecutive glyph indices are merged into one entry, so ASCII is one entry,
+and entries are sorted by code point for binary search. FontRomCodePoints.bin holds one
+table per section, all numbers big-endian:
+
+    header  "CPT1", section count (u8)
+    section name length (u8), name, entry count (u16), glyph count (u16),
+            entries of first code point (u32), count (u16), first glyph index (u16)
+
+CodePointTable.lookup() does exactly what firmware would: find the last entry whose first
+code point is <= the one wanted, then check it falls inside the entry.
+"""
+import bisect
+import re
+import struct
+
+MAGIC = b"CPT1"
+_ENTRY = struct.Struct(">IHH")
+
+NAMED_SETS = {
+    "ascii": [(0x20, 0x7E)],
+    "latin1": [(0xA0, 0xFF)],
+    "latin-ext-a": [(0x100, 0x17F)],
+    "greek": [(0x370, 0x3FF)],
+    "cyrillic": [(0x400, 0x4FF)],
+    "punctuation": [(0x2010, 0x2027)],
+    "arrows": [(0x2190, 0x21FF)],
+    "box": [(0x2500, 0x257F)],
+    "kana": [(0x3040, 0x30FF)],
+}
+
+_CODE_POINT = r"(?:0[xX]|[uU]\+)[0-9A-Fa-f]+"
+_RANGE = re.compile(rf"^({_CODE_POINT})(?:(?:-|\.\.)({_CODE_POINT}))?$")
+
+def _code_point(text):
+    """A code point matched by _CODE_POINT: hex digits after a 2-character prefix."""
+    value = int(text[2:], 16)
+    if not 0 <= value <= 0x10FFFF or 0xD800 <= value <= 0xDFFF:
+        raise ValueError(f"{text} is not a valid code point")
+    return value
+
+def _items(spec):
+    return [item for item in re.split(r"[,\s]+", spec.strip()) if item]
+
+def parse_charset(spec, default=None):
+    """
+    Returns the characters of a spec string, in order and without repeats.
+    default is the list "default" stands for.
+    """
+    chars = []
+    for item in _items(spec):
+        name = item.lower()
+        if name == "default":
+            if default is None:
+                raise ValueError("'default' is not available here")
+            chars += default
+        elif name in NAMED_SETS:
+            for first, last in NAMED_SETS[name]:
+                chars += [chr(code_point) for code_point in range(first, last + 1)]
+        else:
+            match = _RANGE.match(item)
+            if not match:
+                raise ValueError(f"Cannot read character set item '{item}' "
+                                 f"(use hex code points with a prefix, like 0xB0, 0x20-0x7E or "
+                                 f"U+2190..U+2193, or one of: {', '.join(sorted(NAMED_SETS))}, default)")
+            first = _code_point(match.group(1))
+            last = _code_point(match.group(2)) if match.group(2) else first
+            if last < first:
+                raise ValueError(f"Range '{item}' ends before it starts")
+            chars += [chr(code_point) for code_point in range(first, last + 1)
+                      if not 0xD800 <= code_point <= 0xDFFF]
+    return list(dict.fromkeys(chars))
+
+def load_charset(path, default=None):
+    """Reads a charset file (see the module docstring)."""
+    chars = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            if line.lstrip().startswith("text:"):
+                chars += list(line.lstrip()[len("text:"):].strip())
+                continue
+            line = line.split("#", 1)[0]
+            if line.strip():
+                chars += parse_charset(line, default)
+    return list(dict.fromkeys(chars))
+
+class CodePointTable:
+    """
+    Sorted (first code point, count, first glyph index) entries for one section.
+    lookup(char) returns the glyph index or None, in O(log entries).
+    """
+    def __init__(self, entries, glyph_count=None):
+        self.entries = sorted(entries)
+        self.firsts = [entry[0] for entry in self.entries]
+        self.glyph_count = glyph_count if glyph_count is not None else sum(entry[1] for entry in self.entries)
+
+    @classmethod
+    def from_index(cls, index):
+        """Builds the table of a {char: glyph index} mapping (e.g. GlyphAtlas.index)."""
+        entries = []
+        for code_point, glyph in sorted((ord(char), glyph) for char, glyph in index.items()):
+            if entries:
+                first, count, first_glyph = entries[-1]
+                if code_point == first + count and glyph == first_glyph + count and count < 0xFFFF:
+                    entries[-1][1] += 1
+                    continue
+            entries.append([code_point, 1, glyph])
+        return cls([tuple(entry) for entry in entries], len(index))
+
+    def __len__(self):
+        return self.glyph_count
+
+    def lookup(self, char):
+        code_point = char if isinstance(char, int) else ord(char)
+        position = bisect.bisect_right(self.firsts, code_point) - 1
+        if position < 0:
+            return None
+        first, count, glyph = self.entries[position]
+        if code_point >= first + count:
+            return None
+        return glyph + code_point - first
+
+    def __contains__(self, char):
+        return self.lookup(char) is not None
+
+    def to_bytes(self):
+        if self.glyph_count > 0xFFFF or len(self.entries) > 0xFFFF:
+            raise ValueError(f"{self.glyph_count} glyphs do not fit a 16-bit glyph index")
+        return struct.pack(">HH", len(self.entries), self.glyph_count) + \
+            b"".join(_ENTRY.pack(*entry) for entry in self.entries)
+
+def write_code_point_tables(tables, output_file):
+    """Writes {section name: CodePointTable} as FontRomCodePoints.bin."""
+    data = bytearray(MAGIC)
+    data.append(len(tables))
+    for name, table in tables.items():
+        encoded = name.encode("utf-8")
+        data.append(len(encoded))
+        data += encoded
+        data += table.to_bytes()
+    with open(output_file, "wb") as f:
+        f.write(data)
+    entries = sum(len(table.entries) for table in tables.values())
+    print(f"Code point table saved as {output_file} ({entries} entries, {len(data)} bytes)")
+
+def load_code_point_tables(path):
+    """Reads FontRomCodePoints.bin back into {section name: CodePointTable}."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a code point table (bad magic)")
+    tables = {}
+    pos = len(MAGIC) + 1
+    for _ in range(data[len(MAGIC)]):
+        name_length = data[pos]
+        name = data[pos + 1:pos + 1 + name_length].decode("utf-8")
+        pos += 1 + name_length
+        entry_count, glyph_count = struct.unpack_from(">HH", data, pos)
+        pos += 4
+        entries = [_ENTRY.unpack_from(data, pos + i * _ENTRY.size) for i in range(entry_count)]
+        pos += entry_count * _ENTRY.size
+        tables[name] = CodePointTable(entries, glyph_count)
+    return tables
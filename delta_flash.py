@@ -0,0 +1,150 @@
+"""
+Differential flashing: send only the parts of a ROM image that changed since the last
+flash.
+
+The image last written to the board is kept as a local copy (the manifest, by default
+<image>.flashed next to the image) or read back from the board with the READ opcode.
+changed_ranges() finds the differing byte ranges, merging ranges separated by fewer
+unchanged bytes than a frame's overhead (resending them is cheaper than a new frame), and
+delta_chunks() cuts them into protocol-sized packets for EepromLink. flash_and_save()
+replaces the manifest only after the board has acknowledged every packet.
+
+Command line:
+    python -m delta_flash FontRomCombined.bin --port COM3 [--manifest FILE] [--read-back]
+"""
+import argparse
+import os
+import sys
+
+from eeprom_link import EepromLink, MAX_PAYLOAD, address_size_for, format_stats
+from frame_codec import FrameCodec, SPECS
+
+# Block size for the first, coarse comparison (equal blocks are skipped at C speed).
+_COMPARE_BLOCK = 256
+
+def changed_ranges(old, new, merge_gap=0):
+    """
+    Returns the sorted (start, stop) byte ranges where new differs from old. Bytes past the
+    end of old count as changed. Ranges separated by at most merge_gap equal bytes are
+    merged into one.
+    """
+    old = old or b""
+    ranges = []
+    common = min(len(old), len(new))
+    for block in range(0, common, _COMPARE_BLOCK):
+        block_end = min(block + _COMPARE_BLOCK, common)
+        if old[block:block_end] == new[block:block_end]:
+            continue
+        for i in range(block, block_end):
+            if old[i] != new[i]:
+                if ranges and i - ranges[-1][1] <= merge_gap:
+                    ranges[-1][1] = i + 1
+                else:
+                    ranges.append([i, i + 1])
+    if len(new) > common:
+        if ranges and common - ranges[-1][1] <= merge_gap:
+            ranges[-1][1] = len(new)
+        else:
+            ranges.append([common, len(new)])
+    return [(start, stop) for start, stop in ranges]
+
+def _range_chunks(new, ranges, chunk_size, base_address):
+    chunks = []
+    for start, stop in ranges:
+        for offset in range(start, stop, chunk_size):
+            chunks.append((base_address + offset, bytes(new[offset:min(offset + chunk_size, stop)])))
+    return chunks
+
+def delta_chunks(old, new, chunk_size=32, merge_gap=0, base_address=0):
+    """(address, bytes) packets of at most chunk_size bytes covering every changed range."""
+    return _range_chunks(new, changed_ranges(old, new, merge_gap), chunk_size, base_address)
+
+def frame_overhead(codec):
+    """Bytes a frame adds around its payload (start, opcode, address, length, checksum)."""
+    return codec.header_size + codec.checksum_size
+
+def load_manifest(path):
+    """The last flashed image, or None if there is no manifest yet."""
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+def save_manifest(path, data):
+    """Stores the flashed image (atomically, so an interrupted save keeps the old one)."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def flash_delta(link, new, old=None, base_address=0, progress=None):
+    """
+    Writes the parts of new that differ from old (everything if old is None) through an
+    EepromLink. Returns write_chunks' statistics plus changed_bytes (bytes that differ),
+    sent_bytes (including merged gaps) and ranges.
+    """
+    ranges = changed_ranges(old, new, frame_overhead(link.framing))
+    chunks = _range_chunks(new, ranges, link.chunk_size, base_address)
+    stats = link.write_chunks(chunks, progress)
+    stats["changed_bytes"] = sum(stop - start for start, stop in changed_ranges(old, new))
+    stats["sent_bytes"] = sum(len(chunk) for _, chunk in chunks)
+    stats["ranges"] = len(ranges)
+    return stats
+
+def flash_and_save(link, new, manifest, old=None, base_address=0, progress=None):
+    """
+    flash_delta() followed by save_manifest(). The manifest is only replaced once every
+    packet has been acknowledged; a failed flash raises and leaves it as it was.
+    """
+    stats = flash_delta(link, new, old, base_address, progress)
+    save_manifest(manifest, new)
+    return stats
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="delta_flash", description="Flash only the changed parts of an image.")
+    parser.add_argument("image", help="new binary image, e.g. FontRomCombined.bin")
+    parser.add_argument("--port", required=True, help="serial port (COM3, /dev/ttyUSB0, ...)")
+    parser.add_argument("--baud", type=int, default=9600)
+    parser.add_argument("--manifest", help="copy of the last flashed image (default: <image>.flashed)")
+    parser.add_argument("--read-back", action="store_true",
+                        help="read the current contents from the board instead of using the manifest")
+    parser.add_argument("--full", action="store_true", help="ignore the manifest and send everything")
+    parser.add_argument("--address", type=lambda text: int(text, 0), default=0, help="start address")
+    parser.add_argument("--address-size", type=int,
+                        help="address bytes per frame (default: enough for the image)")
+    parser.add_argument("--framing", choices=sorted(SPECS), default="xor8", help="checksum variant")
+    parser.add_argument("--window", type=int, default=8, help="packets in flight")
+    parser.add_argument("--chunk-size", type=int, default=32, help=f"bytes per packet (max {MAX_PAYLOAD})")
+    parser.add_argument("--timeout", type=float, default=0.5, help="seconds before a packet is resent")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    import serial  # pyserial is only needed for real hardware
+
+    manifest = args.manifest or f"{args.image}.flashed"
+    with open(args.image, "rb") as f:
+        image = f.read()
+    try:
+        with serial.Serial(args.port, args.baud, timeout=0.05) as port:
+            address_size = args.address_size or address_size_for(args.address + len(image))
+            link = EepromLink(port, FrameCodec(args.framing, address_size), args.window,
+                              args.chunk_size, args.timeout)
+            if args.full:
+                old = None
+            elif args.read_back:
+                old, read_stats = link.read_image(len(image), args.address)
+                print(f"Read back {format_stats(read_stats)}")
+            else:
+                old = load_manifest(manifest)
+            stats = flash_and_save(link, image, manifest, old, args.address)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"{stats['changed_bytes']} bytes changed in {stats['ranges']} ranges; "
+          f"wrote {format_stats(stats)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
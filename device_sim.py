@@ -0,0 +1,357 @@
+"""
+Software stand-in for the board end of the 0xAA UART protocol (Mcu.c / Mcu2.c), so the
+host tools can be run and benchmarked without hardware.
+
+SimulatedDevice is the receiver state machine from Mcu2.c
+(WAIT_START -> READ_OPCODE -> READ_ADDR -> READ_LEN -> READ_DATA -> READ_CHECKSUM,
+reset when no byte arrives for 50 ms) with an eeprom_sim backing store. The checksum
+is whichever frame_codec framing the device is given (XOR8 like the firmware by default).
+  - WRITE stores the data and is ACKed with the address and data echoed, as in Mcu.c,
+  - READ carries a 1-byte payload, the number of bytes wanted (or, with a framing that
+    lists READ in no_payload, just the length byte), and is ACKed with that many bytes
+    from eeprom_sim (the firmware does not answer reads with data yet),
+  - SUM (eeprom_link.OPCODE_SUM, a 3-byte size) is ACKed with the 16-bit sum of that
+    many bytes, so an image can be verified without reading it back,
+  - a bad checksum, an unknown opcode or an access outside eeprom_sim is NACKed, with
+    the address as received echoed (like the ACKs) so the host can tell which packet
+    to resend.
+With echo=True the device answers like Mcu.c instead: every good frame, whatever its
+opcode, is ACKed with its own address and payload and nothing is stored or read.
+
+SimulatedPort connects a device to the host through an in-process, pyserial-like object
+(write, read, in_waiting, timeout) and models the wire: bytes take 10 bit times each at
+the given baud rate (8N1), every reply is delayed by latency seconds, and bytes can be
+dropped or have a bit flipped at random. PtyBridge serves a device on a pseudo-terminal
+instead, so unmodified tools can open it like a serial port.
+
+Command line (prints the pty path to open):
+    python -m device_sim [--baud 9600] [--address-size 3] [--corrupt-rate 0.001]
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+
+from eeprom_link import OPCODE_WRITE, OPCODE_READ, OPCODE_ACK, OPCODE_NACK, OPCODE_SUM, address_size_for
+from frame_codec import FrameCodec, SPECS
+
+# Receiver states, in the order of Mcu2.c's UART_State.
+WAIT_START, READ_OPCODE, READ_ADDR, READ_LEN, READ_DATA, READ_CHECKSUM = range(6)
+
+# Matches check_uart_timeout(): the parser resets after 50 ms without a byte.
+BYTE_TIMEOUT = 0.05
+# Size of FontRomCombined.bin.
+DEFAULT_MEMORY_SIZE = 0x12000
+# rx_buffer[64] holds opcode, address and length before the data.
+MAX_RX_DATA = 61
+
+class SimulatedDevice:
+    """
+    The board's frame receiver. feed(byte, now) processes one received byte at time now
+    (seconds, any clock) and returns the reply bytes it triggers (usually b"").
+    codec is the frame_codec.FrameCodec in use (XOR8 with 1 address byte by default).
+    echo=True answers like Mcu.c (see the module docstring).
+    Counters: frames (good frames), nacks, resets (inter-byte timeouts).
+    """
+    def __init__(self, memory_size=DEFAULT_MEMORY_SIZE, codec=None, byte_timeout=BYTE_TIMEOUT, echo=False):
+        self.eeprom_sim = bytearray(memory_size)
+        self.codec = codec or FrameCodec()
+        self.byte_timeout = byte_timeout
+        self.echo = echo
+        self.state = WAIT_START
+        self.last_byte_time = None
+        self.frames = 0
+        self.nacks = 0
+        self.resets = 0
+
+    def check_timeout(self, now):
+        """Resets a half-received frame after byte_timeout of silence (check_uart_timeout)."""
+        if (self.state != WAIT_START and self.last_byte_time is not None
+                and now - self.last_byte_time > self.byte_timeout):
+            self.state = WAIT_START
+            self.resets += 1
+
+    def feed(self, byte, now):
+        self.check_timeout(now)
+        self.last_byte_time = now
+
+        if self.state == WAIT_START:
+            if byte == self.codec.spec.start:
+                self.frame = bytearray((byte,))
+                self.state = READ_OPCODE
+            return b""
+
+        if self.state == READ_CHECKSUM:
+            self.trailer.append(byte)
+            if len(self.trailer) < self.codec.checksum_size:
+                return b""
+            self.state = WAIT_START
+            if self.codec.checksum(self.frame) != int.from_bytes(self.trailer, "big"):
+                return self._nack()
+            return self._execute()
+
+        self.frame.append(byte)
+        if self.state == READ_OPCODE:
+            self.opcode = byte
+            self.address = 0
+            self.address_left = self.codec.address_size
+            self.state = READ_ADDR
+        elif self.state == READ_ADDR:
+            self.address = (self.address << 8) | byte
+            self.address_left -= 1
+            if not self.address_left:
+                self.state = READ_LEN
+        elif self.state == READ_LEN:
+            self.length = byte
+            self.data = bytearray()
+            self.trailer = bytearray()
+            if self.opcode in self.codec.spec.no_payload:
+                self.state = READ_CHECKSUM
+            elif byte > MAX_RX_DATA:
+                # Would overrun rx_buffer on the board; drop the frame.
+                self.state = WAIT_START
+                return self._nack()
+            else:
+                self.state = READ_DATA if byte else READ_CHECKSUM
+        elif self.state == READ_DATA:
+            self.data.append(byte)
+            if len(self.data) >= self.length:
+                self.state = READ_CHECKSUM
+        return b""
+
+    def feed_bytes(self, data, now):
+        """Feeds several bytes received at the same time; returns all replies."""
+        reply = bytearray()
+        for byte in data:
+            reply += self.feed(byte, now)
+        return bytes(reply)
+
+    def _nack(self):
+        self.nacks += 1
+        return self.codec.encode(OPCODE_NACK, self.address)
+
+    def _execute(self):
+        address, data = self.address, bytes(self.data)
+        if self.echo:
+            self.frames += 1
+            return self.codec.encode(OPCODE_ACK, address, data)
+        if self.opcode == OPCODE_WRITE:
+            if address + len(data) > len(self.eeprom_sim):
+                return self._nack()
+            self.eeprom_sim[address:address + len(data)] = data
+            self.frames += 1
+            return self.codec.encode(OPCODE_ACK, address, data)
+        if self.opcode == OPCODE_READ and (self.opcode in self.codec.spec.no_payload or len(data) == 1):
+            count = self.length if self.opcode in self.codec.spec.no_payload else data[0]
+            if address + count > len(self.eeprom_sim) or count > MAX_RX_DATA:
+                return self._nack()
+            self.frames += 1
+            return self.codec.encode(OPCODE_ACK, address, self.eeprom_sim[address:address + count])
+        if self.opcode == OPCODE_SUM and len(data) == 3:
+            size = int.from_bytes(data, "big")
+            if address + size > len(self.eeprom_sim):
+                return self._nack()
+            self.frames += 1
+            total = sum(self.eeprom_sim[address:address + size]) & 0xFFFF
+            return self.codec.encode(OPCODE_ACK, address, total.to_bytes(2, "big"))
+        return self._nack()
+
+class _Wire:
+    """
+    One direction of the serial line: paces bytes at the baud rate, adds latency and
+    injects faults. schedule() returns (arrival time, byte) pairs.
+    """
+    def __init__(self, baud, latency, corrupt_rate, drop_rate, rng):
+        self.byte_time = 10.0 / baud if baud else 0.0
+        self.latency = latency
+        self.corrupt_rate = corrupt_rate
+        self.drop_rate = drop_rate
+        self.rng = rng
+        self.free_at = 0.0
+        self.dropped = 0
+        self.corrupted = 0
+
+    def schedule(self, data, now):
+        start = max(now, self.free_at)
+        self.free_at = start + len(data) * self.byte_time
+        arrivals = []
+        for i, byte in enumerate(data):
+            if self.drop_rate and self.rng.random() < self.drop_rate:
+                self.dropped += 1
+                continue
+            if self.corrupt_rate and self.rng.random() < self.corrupt_rate:
+                byte ^= 1 << self.rng.randrange(8)
+                self.corrupted += 1
+            arrivals.append((start + (i + 1) * self.byte_time + self.latency, byte))
+        return arrivals
+
+class SimulatedPort:
+    """
+    pyserial-like connection to a SimulatedDevice. read(size) waits up to timeout seconds
+    for size bytes and returns what has arrived by then, like serial.Serial.read.
+    baud=None sends bytes instantly. latency delays every reply, corrupt_rate and
+    drop_rate are per-byte probabilities applied in both directions (seed makes them
+    repeatable).
+    """
+    def __init__(self, device, baud=None, latency=0.0, corrupt_rate=0.0, drop_rate=0.0,
+                 timeout=0.05, seed=None):
+        rng = random.Random(seed)
+        self.device = device
+        self.timeout = timeout
+        self.to_device = _Wire(baud, 0.0, corrupt_rate, drop_rate, rng)
+        self.to_host = _Wire(baud, latency, corrupt_rate, drop_rate, rng)
+        self._outgoing = deque()  # (arrival time at the device, byte)
+        self._incoming = deque()  # (arrival time at the host, byte)
+        self.is_open = True
+
+    def _advance(self, now):
+        """Delivers every byte that has reached the device by now."""
+        while self._outgoing and self._outgoing[0][0] <= now:
+            arrival, byte = self._outgoing.popleft()
+            reply = self.device.feed(byte, arrival)
+            if reply:
+                self._incoming.extend(self.to_host.schedule(reply, arrival))
+
+    def _ready(self, now):
+        count = 0
+        for arrival, _ in self._incoming:
+            if arrival > now:
+                break
+            count += 1
+        return count
+
+    def write(self, data):
+        self._outgoing.extend(self.to_device.schedule(bytes(data), time.monotonic()))
+        return len(data)
+
+    def read(self, size=1):
+        deadline = time.monotonic() + (self.timeout or 0)
+        while True:
+            now = time.monotonic()
+            self._advance(now)
+            ready = self._ready(now)
+            if ready >= size or now >= deadline:
+                return bytes(self._incoming.popleft()[1] for _ in range(min(ready, size)))
+            upcoming = [deadline]
+            if self._outgoing:
+                upcoming.append(self._outgoing[0][0])
+            if len(self._incoming) > ready:
+                upcoming.append(self._incoming[ready][0])
+            time.sleep(max(min(upcoming) - now, 0))
+
+    @property
+    def in_waiting(self):
+        now = time.monotonic()
+        self._advance(now)
+        return self._ready(now)
+
+    def reset_input_buffer(self):
+        self._incoming.clear()
+
+    def close(self):
+        self.is_open = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class PtyBridge:
+    """
+    Serves a SimulatedDevice on a pseudo-terminal (POSIX only). Open self.port with
+    pyserial or any other serial tool. Received bytes go through the same wire model as
+    SimulatedPort (baud pacing, latency, faults).
+    """
+    def __init__(self, device, baud=None, latency=0.0, corrupt_rate=0.0, drop_rate=0.0, seed=None):
+        import pty
+        import tty
+
+        self.device = device
+        rng = random.Random(seed)
+        self.to_device = _Wire(baud, 0.0, corrupt_rate, drop_rate, rng)
+        self.to_host = _Wire(baud, latency, corrupt_rate, drop_rate, rng)
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _serve(self):
+        import select
+
+        pending = deque()  # (time, byte) on the way to the device
+        replies = deque()  # (time, byte) on the way to the host
+        while not self._stop.is_set():
+            now = time.monotonic()
+            upcoming = [queue[0][0] for queue in (pending, replies) if queue]
+            wait = max(min(upcoming) - now, 0) if upcoming else 0.05
+            readable, _, _ = select.select([self.master], [], [], min(wait, 0.05))
+            now = time.monotonic()
+            if readable:
+                try:
+                    data = os.read(self.master, 4096)
+                except OSError:
+                    break
+                pending.extend(self.to_device.schedule(data, now))
+            while pending and pending[0][0] <= now:
+                arrival, byte = pending.popleft()
+                reply = self.device.feed(byte, arrival)
+                if reply:
+                    replies.extend(self.to_host.schedule(reply, arrival))
+            out = bytearray()
+            while replies and replies[0][0] <= now:
+                out.append(replies.popleft()[1])
+            if out:
+                os.write(self.master, out)
+
+    def close(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        os.close(self.master)
+        os.close(self.slave)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="device_sim", description="Serve a simulated board on a pty.")
+    parser.add_argument("--baud", type=int, help="pace bytes at this baud rate (default: no pacing)")
+    parser.add_argument("--latency", type=float, default=0.0, help="reply latency in seconds")
+    parser.add_argument("--address-size", type=int,
+                        help="address bytes per frame (default: enough for the memory)")
+    parser.add_argument("--framing", choices=sorted(SPECS), default="xor8", help="checksum variant")
+    parser.add_argument("--memory-size", type=lambda text: int(text, 0), default=DEFAULT_MEMORY_SIZE)
+    parser.add_argument("--corrupt-rate", type=float, default=0.0, help="chance of a bit flip per byte")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="chance of losing a byte")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--echo", action="store_true", help="echo every frame like Mcu.c instead of storing it")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    address_size = args.address_size or address_size_for(args.memory_size)
+    device = SimulatedDevice(args.memory_size, FrameCodec(args.framing, address_size), echo=args.echo)
+    with PtyBridge(device, args.baud, args.latency, args.corrupt_rate, args.drop_rate, args.seed) as bridge:
+        print(f"Simulated device on {bridge.port} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+    print(f"{device.frames} frames, {device.nacks} NACKs, {device.resets} parser resets")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,297 @@
+"""
+Host side of the 0xAA-framed UART link to the board (Mcu.c / Mcu2.c / Mcu.h).
+
+A frame is
+    0xAA, opcode, address (address_size bytes, big-endian), length, data..., checksum
+built by frame_codec; the default XOR8 framing is the one Mcu2.c checks.
+The board answers a good frame with an ACK frame echoing the address and data, and a
+frame with a bad checksum with an empty NACK frame echoing the address as received.
+Replies come back in the order the frames were received.
+
+EepromLink.write_image() splits an image into packets and keeps a window of them in
+flight, so the link is never idle waiting for an ACK. Only packets that are NACKed, time
+out or come back with the wrong echo are sent again. read_image() / read_ranges() do the
+same with READ requests (answered with the data by device_sim; the current firmware ACKs
+reads without data).
+
+Any object with write(data) and read(size) (returning fewer bytes, or none, when its own
+timeout runs out) can be the transport: a pyserial Serial port or a simulated device.
+
+Command line:
+    python -m eeprom_link FontRomCombined.bin --port COM3 [--baud 9600] [--address-size 3]
+"""
+import argparse
+import sys
+import time
+from collections import deque
+
+from frame_codec import FrameCodec, SPECS, sum16
+
+# Opcodes from Mcu.h.
+OPCODE_WRITE = 0x02
+OPCODE_READ = 0x55
+OPCODE_ACK = 0xCC
+OPCODE_NACK = 0x33
+# Host/simulator extension, not in Mcu.h yet: the payload is a 3-byte block size and the
+# ACK carries the 16-bit sum of that many bytes from the address (the same sum as the
+# 2-byte trailer of Statem.c's READ replies). EepromLink.block_sums() falls back to READ
+# on boards that do not answer it.
+OPCODE_SUM = 0x5A
+
+# Mcu.c builds replies in a 64-byte buffer: 0xAA, opcode, address, length, checksum and
+# the echoed data have to fit.
+MAX_PAYLOAD = 59
+
+# At 0.2% dropped plus 0.2% corrupted bytes about a third of all 32-byte exchanges fail (a
+# dropped byte also costs the next frame its start byte), so a 2304-packet image needs
+# well over 5 retries for its unluckiest packet.
+MAX_RETRIES = 16
+
+def address_size_for(end_address):
+    """Address bytes a frame needs to reach every address below end_address (at least 1)."""
+    return max(1, (max(end_address - 1, 0).bit_length() + 7) // 8)
+
+class EepromLink:
+    """
+    Windowed read/write client for the board's EEPROM.
+    window packets of chunk_size bytes are kept in flight. A packet is resent when the
+    board NACKs it, echoes different data or leaves it unanswered for timeout seconds;
+    after max_retries resends the transfer is abandoned with an OSError.
+    """
+    def __init__(self, transport, framing=None, window=8, chunk_size=32, timeout=0.5, max_retries=MAX_RETRIES):
+        if not 1 <= chunk_size <= MAX_PAYLOAD:
+            raise ValueError(f"chunk_size must be between 1 and {MAX_PAYLOAD}")
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        self.transport = transport
+        self.framing = framing or FrameCodec()
+        self.window = window
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.decoder = self.framing.decoder(max_length=MAX_PAYLOAD)
+        # Whether the board answers OPCODE_SUM; None until block_sums() has asked.
+        self.sum_supported = None
+
+    def _receive(self):
+        """Reads whatever the transport has (waiting up to its own timeout for 1 byte)."""
+        size = getattr(self.transport, "in_waiting", 0) or 1
+        return self.decoder.feed(self.transport.read(size))
+
+    def chunks(self, data, base_address=0):
+        """Splits data into (address, bytes) packets of at most chunk_size bytes."""
+        data = bytes(data)
+        return [(base_address + start, data[start:start + self.chunk_size])
+                for start in range(0, len(data), self.chunk_size)]
+
+    def _read_request(self, address, count):
+        """
+        (request, offset): a transfer request for count bytes from address, and where they
+        start in its reply. Mcu.c ACKs every frame with its own payload, which for a READ is
+        the 1-byte count, so a 1-byte read could not be told from that echo: it asks for 2
+        bytes (ending at address when there is a byte before it) and keeps one.
+        """
+        if OPCODE_READ in self.framing.spec.no_payload:
+            packet = self.framing.encode(OPCODE_READ, address, length=count)
+            return (address, packet, count, lambda data: len(data) == count), 0
+        offset = 0
+        if count == 1:
+            offset = 1 if address > 0 else 0
+            address -= offset
+            count = 2
+        packet = self.framing.encode(OPCODE_READ, address, bytes([count]))
+        return (address, packet, count, lambda data: len(data) == count), offset
+
+    def transfer(self, requests, progress=None, max_retries=None):
+        """
+        Runs (address, packet, size, check) requests through the window and returns
+        ([reply data per request], statistics). check(reply data) says whether an ACK is the
+        right answer; size is the number of data bytes the request moves. max_retries
+        overrides the link's own limit.
+        Statistics: bytes, packets, retransmits, nacks, timeouts, seconds, bytes_per_second.
+        progress, if given, is called as progress(done_bytes, total_bytes).
+
+        Every frame written is queued in sent. The board answers frames in the order it
+        received them and echoes the address in ACKs and NACKs, so a reply belongs to the
+        oldest queued frame with its address. Frames skipped over got no answer and are
+        dropped from the queue; their requests are only resent once they time out, as are
+        those of frames NACKed with an address too damaged to match.
+        """
+        if max_retries is None:
+            max_retries = self.max_retries
+        total = sum(request[2] for request in requests)
+        stats = {"bytes": total, "packets": len(requests), "retransmits": 0, "nacks": 0, "timeouts": 0}
+        pending = deque(enumerate(requests))
+        in_flight = {}  # request index -> [request, sent_at, tries, sequence of the last send]
+        sent = deque()  # (sequence, request index, address) of every frame awaiting a reply
+        replies = [None] * len(requests)
+        done = 0
+        sequence = 0
+        started = time.perf_counter()
+
+        def send(index, request, tries):
+            nonlocal sequence
+            if tries > max_retries:
+                raise OSError(f"No good ACK for address 0x{request[0]:X} after {max_retries} retries")
+            self.transport.write(request[1])
+            sequence += 1
+            in_flight[index] = [request, time.monotonic(), tries, sequence]
+            sent.append((sequence, index, request[0]))
+
+        def resend(index):
+            request, _, tries, _ = in_flight[index]
+            stats["retransmits"] += 1
+            send(index, request, tries + 1)
+
+        def answered(address):
+            """Pops the frame a reply answers; returns (sequence, request index) or None."""
+            for position, (number, index, sent_address) in enumerate(sent):
+                if sent_address == address:
+                    for _ in range(position + 1):
+                        sent.popleft()
+                    return number, index
+            return None
+
+        while pending or in_flight:
+            while pending and len(in_flight) < self.window:
+                send(*pending.popleft(), 0)
+
+            for frame in self._receive():
+                if frame.opcode not in (OPCODE_ACK, OPCODE_NACK):
+                    continue
+                if frame.opcode == OPCODE_NACK:
+                    stats["nacks"] += 1
+                match = answered(frame.address)
+                if match is None:
+                    continue
+                number, index = match
+                entry = in_flight.get(index)
+                if entry is None:
+                    continue  # a late reply to a request that is already done
+                if frame.opcode == OPCODE_NACK or not entry[0][3](frame.data):
+                    if number == entry[3]:
+                        resend(index)  # otherwise a newer copy is already on its way
+                    continue
+                del in_flight[index]
+                replies[index] = frame.data
+                done += entry[0][2]
+                if progress:
+                    progress(done, total)
+
+            now = time.monotonic()
+            for index in [index for index, entry in in_flight.items() if now - entry[1] > self.timeout]:
+                stats["timeouts"] += 1
+                resend(index)
+
+        stats["seconds"] = time.perf_counter() - started
+        stats["bytes_per_second"] = total / stats["seconds"] if stats["seconds"] else 0.0
+        return replies, stats
+
+    def write_chunks(self, chunks, progress=None):
+        """
+        Writes (address, bytes) packets and returns transfer statistics (see transfer).
+        Every packet is encoded before anything is sent, so a bad address fails early.
+        """
+        requests = [(address, self.framing.encode(OPCODE_WRITE, address, chunk), len(chunk),
+                     bytes(chunk).__eq__)
+                    for address, chunk in chunks]
+        return self.transfer(requests, progress)[1]
+
+    def write_image(self, data, base_address=0, progress=None):
+        """Writes a whole image starting at base_address; see write_chunks for the result."""
+        return self.write_chunks(self.chunks(data, base_address), progress)
+
+    def read_ranges(self, ranges, progress=None):
+        """
+        Reads (address, size) ranges with the READ opcode, chunk_size bytes per packet.
+        Returns ([bytes per range], statistics).
+        """
+        requests = []
+        pieces = []  # per range: [(request index, offset, count)]
+        for address, size in ranges:
+            pieces.append([])
+            for start in range(address, address + size, self.chunk_size):
+                count = min(self.chunk_size, address + size - start)
+                request, offset = self._read_request(start, count)
+                pieces[-1].append((len(requests), offset, count))
+                requests.append(request)
+        replies, stats = self.transfer(requests, progress)
+        results = [b"".join(replies[index][offset:offset + count] for index, offset, count in range_pieces)
+                   for range_pieces in pieces]
+        return results, stats
+
+    def _sum_request(self, address, size):
+        return (address, self.framing.encode(OPCODE_SUM, address, size.to_bytes(3, "big")), 0,
+                lambda data: len(data) == 2)
+
+    def supports_sum(self, address=0):
+        """
+        Whether the board answers OPCODE_SUM, found out once by asking for the sum of the
+        byte at address. Mcu.c echoes the 3-byte payload instead and Mcu2.c ignores
+        unknown opcodes, so a wrong answer, NACKs or silence after a few tries all mean no.
+        """
+        if self.sum_supported is None:
+            try:
+                self.transfer([self._sum_request(address, 1)], max_retries=2)
+                self.sum_supported = True
+            except OSError:
+                self.sum_supported = False
+        return self.sum_supported
+
+    def block_sums(self, blocks, progress=None):
+        """
+        Returns ([16-bit sum per (address, size) block], statistics). The board sums the
+        blocks itself (OPCODE_SUM) if it can; otherwise they are read back with READ and
+        summed here.
+        """
+        if blocks and not self.supports_sum(blocks[0][0]):
+            contents, stats = self.read_ranges(blocks, progress)
+            return [sum16(data) for data in contents], stats
+        replies, stats = self.transfer([self._sum_request(address, size) for address, size in blocks], progress)
+        return [int.from_bytes(reply, "big") for reply in replies], stats
+
+    def read_image(self, size, base_address=0, progress=None):
+        """Reads size bytes from base_address; returns (bytes, statistics)."""
+        results, stats = self.read_ranges([(base_address, size)], progress)
+        return results[0], stats
+
+def format_stats(stats):
+    return (f"{stats['bytes']} bytes in {stats['packets']} packets, {stats['seconds']:.2f} s "
+            f"({stats['bytes_per_second']:.0f} bytes/s), {stats['retransmits']} retransmitted "
+            f"({stats['nacks']} NACK, {stats['timeouts']} lost/timed out)")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="eeprom_link", description="Write an image to the board's EEPROM.")
+    parser.add_argument("image", help="binary image, e.g. FontRomCombined.bin")
+    parser.add_argument("--port", required=True, help="serial port (COM3, /dev/ttyUSB0, ...)")
+    parser.add_argument("--baud", type=int, default=9600)
+    parser.add_argument("--address", type=lambda text: int(text, 0), default=0, help="start address")
+    parser.add_argument("--address-size", type=int,
+                        help="address bytes per frame (default: enough for the image; "
+                             "the current firmware uses 1)")
+    parser.add_argument("--framing", choices=sorted(SPECS), default="xor8", help="checksum variant")
+    parser.add_argument("--window", type=int, default=8, help="packets in flight")
+    parser.add_argument("--chunk-size", type=int, default=32, help=f"bytes per packet (max {MAX_PAYLOAD})")
+    parser.add_argument("--timeout", type=float, default=0.5, help="seconds before a packet is resent")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    import serial  # pyserial is only needed for real hardware
+
+    with open(args.image, "rb") as f:
+        image = f.read()
+    try:
+        with serial.Serial(args.port, args.baud, timeout=0.05) as port:
+            address_size = args.address_size or address_size_for(args.address + len(image))
+            link = EepromLink(port, FrameCodec(args.framing, address_size), args.window,
+                              args.chunk_size, args.timeout)
+            stats = link.write_image(image, args.address)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"Wrote {format_stats(stats)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,767 @@
+"""
+Font to XBM/MIF/ROM converter library.
+
+Everything needed to turn a TTF font into FontRomCombined.bin (and optionally the
+XBM/MIF files) without a GUI. The Tk front-end lives in "next_gen_tool - Copy-1.py".
+
+Command line:
+    python -m fontrom --ttf font.ttf --output-dir out
+    python -m fontrom --ttf font.ttf --output-dir out --forced-height 32x64_orig=40 --export-xbm-mif
+    python -m fontrom --ttf font.ttf --output-dir out --export coe,memh,ihex
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from mif import MifReader, DATA, split_mif_lanes
+from build_report import BuildReport, stage, record_glyphs
+from glyph_cache import GlyphCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, font_file_hash
+from rom_layout import (load_rom_layout, check_rom_layout, part_offsets,
+                        pack_rom_sections, write_address_map, apply_section_overrides)
+from rom_compress import write_compressed_rom
+from rom_export import export_glyphs, export_sections, parse_formats
+from charset import CodePointTable, write_code_point_tables, parse_charset, load_charset
+
+# Bit order used when packing pixel rows into bytes.
+# "big" puts the leftmost pixel in the MSB (what the ROM expects today),
+# "little" puts it in the LSB, i.e. every byte run through a real reverse_bits.
+BIT_ORDER = "big"
+
+def reverse_bits(byte):
+    # """Reverse the bits in a single byte (8 bits)."""
+    # reversed_byte = 0
+    # for i in range(8):
+    #     if byte & (1 << i):
+    #         reversed_byte |= (1 << (7 - i))
+    return byte
+
+def pack_glyph_bits(pixels, bit_order=None):
+    """
+    Packs a binary pixel array into bytes, 8 columns per byte.
+    Works on a single glyph (rows x cols) or a whole glyph set (n x rows x cols)
+    and returns a contiguous uint8 array with the last axis packed.
+    Columns that do not fill a whole byte are padded with zero bits.
+    """
+    if bit_order is None:
+        bit_order = BIT_ORDER
+    return np.packbits(np.asarray(pixels) != 0, axis=-1, bitorder=bit_order)
+
+class GlyphAtlas:
+    """
+    Packed glyph bitmaps for one ROM section.
+    bits is a single (n_glyphs, canvas_height, bytes_per_row) uint8 array and
+    index maps each character to its glyph number, in ROM address order.
+    items() yields (char, rows) pairs, so writers can treat it like the old
+    dict of nested lists.
+    """
+    def __init__(self, canvas_width, canvas_height, capacity=0):
+        self.canvas_width = canvas_width
+        self.canvas_height = canvas_height
+        self.bytes_per_row = (canvas_width + 7) // 8
+        self.bits = np.zeros((capacity, canvas_height, self.bytes_per_row), dtype=np.uint8)
+        self.index = {}
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, char):
+        return char in self.index
+
+    def __getitem__(self, char):
+        return self.bits[self.index[char]]
+
+    def chars(self):
+        return list(self.index)
+
+    def items(self):
+        for char, glyph in self.index.items():
+            yield char, self.bits[glyph]
+
+    def add(self, char, packed_rows):
+        """Stores a packed glyph, reusing the slot if the character is already present."""
+        glyph = self.index.get(char)
+        if glyph is None:
+            glyph = len(self.index)
+            if glyph >= self.bits.shape[0]:
+                extra = np.zeros((max(glyph, 16),) + self.bits.shape[1:], dtype=np.uint8)
+                self.bits = np.concatenate([self.bits, extra])
+            self.index[char] = glyph
+        self.bits[glyph] = packed_rows
+        return glyph
+
+    def trim(self):
+        """Drops unused preallocated slots."""
+        self.bits = self.bits[:len(self.index)]
+        return self
+
+    def words(self, byte_start=0, byte_stop=None):
+        """
+        Returns the glyph rows as one (n_glyphs * canvas_height, n_bytes) array in
+        address order. byte_start/byte_stop select a slice of every row, e.g. the
+        high (0:2) or low (2:4) half of a 32-pixel row.
+        """
+        rows = self.bits[:len(self.index), :, byte_start:byte_stop]
+        return rows.reshape(-1, rows.shape[-1])
+
+# Special cases for punctuation/narrow characters: scaled to a fraction of the forced
+# height (and bottom-aligned) or to a fraction of their natural width.
+PUNCTUATION_SET = frozenset({',', '.'})
+PUNCTUATION_SCALE = 0.25
+NARROW_CHARS = frozenset({"I"})
+NARROW_CHAR_SCALE = 0.5
+
+# Fonts already opened in this process, keyed by (path, size, mtime).
+# Worker processes keep their own cache, so each worker opens a face only once.
+_FONT_CACHE = {}
+
+def load_font(ttf_path, font_size):
+    """Returns ImageFont.truetype(ttf_path, font_size), reusing faces opened earlier."""
+    from PIL import ImageFont
+
+    key = (os.path.abspath(ttf_path), font_size, os.path.getmtime(ttf_path))
+    font = _FONT_CACHE.get(key)
+    if font is None:
+        font = _FONT_CACHE[key] = ImageFont.truetype(ttf_path, font_size)
+    return font
+
+def drop_stale_fonts():
+    """Forgets faces whose font file changed or disappeared since they were opened."""
+    for key in list(_FONT_CACHE):
+        path, _, mtime = key
+        try:
+            stale = os.path.getmtime(path) != mtime
+        except OSError:
+            stale = True
+        if stale:
+            del _FONT_CACHE[key]
+
+# Rasterization engines:
+#   "resample"  draw at twice the forced height, then LANCZOS-resize to the target box
+#   "direct"    draw at the font size whose ink fills the target box, no resize; glyphs
+#               whose aspect ratio is changed (max_width clamp, NARROW_CHAR_SCALE) still
+#               go through "resample"
+RASTER_ENGINES = ("resample", "direct")
+
+def _fit_grey(grey, height, width):
+    """Centres a grey array on a (height, width) array, cropping whatever does not fit."""
+    fitted = np.zeros((height, width), dtype=np.uint8)
+    src_top = max((grey.shape[0] - height) // 2, 0)
+    src_left = max((grey.shape[1] - width) // 2, 0)
+    dst_top = max((height - grey.shape[0]) // 2, 0)
+    dst_left = max((width - grey.shape[1]) // 2, 0)
+    rows = min(height, grey.shape[0])
+    columns = min(width, grey.shape[1])
+    fitted[dst_top:dst_top + rows, dst_left:dst_left + columns] = \
+        grey[src_top:src_top + rows, src_left:src_left + columns]
+    return fitted
+
+def render_direct(ttf_path, char, reference_size, reference_height, width, height):
+    """
+    Draws char at the font size that makes its ink height equal to height (its ink is
+    reference_height pixels at reference_size) and returns a (height, width) grey array.
+    """
+    from PIL import Image, ImageDraw
+
+    size = max(round(reference_size * height / reference_height), 1)
+    font = load_font(ttf_path, size)
+    (ink_width, ink_height), (offset_x, offset_y) = font.font.getsize(char)
+    if ink_height and ink_height != height:
+        # Hinting rounds the outline to whole pixels; one correction lands on the target.
+        size = max(round(size * height / ink_height), 1)
+        font = load_font(ttf_path, size)
+        (ink_width, ink_height), (offset_x, offset_y) = font.font.getsize(char)
+    if ink_width == 0 or ink_height == 0:
+        return np.zeros((height, width), dtype=np.uint8)
+    image = Image.new('L', (ink_width, ink_height), 0)
+    ImageDraw.Draw(image).text((-offset_x, -offset_y), char, font=font, fill=255)
+    return _fit_grey(np.array(image), height, width)
+
+def render_glyphs(ttf_path, chars, forced_height, max_width,
+                  canvas_width, canvas_height,
+                  padding_top=0, padding_bottom=0,
+                  grid_width_override=None, grid_height_override=None,
+                  threshold_value=128, raster="resample"):
+    """
+    Renders characters with one section's settings (see generate_xbm_data).
+    Returns a list of (char, packed_rows, error, timings) in the order of chars, where
+    packed_rows is None for characters that were skipped, error says why one could not be
+    processed and timings is the (draw, resize, threshold, pack) seconds of the glyph
+    (see build_report.GLYPH_STAGES). raster is one of RASTER_ENGINES.
+    """
+    from PIL import Image, ImageDraw
+
+    if raster not in RASTER_ENGINES:
+        raise ValueError(f"Unknown raster engine '{raster}' (known: {', '.join(RASTER_ENGINES)})")
+    results = []
+    if not chars:
+        return results
+
+    font_size = forced_height * 2
+    font = load_font(ttf_path, font_size)
+    
+    # Special cases for punctuation/narrow characters.
+    punctuation_set = PUNCTUATION_SET
+    punctuation_scale = PUNCTUATION_SCALE
+    narrow_chars = NARROW_CHARS
+    narrow_char_scale = NARROW_CHAR_SCALE
+
+    # Determine grid dimensions.
+    use_grid = True
+    if grid_width_override is not None and grid_height_override is not None:
+        grid_width = grid_width_override
+        grid_height = grid_height_override
+    elif canvas_width == 32 and canvas_height == 64:
+        grid_width = 17
+        grid_height = 39
+    else:
+        use_grid = False
+        grid_width = canvas_width
+        grid_height = canvas_height
+
+    # Scratch canvas reused for every character.
+    padded_array = np.zeros((canvas_height, canvas_width), dtype=np.uint8)
+
+    for char in chars:
+        started = time.perf_counter()
+        try:
+            if char == " ":
+                # Create an empty grid for a space character.
+                packed = pack_glyph_bits(np.zeros_like(padded_array))
+                results.append((char, packed, None, (0.0, 0.0, 0.0, time.perf_counter() - started)))
+                continue
+
+            (width, height), (offset_x, offset_y) = font.font.getsize(char)
+            if width == 0 or height == 0:
+                results.append((char, None, None, (time.perf_counter() - started, 0.0, 0.0, 0.0)))
+                continue
+
+            # Set target scaling based on character type.
+            if char in punctuation_set:
+                target_height = int(forced_height * punctuation_scale)
+                aspect_ratio = width / height
+                scaled_width = min(int(target_height * aspect_ratio), max_width)
+            elif char in narrow_chars:
+                target_height = forced_height
+                aspect_ratio = width / height
+                scaled_width = min(int(target_height * aspect_ratio * narrow_char_scale), max_width)
+            else:
+                target_height = forced_height
+                aspect_ratio = width / height
+                scaled_width = min(int(target_height * aspect_ratio), max_width)
+
+            if (raster == "direct" and char not in narrow_chars
+                    and scaled_width == int(target_height * aspect_ratio)):
+                # Aspect ratio kept: draw straight at the target size.
+                grey = render_direct(ttf_path, char, font_size, height, scaled_width, target_height)
+                drawn = resized = time.perf_counter()
+            else:
+                # Render the character into an image.
+                image = Image.new('L', (width, height), 0)
+                draw = ImageDraw.Draw(image)
+                draw.text((-offset_x, -offset_y), char, font=font, fill=255)
+                drawn = time.perf_counter()
+
+                grey = np.array(image.resize((scaled_width, target_height), Image.Resampling.LANCZOS))
+                resized = time.perf_counter()
+            binary_array = (grey > threshold_value).astype(np.uint8)
+            thresholded = time.perf_counter()
+
+            # Clear the padded array.
+            padded_array.fill(0)
+
+            if use_grid:
+                # For the 32x64 canvas (or an explicit grid), align using grid dimensions.
+                if char in punctuation_set:
+                    # Align punctuation to the bottom of the grid.
+                    vertical_offset = grid_height - binary_array.shape[0]
+                else:
+                    vertical_offset = max((grid_height - binary_array.shape[0]) // 2, 0)
+                horizontal_offset = max((grid_width - binary_array.shape[1]) // 2, 0)
+                padded_array[vertical_offset:vertical_offset + binary_array.shape[0],
+                             horizontal_offset:horizontal_offset + binary_array.shape[1]] = binary_array
+            else:
+                # Otherwise use padding values directly.
+                vertical_start = padding_top
+                horizontal_padding = (canvas_width - scaled_width) // 2
+                padded_array[vertical_start:vertical_start + target_height,
+                             horizontal_padding:horizontal_padding + scaled_width] = binary_array
+
+            # Convert padded image rows into an array of bytes.
+            packed = pack_glyph_bits(padded_array)
+            results.append((char, packed, None, (drawn - started, resized - drawn, thresholded - resized,
+                                                 time.perf_counter() - thresholded)))
+
+        except Exception as e:
+            results.append((char, None, str(e), None))
+
+    return results
+
+def collect_glyph_atlas(results, canvas_width, canvas_height):
+    """Builds a GlyphAtlas from render_glyphs() results, reporting characters that failed."""
+    atlas = GlyphAtlas(canvas_width, canvas_height, capacity=len(results))
+    for char, packed_rows, error, _ in results:
+        if error is not None:
+            print(f"Warning: Unable to process character '{char}'. Reason: {error}")
+        elif packed_rows is not None:
+            atlas.add(char, packed_rows)
+    return atlas.trim()
+
+def _shard(chars, n_shards):
+    """Splits chars into at most n_shards contiguous runs."""
+    size = max(-(-len(chars) // max(n_shards, 1)), 1)
+    return [chars[i:i + size] for i in range(0, len(chars), size)]
+
+def _submit_shards(pool, ttf_path, chars, render_args, n_shards):
+    """Submits render_glyphs for every shard of chars; returns the futures in address order."""
+    return [pool.submit(render_glyphs, ttf_path, shard, *render_args)
+            for shard in _shard(chars, n_shards)]
+
+def _gather_shards(futures):
+    """Concatenates shard results in submission order, whatever order workers finished in."""
+    return [result for future in futures for result in future.result()]
+
+def generate_xbm_data(ttf_path, char_list, forced_height, max_width,
+                      canvas_width, canvas_height,
+                      padding_top=0, padding_bottom=0,
+                      grid_width_override=None, grid_height_override=None,
+                      threshold_value=128, workers=None, cache=None, raster="resample"):
+    """
+    Generates XBM data for characters and returns it as a GlyphAtlas.
+    If canvas_width==32 and canvas_height==64 then by default it uses a grid of 17x39.
+    You can override this grid by providing grid_width_override and grid_height_override,
+    which also turns on grid alignment for other canvas sizes.
+    With workers > 1 the characters are sharded across a process pool; the atlas comes
+    out in the same order either way. With a GlyphCache only glyphs whose render key
+    changed are rendered. raster selects the rasterization engine (RASTER_ENGINES).
+    """
+    render_args = (forced_height, max_width, canvas_width, canvas_height,
+                   padding_top, padding_bottom,
+                   grid_width_override, grid_height_override, threshold_value, raster)
+    return render_sections(ttf_path, char_list, [render_args], workers=workers, cache=cache)[0]
+
+def _cache_params(render_args):
+    """Everything besides font and character that changes a rendered glyph."""
+    return (tuple(render_args), sorted(PUNCTUATION_SET), PUNCTUATION_SCALE,
+            sorted(NARROW_CHARS), NARROW_CHAR_SCALE, BIT_ORDER)
+
+def _cache_lookup(cache, ttf_path, chars, render_args):
+    """Returns {char: render_glyphs() result} for the chars found in a GlyphCache."""
+    font_hash = font_file_hash(ttf_path)
+    params = _cache_params(render_args)
+    canvas_height = render_args[3]
+    found = {}
+    for char in chars:
+        data = cache.get(cache.key(font_hash, char, params))
+        if data is None:
+            continue
+        packed_rows = np.frombuffer(data, dtype=np.uint8).reshape(canvas_height, -1) if data else None
+        found[char] = (char, packed_rows, None, None)
+    return found
+
+def _cache_store(cache, ttf_path, render_args, results):
+    """Stores freshly rendered glyphs; characters that failed are not cached."""
+    font_hash = font_file_hash(ttf_path)
+    params = _cache_params(render_args)
+    for char, packed_rows, error, _ in results:
+        if error is None:
+            cache.put(cache.key(font_hash, char, params),
+                      b"" if packed_rows is None else packed_rows.tobytes())
+
+def render_sections(ttf_path, char_list, section_args, workers=None, cache=None, section_names=None):
+    """
+    Renders the same characters with several sets of render_glyphs() arguments
+    (one per section) and returns one GlyphAtlas per entry of section_args.
+    With workers > 1 all sections share one process pool. With a GlyphCache only the
+    glyphs missing from the cache are rendered, and those are stored back.
+    section_names label the sections in an active build report (default: their index).
+    """
+    # Repeated characters keep their first position, like dict insertion did.
+    chars = list(dict.fromkeys(char_list))
+    if section_names is None:
+        section_names = [str(i) for i in range(len(section_args))]
+    pool = ProcessPoolExecutor(workers) if workers and workers > 1 else None
+    try:
+        pending = []
+        for render_args in section_args:
+            cached = _cache_lookup(cache, ttf_path, chars, render_args) if cache is not None else {}
+            missing = [char for char in chars if char not in cached]
+            if pool is not None:
+                rendered = _submit_shards(pool, ttf_path, missing, render_args, workers)
+            else:
+                rendered = render_glyphs(ttf_path, missing, *render_args)
+            pending.append((render_args, cached, rendered))
+
+        atlases = []
+        for name, (render_args, cached, rendered) in zip(section_names, pending):
+            if pool is not None:
+                rendered = _gather_shards(rendered)
+            if cache is not None:
+                _cache_store(cache, ttf_path, render_args, rendered)
+            by_char = dict(cached)
+            by_char.update((result[0], result) for result in rendered)
+            results = [by_char[char] for char in chars]
+            record_glyphs(name, results, cached)
+            atlases.append(collect_glyph_atlas(results, render_args[2], render_args[3]))
+        return atlases
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+def write_xbm(all_xbm_data, output_file, canvas_width, canvas_height):
+    """
+    Writes XBM data to a file.
+    Strikeout has been removed so only normal character data is output.
+    """
+    export_glyphs(all_xbm_data, canvas_width, canvas_height, [("xbm", output_file, None, None)])
+    print(f"XBM file saved as {output_file}")
+
+def write_mif(all_xbm_data, output_file, canvas_width, canvas_height):
+    """
+    Writes MIF data to a file (normal version only).
+    For 32x64 canvases it writes the MIF normally; later these files will be split into high and low halves.
+    The MIF is deeper than the usual ROM when the character set needs it (rom_export.mif_depth).
+    """
+    export_glyphs(all_xbm_data, canvas_width, canvas_height, [("mif", output_file, None, None)])
+    print(f"MIF file saved as {output_file}")
+
+# Default FontRomCombined.bin layout, see rom_layout.json.
+#   16x32 section occupies 0x2000 bytes (8192 bytes).
+#   Each 32x64 section is split into a high block (first two bytes of every row)
+#   and a low block (last two bytes of every row).
+ROM_LAYOUT = load_rom_layout()
+# Byte offset of every section (or section half), e.g. ROM_BASE_OFFSETS["32x64_orig_high"].
+ROM_BASE_OFFSETS = part_offsets(ROM_LAYOUT)
+# 72 KB total including the 2-byte checksum.
+ROM_TARGET_SIZE = ROM_LAYOUT["image_size"]
+
+def load_mif_data(file_path):
+    """
+    Yields (address, data_str) for every 4-hex-digit word of a MIF file.
+    The file is streamed, nothing is buffered.
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        for record in MifReader(f):
+            if record.kind == DATA and len(record.data) == 4 and \
+                    all(c in "0123456789ABCDEFabcdef" for c in record.data):
+                yield record.address, record.data
+
+def load_section_block(source, byte_start=0, byte_stop=None):
+    """
+    Returns the bytes of one ROM section, word 0 first.
+    source is a GlyphAtlas (byte_start/byte_stop pick the part of every row to keep)
+    or the path of a 16-bit MIF file.
+    """
+    if isinstance(source, GlyphAtlas):
+        return source.words(byte_start, byte_stop)
+    block = bytearray()
+    for addr, data_str in load_mif_data(source):
+        end = addr * 2 + 2
+        if end > len(block):
+            block.extend(bytes(end - len(block)))
+        block[addr * 2:end] = bytes.fromhex(data_str)
+    return block
+
+def rom_sections(atlas_16x32, atlas_32x64_orig, atlas_32x64_new):
+    """
+    Returns the (base_offset, block) list for the default FontRomCombined.bin layout.
+    The 32x64 atlases are split into their high (bytes 0-1) and low (bytes 2-3) halves.
+    """
+    return pack_rom_sections(ROM_LAYOUT, {
+        "16x32": atlas_16x32,
+        "32x64_orig": atlas_32x64_orig,
+        "32x64_new": atlas_32x64_new,
+    })
+
+def build_rom_image(sections, target_size=ROM_TARGET_SIZE):
+    """
+    Builds the combined ROM image in memory.
+    sections is a list of (base_offset, block) pairs, block being any bytes-like object
+    (bytes, bytearray, memoryview or a uint8 NumPy array). Data past target_size is dropped.
+    The 16-bit sum of the placed blocks is stored big-endian in the last 2 bytes. Sections must not overlap.
+    Returns (image, checksum).
+    """
+    image = bytearray(target_size)
+    view = memoryview(image)
+    checksum = 0
+    with stage("combine"):
+        # Sections do not overlap, so the sum of the image is the sum of the placed blocks:
+        # each block is summed while it is in cache, and the image is never read again.
+        for base_offset, block in sections:
+            if isinstance(block, np.ndarray):
+                block = np.ascontiguousarray(block, dtype=np.uint8).reshape(-1)
+            else:
+                block = np.frombuffer(block, dtype=np.uint8)
+            length = max(min(len(block), target_size - base_offset), 0)
+            if length == 0:
+                continue
+            view[base_offset:base_offset + length] = block[:length]
+            checksum += int(block[:length].sum(dtype=np.uint64))
+        checksum &= 0xFFFF  # C++-like little-endian sum
+    image[-2] = (checksum >> 8) & 0xFF
+    image[-1] = checksum & 0xFF
+    return image, checksum
+
+def write_rom_image(sections, output_file, target_size=ROM_TARGET_SIZE):
+    """
+    Builds the ROM image from (base_offset, block) sections and writes it in one go.
+    Returns the checksum stored in the last 2 bytes.
+    """
+    image, checksum = build_rom_image(sections, target_size)
+    with open(output_file, "wb") as bin_file:
+        bin_file.write(image)
+    print(f"Checksum 0x{checksum:04X} stored in last 2 bytes of '{output_file}'.")
+    print(f"Combined binary written to {output_file}")
+    print(f"Total file size: {len(image)} bytes (expected {target_size})")
+    return checksum
+
+def write_rom_binary(atlas_16x32, atlas_32x64_orig, atlas_32x64_new,
+                     output_file, target_size=ROM_TARGET_SIZE):
+    """
+    Writes FontRomCombined.bin straight from the glyph atlases, with no MIF files in between.
+    Returns the checksum stored in the last 2 bytes.
+    """
+    return write_rom_image(rom_sections(atlas_16x32, atlas_32x64_orig, atlas_32x64_new),
+                           output_file, target_size)
+
+def _section_render_args(section):
+    """generate_xbm_data/render_glyphs arguments after the character list, for a layout section."""
+    return (section["forced_height"], section["max_width"],
+            section["canvas_width"], section["canvas_height"],
+            section["padding_top"], section["padding_bottom"],
+            section["grid_width"], section["grid_height"], section["threshold"])
+
+def render_rom_sections(ttf_path, char_list, layout=ROM_LAYOUT, workers=None, cache=None,
+                        raster="resample"):
+    """
+    Renders every section of a ROM layout and returns {section name: GlyphAtlas}.
+    With workers > 1 one process pool renders all sections at once, each section's
+    characters split into workers shards. With a GlyphCache only changed glyphs are rendered.
+    """
+    atlases = render_sections(ttf_path, char_list,
+                              [_section_render_args(section) + (raster,) for section in layout["sections"]],
+                              workers=workers, cache=cache,
+                              section_names=[section["name"] for section in layout["sections"]])
+    return {section["name"]: atlas for section, atlas in zip(layout["sections"], atlases)}
+
+def write_layout_binary(layout, atlases, output_file):
+    """
+    Checks that every section fits its layout, then writes the ROM image.
+    Raises ValueError before writing anything if parts overlap or would be truncated.
+    Returns the checksum stored in the last bytes.
+    """
+    check_rom_layout(layout, {name: len(atlas) for name, atlas in atlases.items()})
+    return write_rom_image(pack_rom_sections(layout, atlases), output_file, layout["image_size"])
+
+def write_combined_binary(mif_16x32_file, 
+                          mif_32x64_orig_low_file, mif_32x64_orig_high_file,
+                          mif_32x64_new_low_file, mif_32x64_new_high_file,
+                          output_file, target_size=ROM_TARGET_SIZE):
+    """
+    Combines three sections into a single binary file.
+    The sections, in order, are:
+      1. 16x32 section (normal, no splitting)
+      2. Original 32x64 section (rendered to 17x39) split into high and low halves
+      3. New 32x64 section (rendered to 26x58) split into high and low halves
+    
+    The final file has a total size of 72 KB (73728 bytes) including a 2-byte checksum
+    at the very end, laid out at ROM_BASE_OFFSETS.
+    Each section can be given as a GlyphAtlas (the 32x64 atlas is passed for both its
+    high and low argument) or as the path of a MIF file as before.
+    """
+    sections = [
+        (ROM_BASE_OFFSETS["16x32"], load_section_block(mif_16x32_file)),
+        (ROM_BASE_OFFSETS["32x64_orig_high"], load_section_block(mif_32x64_orig_high_file, 0, 2)),
+        (ROM_BASE_OFFSETS["32x64_orig_low"], load_section_block(mif_32x64_orig_low_file, 2, 4)),
+        (ROM_BASE_OFFSETS["32x64_new_high"], load_section_block(mif_32x64_new_high_file, 0, 2)),
+        (ROM_BASE_OFFSETS["32x64_new_low"], load_section_block(mif_32x64_new_low_file, 2, 4)),
+    ]
+    write_rom_image(sections, output_file, target_size)
+
+def split_mif(mif_file, high_file, low_file):
+    """
+    Splits a MIF into high (upper half of every word) and low (lower half) MIFs
+    with WIDTH halved. The input is streamed and both outputs are written incrementally.
+    """
+    split_mif_lanes(mif_file, [high_file, low_file])
+    print(f"Split MIF files saved: {high_file} and {low_file}")
+
+def export_xbm_mif_files(layout, atlases, output_dir, formats=("xbm", "mif")):
+    """
+    Writes <file_name>.xbm and <file_name>.mif for every section of the layout.
+    Sections split into two parts (the 32x64 ones) also get <file_name>_High.mif
+    and <file_name>_Low.mif, e.g. FontRom64_High.mif and FontRom64_Low.mif.
+    Every section is walked once for all files; formats can name any of
+    rom_export.FORMATS (COE, Intel HEX, $readmemh, ...) to write those in the same pass.
+    """
+    with stage("export"):
+        return export_sections(layout, atlases, output_dir, formats)
+
+# Character list – you can adjust as needed.
+DEFAULT_CHAR_LIST = (
+    [chr(i) for i in range(0x20, 0x61)] +  
+    [chr(0x7B), chr(0x7C), chr(0x7D), chr(0x7E), 
+     chr(0xB0), chr(0xB1), chr(0x2026), chr(0x2190), 
+     chr(0x2191), chr(0x2192), chr(0x2193), chr(0x21CC), 
+     chr(0x25BC), chr(0x2713), chr(0x20)]
+)
+
+def build_font_rom(ttf_path, output_dir, char_list=None, layout=None, export_xbm_mif=False,
+                   workers=None, cache=None, compressed=False, report=None, raster="resample",
+                   export_formats=None):
+    """
+    Runs the whole font-to-ROM pipeline:
+    renders every section of the layout (ROM_LAYOUT by default), then writes
+    FontRomCombined.bin, FontRomAddressMap.json and FontRomCodePoints.bin (see charset)
+    into output_dir and, if export_xbm_mif is set, the XBM/MIF files as well (export_formats
+    adds any of rom_export.FORMATS, written in the same pass). workers > 1 renders in a process pool, and a
+    GlyphCache makes the build incremental (only glyphs whose key changed are rendered).
+    compressed also writes FontRomCompressed.bin (see rom_compress). A BuildReport
+    (see build_report) collects stage timings and glyph outcomes of the build. raster
+    selects the rasterization engine (RASTER_ENGINES).
+    Returns {section name: GlyphAtlas}.
+    """
+    if report is not None:
+        report.info.update(font=os.path.abspath(ttf_path), output_dir=os.path.abspath(output_dir),
+                           workers=workers or 1, incremental=cache is not None, raster=raster)
+        with report.activate():
+            return build_font_rom(ttf_path, output_dir, char_list, layout, export_xbm_mif,
+                                  workers, cache, compressed, raster=raster, export_formats=export_formats)
+    if layout is None:
+        layout = ROM_LAYOUT
+    if char_list is None:
+        char_list = DEFAULT_CHAR_LIST
+
+    # Catch overlapping or out-of-range parts before rendering anything.
+    check_rom_layout(layout)
+    os.makedirs(output_dir, exist_ok=True)
+
+    with stage("render"):
+        atlases = render_rom_sections(ttf_path, char_list, layout, workers=workers, cache=cache,
+                                      raster=raster)
+    if cache is not None:
+        print(f"Glyph cache: {cache.hits} reused, {cache.misses} rendered")
+    write_layout_binary(layout, atlases, os.path.join(output_dir, "FontRomCombined.bin"))
+    with stage("address_map"):
+        write_address_map(layout, atlases, os.path.join(output_dir, "FontRomAddressMap.json"))
+    write_code_point_tables({name: CodePointTable.from_index(atlas.index) for name, atlas in atlases.items()},
+                            os.path.join(output_dir, "FontRomCodePoints.bin"))
+    if compressed:
+        with stage("compress"):
+            write_compressed_rom(layout, atlases, os.path.join(output_dir, "FontRomCompressed.bin"))
+    formats = (["xbm", "mif"] if export_xbm_mif else []) + list(export_formats or [])
+    if formats:
+        export_xbm_mif_files(layout, atlases, output_dir, list(dict.fromkeys(formats)))
+    return atlases
+
+# -------------------------------------------------------------------
+# Command line
+def _section_values(pairs, convert, option):
+    """Parses repeated SECTION=VALUE options into {section: value}."""
+    values = {}
+    for pair in pairs or []:
+        section, sep, value = pair.partition("=")
+        if not sep:
+            raise SystemExit(f"{option}: expected SECTION=VALUE, got '{pair}'")
+        try:
+            values[section] = convert(value)
+        except ValueError:
+            raise SystemExit(f"{option}: invalid value '{value}' for section '{section}'")
+    return values
+
+def _grid(value):
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="fontrom",
+        description="Render a TTF font into FontRomCombined.bin (and optional XBM/MIF files).")
+    parser.add_argument("--ttf", required=True, help="TTF/TTC font file")
+    parser.add_argument("--output-dir", required=True, help="directory for the generated files")
+    parser.add_argument("--layout", help="ROM layout JSON (default: rom_layout.json)")
+    chars = parser.add_mutually_exclusive_group()
+    chars.add_argument("--chars", help="characters to render, in ROM order (default: built-in list)")
+    chars.add_argument("--charset", help="character ranges/sets, e.g. 'default,latin1,U+0400..U+04FF'")
+    chars.add_argument("--charset-file", help="file of character ranges/sets (see charset.py)")
+    parser.add_argument("--forced-height", action="append", metavar="SECTION=N",
+                        help="glyph height for a section, e.g. 32x64_orig=39")
+    parser.add_argument("--max-width", action="append", metavar="SECTION=N",
+                        help="maximum glyph width for a section, e.g. 16x32=13")
+    parser.add_argument("--padding-top", action="append", metavar="SECTION=N")
+    parser.add_argument("--padding-bottom", action="append", metavar="SECTION=N")
+    parser.add_argument("--threshold", action="append", metavar="SECTION=N",
+                        help="grey level (0-255) above which a pixel is on, e.g. 16x32=96")
+    parser.add_argument("--grid", action="append", metavar="SECTION=WxH",
+                        help="grid override for a section, e.g. 32x64_new=26x58")
+    parser.add_argument("--export-xbm-mif", action="store_true",
+                        help="also write the XBM/MIF files for every section")
+    parser.add_argument("--export", metavar="FORMATS",
+                        help="also write these formats for every section in one pass, e.g. coe,memh,ihex "
+                             "(mif, mif-bin, xbm, ihex, coe, memh, bin)")
+    parser.add_argument("--compressed", action="store_true",
+                        help="also write FontRomCompressed.bin (bounding boxes, row dictionary, RLE)")
+    parser.add_argument("--raster", choices=RASTER_ENGINES, default="resample",
+                        help="rasterization: 2x render + resize (default) or direct at target size")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="render in this many processes (0 = one per CPU, default 1)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="reuse glyphs from the on-disk glyph cache, render only changed ones")
+    parser.add_argument("--cache-dir", help="glyph cache directory (implies --incremental)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        metavar="MB", help="glyph cache size limit in MB (default %(default)s)")
+    parser.add_argument("--report", metavar="FILE",
+                        help="write a JSON build report (stage timings, per-glyph timings and failures)")
+    parser.add_argument("--profile", action="store_true", help="add a cProfile summary to the report")
+    parser.add_argument("--trace-memory", action="store_true", help="add tracemalloc peak/top allocations to the report")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not os.path.exists(args.ttf):
+        raise SystemExit(f"Invalid TTF font path: {args.ttf}")
+
+    overrides = {}
+    for key, option in [("forced_height", "--forced-height"), ("max_width", "--max-width"),
+                        ("padding_top", "--padding-top"), ("padding_bottom", "--padding-bottom"),
+                        ("threshold", "--threshold")]:
+        for section, value in _section_values(getattr(args, key), int, option).items():
+            overrides.setdefault(section, {})[key] = value
+    for section, (grid_width, grid_height) in _section_values(args.grid, _grid, "--grid").items():
+        overrides.setdefault(section, {}).update(grid_width=grid_width, grid_height=grid_height)
+
+    cache = None
+    if args.incremental or args.cache_dir:
+        cache = GlyphCache(args.cache_dir or DEFAULT_CACHE_DIR, args.cache_size * 1024 * 1024)
+
+    report = None
+    if args.report or args.profile or args.trace_memory:
+        report = BuildReport(profile=args.profile, trace_memory=args.trace_memory)
+
+    try:
+        char_list = list(args.chars) if args.chars else None
+        if args.charset:
+            char_list = parse_charset(args.charset, DEFAULT_CHAR_LIST)
+        elif args.charset_file:
+            char_list = load_charset(args.charset_file, DEFAULT_CHAR_LIST)
+        export_formats = parse_formats(args.export) if args.export else None
+        layout = apply_section_overrides(load_rom_layout(args.layout), overrides)
+        build_font_rom(args.ttf, args.output_dir,
+                       char_list=char_list,
+                       layout=layout, export_xbm_mif=args.export_xbm_mif,
+                       workers=args.workers or os.cpu_count(), cache=cache,
+                       compressed=args.compressed, report=report, raster=args.raster,
+                       export_formats=export_formats)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if report is not None:
+        print(report.summary())
+        report.write(args.report or os.path.join(args.output_dir, "FontRomBuildReport.json"))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+Framing and checksums for every variant of the board's UART protocol, in one place.
+
+All variants share the layout
+    start, opcode, address (address_size bytes, big-endian), length, data..., checksum
+and differ in the checksum, declared by a FrameSpec:
+    XOR8   1-byte XOR of everything after the start byte (Mcu.c / Mcu2.c)
+    SUM16  16-bit sum of the whole frame including the start byte, high byte first
+           (Pymsg.py, the READ replies in Jj.c)
+    CRC16  CRC-16/CCITT-FALSE of everything after the start byte, high byte first; the
+           stronger option for bulk transfers
+Opcodes listed in a spec's no_payload send only a length (the number of bytes wanted)
+in requests, like the READ requests of Statem.c.
+
+FrameCodec.decoder() parses frames out of a byte stream fed in pieces of any size. It
+works in place on one bytearray (checksums run over memoryview slices), so only the
+payload of a good frame is ever copied. A start byte followed by a length above the
+decoder's max_length is skipped at once instead of waiting for that many bytes, so a
+false start in the data holds up the frames behind it by at most max_length bytes.
+"""
+import binascii
+from collections import namedtuple
+from functools import reduce
+from operator import xor
+
+# length is the length byte: len(data), or the requested count for a no_payload request.
+Frame = namedtuple("Frame", "opcode address data length")
+
+# name, start byte, address bytes, checksum kind, whether the checksum covers the start
+# byte, opcodes whose requests carry a length but no data.
+FrameSpec = namedtuple("FrameSpec", "name start address_size checksum covers_start no_payload")
+
+# CRC-16/CCITT-FALSE (polynomial 0x1021, initial value 0xFFFF), one entry per byte value.
+CRC16_TABLE = []
+for _value in range(256):
+    _crc = _value << 8
+    for _ in range(8):
+        _crc = ((_crc << 1) ^ 0x1021) if _crc & 0x8000 else (_crc << 1)
+    CRC16_TABLE.append(_crc & 0xFFFF)
+del _value, _crc
+
+# xor8 and sum16 walk the bytes one by one, which is faster over a short bytes copy
+# than over a memoryview; crc16 takes any buffer as it is.
+def xor8(data):
+    return reduce(xor, bytes(data), 0)
+
+def sum16(data):
+    return sum(bytes(data)) & 0xFFFF
+
+def crc16(data, crc=0xFFFF):
+    """
+    CRC-16/CCITT-FALSE. binascii.crc_hqx is the same table-driven CRC in C; the table is
+    kept for reference and for firmware that needs it.
+    """
+    return binascii.crc_hqx(data, crc)
+
+# checksum kind -> (trailer size in bytes, function)
+CHECKSUMS = {
+    "xor8": (1, xor8),
+    "sum16": (2, sum16),
+    "crc16": (2, crc16),
+}
+
+XOR8 = FrameSpec("xor8", 0xAA, 1, "xor8", False, ())
+SUM16 = FrameSpec("sum16", 0xAA, 1, "sum16", True, ())
+CRC16 = FrameSpec("crc16", 0xAA, 1, "crc16", False, ())
+SPECS = {spec.name: spec for spec in (XOR8, SUM16, CRC16)}
+
+class FrameCodec:
+    """
+    Encoder/decoder for one FrameSpec. address_size, if given, overrides the spec's
+    (the current firmware uses 1 address byte; a 72 KB ROM needs 3).
+    """
+    def __init__(self, spec=XOR8, address_size=None):
+        if isinstance(spec, str):
+            try:
+                spec = SPECS[spec]
+            except KeyError:
+                raise ValueError(f"Unknown framing '{spec}' (known: {', '.join(SPECS)})")
+        if address_size is not None:
+            spec = spec._replace(address_size=address_size)
+        if spec.checksum not in CHECKSUMS:
+            raise ValueError(f"Unknown checksum '{spec.checksum}'")
+        if spec.address_size < 1:
+            raise ValueError("address_size must be at least 1")
+        self.spec = spec
+        self.address_size = spec.address_size
+        self.max_address = (1 << (8 * spec.address_size)) - 1
+        self.checksum_size, self.checksum_function = CHECKSUMS[spec.checksum]
+        # start, opcode, address, length
+        self.header_size = 3 + spec.address_size
+
+    def checksum(self, frame):
+        """Checksum of a frame without its trailer (frame starts with the start byte)."""
+        return self.checksum_function(frame if self.spec.covers_start else frame[1:])
+
+    def encode(self, opcode, address, data=b"", length=None):
+        """
+        Builds one frame. For a no_payload request pass length (and no data) instead.
+        """
+        if not 0 <= address <= self.max_address:
+            raise ValueError(f"Address 0x{address:X} does not fit in {self.address_size} address byte(s)")
+        if length is None:
+            length = len(data)
+        elif data:
+            raise ValueError("Give either data or length, not both")
+        if not 0 <= length <= 0xFF:
+            raise ValueError(f"Length {length} does not fit in the length byte")
+        frame = bytearray((self.spec.start, opcode))
+        frame += address.to_bytes(self.address_size, "big")
+        frame.append(length)
+        frame += data
+        frame += self.checksum(frame).to_bytes(self.checksum_size, "big")
+        return bytes(frame)
+
+    def decoder(self, requests=False, max_length=0xFF):
+        """
+        Returns a StreamDecoder. With requests=True (the board's side) no_payload opcodes
+        are read as header-only frames. max_length is the longest payload the other side
+        ever sends; longer lengths mark a false start byte.
+        """
+        return StreamDecoder(self, self.spec.no_payload if requests else (), max_length)
+
+class StreamDecoder:
+    """
+    Incremental frame parser. feed(data) returns the complete, valid frames so far.
+    Bytes that do not form a valid frame (noise, damage) are skipped by resynchronising on
+    the next start byte; bad_frames counts the checksum failures and the start bytes
+    rejected for a length above max_length.
+    """
+    def __init__(self, codec, no_payload=(), max_length=0xFF):
+        self.codec = codec
+        self.no_payload = frozenset(no_payload)
+        self.max_length = max_length
+        self.buffer = bytearray()
+        self.bad_frames = 0
+
+    def feed(self, data):
+        codec = self.codec
+        start_byte = codec.spec.start
+        header = codec.header_size
+        trailer = codec.checksum_size
+        checksum = codec.checksum_function
+        skip = 0 if codec.spec.covers_start else 1
+        address_end = 2 + codec.address_size
+        no_payload = self.no_payload
+        max_length = self.max_length
+        buffer = self.buffer
+        buffer += data
+        frames = []
+        pos = 0
+        with memoryview(buffer) as view:
+            while True:
+                pos = buffer.find(start_byte, pos)
+                if pos < 0:
+                    pos = len(buffer)
+                    break
+                if len(buffer) - pos < header:
+                    break
+                opcode = buffer[pos + 1]
+                length = buffer[pos + header - 1]
+                payload = length if not no_payload or opcode not in no_payload else 0
+                if payload > max_length:
+                    # Longer than anything the other side sends: not a start byte.
+                    self.bad_frames += 1
+                    pos += 1
+                    continue
+                end = pos + header + payload + trailer
+                if len(buffer) < end:
+                    break
+                expected = buffer[end - 1] if trailer == 1 else int.from_bytes(view[end - trailer:end], "big")
+                if checksum(view[pos + skip:end - trailer]) != expected:
+                    # Not a frame after all (or a damaged one): try the next start byte.
+                    self.bad_frames += 1
+                    pos += 1
+                    continue
+                address = buffer[2 + pos] if address_end == 3 else int.from_bytes(view[pos + 2:pos + address_end], "big")
+                frames.append(Frame(opcode, address, bytes(view[pos + header:end - trailer]), length))
+                pos = end
+        del buffer[:pos]
+        return frames
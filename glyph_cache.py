@@ -0,0 +1,146 @@
+import hashlib
+import os
+from collections import OrderedDict
+
+# Used when no cache directory is given.
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "fontrom", "glyphs")
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Font file hashes already computed in this process, keyed by (path, size, mtime).
+_FONT_HASHES = {}
+
+def font_file_hash(ttf_path):
+    """SHA-256 of the font file contents (memoized until the file changes)."""
+    stat = os.stat(ttf_path)
+    key = (os.path.abspath(ttf_path), stat.st_size, stat.st_mtime_ns)
+    digest = _FONT_HASHES.get(key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(ttf_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha.update(chunk)
+        digest = _FONT_HASHES[key] = sha.hexdigest()
+    return digest
+
+class GlyphCache:
+    """
+    Persistent on-disk cache of rendered glyphs.
+    Every entry is one file named after the SHA-256 of its key: the font file hash, the
+    character and the render parameters. An entry holds the packed glyph rows, or nothing
+    for a character the font cannot draw. When the cache grows past max_bytes the least
+    recently used entries (oldest mtime, refreshed on every hit) are deleted.
+    """
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self.total_bytes = sum(size for _, size, _ in self._entries())
+
+    def key(self, font_hash, char, params):
+        """Cache key for one glyph; params is any tuple of render settings with a stable repr."""
+        return hashlib.sha256(repr((font_hash, char, params)).encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key[2:] + ".bin")
+
+    def get(self, key):
+        """Returns the cached bytes (b"" for a skipped glyph) or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            self.misses += 1
+            return None
+        os.utime(path)  # mark as recently used
+        self.hits += 1
+        return data
+
+    def put(self, key, data):
+        """Stores bytes for key, then evicts old entries if the cache is over budget."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            old_size = os.path.getsize(path)
+        except OSError:
+            old_size = 0
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self.total_bytes += len(data) - old_size
+        if self.total_bytes > self.max_bytes:
+            # Leave some headroom so the next few puts do not rescan the cache.
+            self.evict(self.max_bytes * 9 // 10)
+
+    def _entries(self):
+        """Yields (path, size, mtime) for every entry on disk."""
+        if not os.path.isdir(self.cache_dir):
+            return
+        for subdir in os.scandir(self.cache_dir):
+            if not subdir.is_dir():
+                continue
+            for entry in os.scandir(subdir.path):
+                if entry.name.endswith(".bin"):
+                    stat = entry.stat()
+                    yield entry.path, stat.st_size, stat.st_mtime
+
+    def evict(self, max_bytes=None):
+        """Deletes least recently used entries until the cache fits in max_bytes."""
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        self.total_bytes = total
+
+    def clear(self):
+        """Deletes every entry."""
+        self.evict(0)
+
+class MemoryGlyphCache:
+    """
+    In-process glyph cache with the GlyphCache interface, for long-running builds
+    (see rom_watch). Entries live in a dict, least recently used first, and the oldest
+    are dropped once they add up to more than max_bytes.
+    """
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.total_bytes = 0
+        self.entries = OrderedDict()
+
+    key = GlyphCache.key
+
+    def get(self, key):
+        data = self.entries.get(key)
+        if data is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return data
+
+    def put(self, key, data):
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.total_bytes -= len(old)
+        self.entries[key] = data
+        self.total_bytes += len(data)
+        while self.total_bytes > self.max_bytes and self.entries:
+            _, dropped = self.entries.popitem(last=False)
+            self.total_bytes -= len(dropped)
+
+    def clear(self):
+        self.entries.clear()
+        self.total_bytes = 0
@@ -0,0 +1,510 @@
+"""
+Streaming reader and writer for Quartus MIF (Memory Initialization File) images.
+
+MifReader walks a MIF one line at a time and yields MifRecord tuples, so any size of
+file is handled in bounded memory. MifWriter writes lines through a small buffer that
+is flushed in large chunks.
+
+Command line:
+    python -m mif reshape IN.mif OUT.mif --width 64 [--input-width 16] [--word-order little]
+    python -m mif split IN.mif HIGH.mif LOW.mif [--input-width 32]
+"""
+import argparse
+import re
+import sys
+from collections import namedtuple
+
+# MifRecord kinds.
+HEADER = "header"   # address = key (DEPTH, WIDTH, ADDRESS_RADIX, DATA_RADIX), data = value
+BEGIN = "begin"     # CONTENT BEGIN
+DATA = "data"       # address = int, data = word text as written in the file
+END = "end"         # END;
+OTHER = "other"     # comments, blank lines and anything else, passed through as-is
+
+# kind, address, data, line (the raw line, without its line ending).
+MifRecord = namedtuple("MifRecord", "kind address data line")
+
+HEADER_KEYS = ("DEPTH", "WIDTH", "ADDRESS_RADIX", "DATA_RADIX")
+
+_RADIX_BASES = {"HEX": 16, "DEC": 10, "UNS": 10, "BIN": 2, "OCT": 8}
+_HEADER_RE = re.compile(r"^(DEPTH|WIDTH|ADDRESS_RADIX|DATA_RADIX)\s*=\s*([^;]*);", re.IGNORECASE)
+_RANGE_RE = re.compile(r"^\[\s*(\w+)\s*\.\.\s*(\w+)\s*\]$")
+
+def radix_base(radix):
+    """Number base for a MIF radix name (HEX, DEC, UNS, BIN, OCT)."""
+    try:
+        return _RADIX_BASES[radix.upper()]
+    except KeyError:
+        raise ValueError(f"Unsupported MIF radix '{radix}'")
+
+def format_mif_number(value, radix="HEX", digits=0):
+    """Formats a number in a MIF radix, zero-padded to at least digits characters."""
+    base = radix_base(radix)
+    if base == 16:
+        return f"{value:0{digits}X}"
+    if base == 2:
+        return f"{value:0{digits}b}"
+    if base == 8:
+        return f"{value:0{digits}o}"
+    return f"{value:0{digits}d}"
+
+def _strip_comment(text):
+    index = text.find("--")
+    return text if index < 0 else text[:index]
+
+class MifReader:
+    """
+    Iterates over a MIF file object and yields MifRecord tuples in file order.
+    Header values are also kept as attributes (depth, width, address_radix, data_radix)
+    once they have been read. "[a..b] : value;" ranges and lines holding several
+    words ("0 : 1 2 3;") yield one DATA record per address.
+    """
+    def __init__(self, f):
+        self.f = f
+        self.depth = None
+        self.width = None
+        self.address_radix = "HEX"
+        self.data_radix = "HEX"
+        self.address_digits = 4
+
+    def _address(self, text):
+        return int(text, radix_base(self.address_radix))
+
+    def __iter__(self):
+        base = radix_base(self.address_radix)
+        for line in self.f:
+            line = line.rstrip("\r\n")
+
+            # Fast path for the common "address : word;" line.
+            colon = line.find(":")
+            if colon > 0:
+                semi = line.find(";", colon)
+                if semi > 0 and line.find("--", 0, semi) < 0 and line.find("[", 0, colon) < 0:
+                    values = line[colon + 1:semi].split()
+                    if len(values) == 1:
+                        try:
+                            address = int(line[:colon], base)
+                        except ValueError:
+                            pass
+                        else:
+                            self.address_digits = len(line[:colon].strip())
+                            yield MifRecord(DATA, address, values[0], line)
+                            continue
+
+            text = _strip_comment(line).strip()
+            upper = text.upper()
+            if not text:
+                yield MifRecord(OTHER, None, None, line)
+                continue
+
+            header = _HEADER_RE.match(text)
+            if header:
+                key, value = header.group(1).upper(), header.group(2).strip()
+                if key == "DEPTH":
+                    self.depth = int(value)
+                elif key == "WIDTH":
+                    self.width = int(value)
+                elif key == "ADDRESS_RADIX":
+                    self.address_radix = value.upper()
+                    base = radix_base(self.address_radix)
+                else:
+                    self.data_radix = value.upper()
+                yield MifRecord(HEADER, key, value, line)
+                continue
+            if upper.startswith(("CONTENT", "BEGIN")):
+                yield MifRecord(BEGIN, None, None, line)
+                continue
+            if upper.startswith("END"):
+                yield MifRecord(END, None, None, line)
+                continue
+
+            address_text, colon, rest = text.partition(":")
+            values = rest.split(";", 1)[0].split()
+            if not colon or ";" not in rest or not values:
+                yield MifRecord(OTHER, None, None, line)
+                continue
+            address_text = address_text.strip()
+            try:
+                span = _RANGE_RE.match(address_text)
+                if span:
+                    first, last = self._address(span.group(1)), self._address(span.group(2))
+                else:
+                    first = self._address(address_text)
+                    last = first + len(values) - 1
+                    self.address_digits = len(address_text)
+            except ValueError:
+                yield MifRecord(OTHER, None, None, line)
+                continue
+            for offset in range(last - first + 1):
+                yield MifRecord(DATA, first + offset, values[offset % len(values)], line)
+
+    def format_address(self, address, digits=None):
+        """
+        Formats an address in this file's ADDRESS_RADIX, zero-padded like the
+        addresses read so far (or to digits).
+        """
+        if digits is None:
+            digits = self.address_digits
+        return format_mif_number(address, self.address_radix, digits)
+
+def iter_mif_words(mif_file, as_bytes=False):
+    """
+    Yields (address, word) for every data word of a MIF file, as ints or, with as_bytes,
+    as big-endian bytes of the declared WIDTH (rounded up to whole bytes).
+    """
+    with open(mif_file, "r", encoding="utf-8") as f:
+        reader = MifReader(f)
+        for record in reader:
+            if record.kind != DATA:
+                continue
+            value = int(record.data, radix_base(reader.data_radix))
+            if as_bytes:
+                width = reader.width or max(value.bit_length(), 1)
+                yield record.address, value.to_bytes((width + 7) // 8, "big")
+            else:
+                yield record.address, value
+
+# Hex digit -> 4 binary digits, for str.translate.
+_HEX_TO_BIN = {ord(c): f"{int(c, 16):04b}" for c in "0123456789abcdefABCDEF"}
+
+def _same_radix_row(digits):
+    def convert(words):
+        return "".join([word.zfill(digits) for word in words])
+    return convert
+
+def _hex_to_bin_row(width):
+    digits = (width + 3) // 4
+    extra = digits * 4 - width
+
+    def convert(words):
+        row = "".join(words)
+        if len(row) != digits * len(words):
+            row = "".join([word.zfill(digits) for word in words])
+            if len(row) != digits * len(words):
+                raise ValueError(f"Not a {width}-bit hex word in {' '.join(words)}")
+        if not extra:
+            # One int() per row instead of one per word.
+            return f"{int(row, 16):0{width * len(words)}b}" if row else ""
+        bits = row.translate(_HEX_TO_BIN)
+        if len(bits) != len(row) * 4:
+            raise ValueError(f"Not a hex word in {' '.join(words)}")
+        # Drop the unused top bits of every word.
+        step = digits * 4
+        return "".join([bits[i + extra:i + step] for i in range(0, len(bits), step)])
+    return convert
+
+def _bin_to_hex_row(width):
+    digits = (width + 3) // 4
+
+    def convert(words):
+        row = "".join(words)
+        if len(row) != width * len(words):
+            row = "".join([word.zfill(width) for word in words])
+        if len(row) != width * len(words):
+            raise ValueError(f"Not a {width}-bit binary word in {' '.join(words)}")
+        if width != digits * 4:
+            row = "".join([row[i:i + width].zfill(digits * 4) for i in range(0, len(row), width)])
+        # One int() per row instead of one per word.
+        return f"{int(row, 2):0{digits * len(words)}X}" if row else ""
+    return convert
+
+def row_converter(width, from_radix="HEX", to_radix="BIN"):
+    """
+    Returns a function that takes a list of width-bit words written in from_radix and
+    returns them converted to to_radix, zero-padded and concatenated into one string
+    (the packed "address : word word ...;" rows of the Bin/Eh tools).
+    HEX <-> BIN converts a whole row with a single int()/format() pair (or, for widths
+    that are not a multiple of 4 bits, a hex digit lookup table) instead of one pair
+    per word; other radix pairs fall back to per-word conversion.
+    Only HEX, BIN and OCT can be concatenated, so to_radix must be one of those.
+    """
+    source, target = radix_base(from_radix), radix_base(to_radix)
+    if target not in (2, 8, 16):
+        raise ValueError(f"Cannot pack {to_radix} words into a row")
+    digits = len(format_mif_number((1 << width) - 1, to_radix))
+    if source == target:
+        return _same_radix_row(digits)
+    if (source, target) == (16, 2):
+        return _hex_to_bin_row(width)
+    if (source, target) == (2, 16):
+        return _bin_to_hex_row(width)
+
+    def convert(words):
+        return "".join([format_mif_number(int(word, source), to_radix, digits) for word in words])
+    return convert
+
+class MifWriter:
+    """
+    Incremental MIF writer. Lines are collected in a small buffer and written in chunks
+    of buffer_lines, so a file of any size costs one write call per chunk.
+    Lines are separated by newlines with no newline after the last one, like the MIF
+    files written by the rest of the tools.
+    Use as a context manager, or call close().
+    """
+    def __init__(self, output, buffer_lines=4096):
+        self.f = open(output, "w", encoding="utf-8") if isinstance(output, str) else output
+        self._owns_file = isinstance(output, str)
+        self.buffer_lines = buffer_lines
+        self._pending = []
+        self._started = False
+        self.address_radix = "HEX"
+        self.data_radix = "HEX"
+        self.address_digits = 4
+        self.data_digits = 0
+        # "address : " line prefixes formatted so far, for the current header's radix.
+        self._prefixes = []
+
+    def line(self, text):
+        """Appends one raw line."""
+        self._pending.append(text)
+        if len(self._pending) >= self.buffer_lines:
+            self.flush()
+
+    def header(self, depth, width, address_radix="HEX", data_radix="HEX"):
+        """Writes the DEPTH/WIDTH/radix header and CONTENT BEGIN."""
+        self.address_radix = address_radix
+        self.data_radix = data_radix
+        self.address_digits = max(len(format_mif_number(max(depth - 1, 0), address_radix)), 4)
+        self._prefixes = []
+        if radix_base(data_radix) != 10:
+            self.data_digits = len(format_mif_number((1 << width) - 1, data_radix))
+        self.line(f"DEPTH = {depth};")
+        self.line(f"WIDTH = {width};")
+        self.line(f"ADDRESS_RADIX = {address_radix};")
+        self.line(f"DATA_RADIX = {data_radix};")
+        self.line("CONTENT BEGIN")
+
+    def comment(self, text):
+        self.line(f"-- {text}")
+
+    def word(self, address, data):
+        """
+        Writes "address : data;". data is written as-is when it is a string,
+        an int is formatted in the header's DATA_RADIX, zero-padded to WIDTH.
+        """
+        if not isinstance(data, str):
+            data = format_mif_number(data, self.data_radix, self.data_digits)
+        self.line(f"{format_mif_number(address, self.address_radix, self.address_digits)} : {data};")
+
+    def words(self, address, data):
+        """
+        Writes a list of data strings as-is at consecutive addresses starting at address.
+        The "address : " prefixes are formatted once per writer and reused.
+        """
+        prefixes = self._prefixes
+        if len(prefixes) < address + len(data):
+            prefixes += [f"{format_mif_number(next_address, self.address_radix, self.address_digits)} : "
+                         for next_address in range(len(prefixes), address + len(data))]
+        self._pending += [prefix + word + ";" for prefix, word in zip(prefixes[address:], data)]
+        if len(self._pending) >= self.buffer_lines:
+            self.flush()
+
+    def end(self):
+        self.line("END;")
+
+    def flush(self):
+        if self._pending:
+            chunk = "\n".join(self._pending)
+            self.f.write(("\n" + chunk) if self._started else chunk)
+            self._started = True
+            self._pending = []
+
+    def close(self):
+        self.flush()
+        if self._owns_file:
+            self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+WORD_ORDERS = ("big", "little")
+
+class _WordPacker:
+    """
+    Regroups a stream of in_width-bit words into out_width-bit words.
+    With word_order "big" the first input bits end up in the most significant end of
+    the output words (and, when narrowing, the most significant part of an input word
+    comes out first); "little" is the other way round.
+    """
+    def __init__(self, in_width, out_width, word_order):
+        if word_order not in WORD_ORDERS:
+            raise ValueError(f"word_order must be one of {', '.join(WORD_ORDERS)}, got '{word_order}'")
+        self.in_width = in_width
+        self.out_width = out_width
+        self.big = word_order == "big"
+        self.in_limit = 1 << in_width
+        self.out_mask = (1 << out_width) - 1
+        self.bits = 0
+        self.count = 0
+
+    def push(self, value):
+        """Adds one input word and returns the output words it completed."""
+        if not 0 <= value < self.in_limit:
+            raise ValueError(f"Word 0x{value:X} does not fit in {self.in_width} bits")
+        words = []
+        if self.big:
+            self.bits = (self.bits << self.in_width) | value
+            self.count += self.in_width
+            while self.count >= self.out_width:
+                self.count -= self.out_width
+                words.append(self.bits >> self.count)
+                self.bits &= (1 << self.count) - 1
+        else:
+            self.bits |= value << self.count
+            self.count += self.in_width
+            while self.count >= self.out_width:
+                words.append(self.bits & self.out_mask)
+                self.bits >>= self.out_width
+                self.count -= self.out_width
+        return words
+
+    def flush(self):
+        """Returns the last, zero-padded output word if one is partly filled."""
+        if not self.count:
+            return []
+        word = self.bits << (self.out_width - self.count) if self.big else self.bits
+        self.bits = self.count = 0
+        return [word]
+
+def reshape_mif(mif_file, output, width, word_order="big", input_width=None, data_radix=None):
+    """
+    Rewrites a MIF for a different word width in a single streaming pass.
+    The image is treated as one bit stream: widening packs consecutive words into one
+    (16 -> 64 puts 4 words in each), narrowing cuts every word into several, and any
+    other ratio works too. Addresses are renumbered from 0 and DEPTH/WIDTH are
+    rewritten; a last partial word is zero-padded. Addresses missing from the input
+    count as zero words, so data must be in ascending address order.
+    input_width overrides the WIDTH header (older split _High/_Low MIFs hold 16-bit words
+    under a WIDTH = 32 header). data_radix defaults to the input's DATA_RADIX.
+    Comments are carried over in place.
+    """
+    with open(mif_file, "r", encoding="utf-8") as f, MifWriter(output) as out:
+        reader = MifReader(f)
+        packer = None
+        data_base = None
+        next_address = 0
+        out_address = 0
+        for record in reader:
+            if record.kind == HEADER:
+                continue
+            if record.kind == BEGIN:
+                in_width = input_width or reader.width
+                if not in_width or reader.depth is None:
+                    raise ValueError(f"{mif_file}: DEPTH and WIDTH must come before CONTENT BEGIN")
+                depth = -(-reader.depth * in_width // width)
+                out.header(depth, width, reader.address_radix, data_radix or reader.data_radix)
+                packer = _WordPacker(in_width, width, word_order)
+                data_base = radix_base(reader.data_radix)
+                continue
+            if record.kind == DATA:
+                if packer is None:
+                    raise ValueError(f"{mif_file}: data before CONTENT BEGIN")
+                if record.address < next_address:
+                    raise ValueError(f"{mif_file}: address {record.address} is out of order")
+                words = []
+                for _ in range(record.address - next_address):
+                    words += packer.push(0)
+                words += packer.push(int(record.data, data_base))
+                next_address = record.address + 1
+                for word in words:
+                    out.word(out_address, word)
+                    out_address += 1
+                continue
+            if record.kind == END:
+                break
+            if packer is not None:
+                out.line(record.line)
+        for word in packer.flush() if packer else []:
+            out.word(out_address, word)
+            out_address += 1
+        out.end()
+    return output
+
+def split_mif_lanes(mif_file, outputs, input_width=None):
+    """
+    Splits every word of a MIF into len(outputs) equal bit lanes and writes lane i to
+    outputs[i], most significant lane first (a 32-bit MIF split in two gives the high
+    and low 16 bits). Addresses and DEPTH stay the same, WIDTH becomes the lane width.
+    input_width overrides the WIDTH header. Comments go to every output.
+    """
+    with open(mif_file, "r", encoding="utf-8") as f:
+        writers = [MifWriter(path) for path in outputs]
+        try:
+            reader = MifReader(f)
+            lane_width = data_base = None
+            for record in reader:
+                if record.kind == HEADER:
+                    continue
+                if record.kind == BEGIN:
+                    in_width = input_width or reader.width
+                    if not in_width or reader.depth is None:
+                        raise ValueError(f"{mif_file}: DEPTH and WIDTH must come before CONTENT BEGIN")
+                    if in_width % len(outputs):
+                        raise ValueError(f"Cannot split {in_width}-bit words into {len(outputs)} lanes")
+                    lane_width = in_width // len(outputs)
+                    lane_mask = (1 << lane_width) - 1
+                    data_base = radix_base(reader.data_radix)
+                    for out in writers:
+                        out.header(reader.depth, lane_width, reader.address_radix, reader.data_radix)
+                    continue
+                if record.kind == DATA:
+                    if lane_width is None:
+                        raise ValueError(f"{mif_file}: data before CONTENT BEGIN")
+                    value = int(record.data, data_base)
+                    if value >> in_width:
+                        raise ValueError(f"Word {record.data} does not fit in {in_width} bits")
+                    address = reader.format_address(record.address)
+                    shift = in_width
+                    for out in writers:
+                        shift -= lane_width
+                        out.line(f"{address} : {format_mif_number((value >> shift) & lane_mask, reader.data_radix, out.data_digits)};")
+                    continue
+                if record.kind == END:
+                    break
+                if lane_width is not None:
+                    for out in writers:
+                        out.line(record.line)
+            for out in writers:
+                out.end()
+        finally:
+            for out in writers:
+                out.close()
+    return outputs
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="mif", description="Reshape or split MIF memory images.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    reshape = commands.add_parser("reshape", help="change the word width (and renumber addresses)")
+    reshape.add_argument("input")
+    reshape.add_argument("output")
+    reshape.add_argument("--width", type=int, required=True, help="output word width in bits")
+    reshape.add_argument("--input-width", type=int, help="input word width (default: WIDTH header)")
+    reshape.add_argument("--word-order", choices=WORD_ORDERS, default="big",
+                         help="where the first word goes when packing (default: big = most significant)")
+    reshape.add_argument("--data-radix", choices=sorted(_RADIX_BASES), help="output DATA_RADIX")
+    split = commands.add_parser("split", help="split every word into equal lanes, one file per lane")
+    split.add_argument("input")
+    split.add_argument("outputs", nargs="+", help="one file per lane, most significant first")
+    split.add_argument("--input-width", type=int, help="input word width (default: WIDTH header)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        if args.command == "reshape":
+            reshape_mif(args.input, args.output, args.width, args.word_order,
+                        args.input_width, args.data_radix)
+            print(f"Reshaped MIF saved: {args.output}")
+        else:
+            split_mif_lanes(args.input, args.outputs, args.input_width)
+            print(f"Split MIF files saved: {', '.join(args.outputs)}")
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
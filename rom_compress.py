@@ -0,0 +1,312 @@
+"""
+Compressed font ROM format (FontRomCompressed.bin) and its pure-Python decoder.
+
+FontRomCombined.bin stores every glyph as a full canvas (64 rows x 4 bytes for a 32x64
+glyph, even for '.' or the all-zero space). The compressed format keeps only what differs:
+
+  - a glyph is cut to its vertical bounding box (rows above and below are blank),
+  - every distinct non-blank row of a section is stored once in a row dictionary
+    (id 0 is the implicit blank row),
+  - a glyph is the run-length encoded list of its row ids (vertical strokes repeat
+    the same row many times),
+  - an index table gives every glyph's record offset, so a glyph is found in O(1).
+
+All numbers are big-endian, like the checksum of the combined image:
+
+    header   "FRC1", section count (u8)
+    table    per section: name length (u8), name, canvas width (u8), canvas height (u8),
+             glyph count (u16), dictionary rows (u16), id size (u8), offset (u32), size (u32)
+    section  code points    glyph count x u32, in ROM order
+             index          glyph count x u32, record offset from the start of the records
+             dictionary     (dictionary rows - 1) x bytes per row (row 0 is blank)
+             records        top row (u8), run count (u8), runs of (count (u8), row id)
+    trailer  16-bit sum of everything before it
+
+The row id takes 1 byte when the dictionary has at most 256 rows, otherwise 2.
+
+Command line (compresses an existing build, no rendering needed):
+    python -m rom_compress FontRomCombined.bin [--address-map FontRomAddressMap.json] [-o FILE]
+"""
+import argparse
+import json
+import os
+import struct
+import sys
+
+from rom_layout import load_rom_layout, iter_parts
+
+MAGIC = b"FRC1"
+_TABLE_ENTRY = struct.Struct(">BBHHBII")
+
+def _row_id_size(dictionary_rows):
+    return 1 if dictionary_rows <= 0x100 else 2
+
+def compress_section(canvas_width, canvas_height, glyphs):
+    """
+    Encodes one section. glyphs is a list of (char, rows) in ROM order, rows being the
+    glyph's canvas_height * bytes_per_row bytes. Returns (blob, dictionary_rows, id_size).
+    """
+    bytes_per_row = (canvas_width + 7) // 8
+    blank = bytes(bytes_per_row)
+    dictionary = {blank: 0}
+    glyph_ids = []
+    for char, rows in glyphs:
+        rows = bytes(rows)
+        if len(rows) != canvas_height * bytes_per_row:
+            raise ValueError(f"Glyph {char!r}: expected {canvas_height * bytes_per_row} bytes, got {len(rows)}")
+        ids = [dictionary.setdefault(rows[i:i + bytes_per_row], len(dictionary))
+               for i in range(0, len(rows), bytes_per_row)]
+        glyph_ids.append(ids)
+    if len(dictionary) > 0x10000:
+        raise ValueError(f"{len(dictionary)} distinct rows do not fit a 16-bit row id")
+    id_size = _row_id_size(len(dictionary))
+
+    records = bytearray()
+    offsets = []
+    for ids in glyph_ids:
+        top = 0
+        while top < len(ids) and not ids[top]:
+            top += 1
+        bottom = len(ids)
+        while bottom > top and not ids[bottom - 1]:
+            bottom -= 1
+        runs = []
+        for row_id in ids[top:bottom]:
+            if runs and runs[-1][1] == row_id and runs[-1][0] < 0xFF:
+                runs[-1][0] += 1
+            else:
+                runs.append([1, row_id])
+        offsets.append(len(records))
+        records += bytes((top, len(runs)))
+        for count, row_id in runs:
+            records.append(count)
+            records += row_id.to_bytes(id_size, "big")
+
+    blob = bytearray()
+    blob += struct.pack(f">{len(glyphs)}I", *(ord(char) for char, _ in glyphs))
+    blob += struct.pack(f">{len(offsets)}I", *offsets)
+    blob += b"".join(list(dictionary)[1:])
+    blob += records
+    return bytes(blob), len(dictionary), id_size
+
+def compress_rom(sections):
+    """
+    Builds a compressed image. sections is a list of
+    (name, canvas_width, canvas_height, glyphs) with glyphs as for compress_section.
+    Returns (image, stats) where stats has one entry per section: glyphs, raw_bytes
+    (full canvases), compressed_bytes (section data plus its table entry), unique_rows
+    and ratio.
+    """
+    table = bytearray()
+    blobs = []
+    stats = []
+    offset = len(MAGIC) + 1 + sum(1 + len(name.encode("utf-8")) + _TABLE_ENTRY.size
+                                  for name, _, _, _ in sections)
+    for name, canvas_width, canvas_height, glyphs in sections:
+        if not (0 < canvas_width <= 0xFF and 0 < canvas_height <= 0xFF):
+            raise ValueError(f"{name}: canvas {canvas_width}x{canvas_height} is too large for the format")
+        blob, dictionary_rows, id_size = compress_section(canvas_width, canvas_height, glyphs)
+        encoded_name = name.encode("utf-8")
+        entry = bytes((len(encoded_name),)) + encoded_name + _TABLE_ENTRY.pack(
+            canvas_width, canvas_height, len(glyphs), dictionary_rows, id_size, offset, len(blob))
+        table += entry
+        blobs.append(blob)
+        offset += len(blob)
+        raw_bytes = len(glyphs) * canvas_height * ((canvas_width + 7) // 8)
+        compressed_bytes = len(blob) + len(entry)
+        stats.append({
+            "name": name,
+            "glyphs": len(glyphs),
+            "raw_bytes": raw_bytes,
+            "compressed_bytes": compressed_bytes,
+            "unique_rows": dictionary_rows - 1,
+            "ratio": raw_bytes / compressed_bytes,
+        })
+    image = bytearray(MAGIC)
+    image.append(len(sections))
+    image += table
+    for blob in blobs:
+        image += blob
+    image += (sum(image) & 0xFFFF).to_bytes(2, "big")
+    return bytes(image), stats
+
+def atlas_sections(layout, atlases):
+    """compress_rom() input for rendered atlases ({section name: GlyphAtlas})."""
+    return [(section["name"], section["canvas_width"], section["canvas_height"],
+             [(char, rows.tobytes()) for char, rows in atlases[section["name"]].items()])
+            for section in layout["sections"]]
+
+def image_sections(layout, image, address_map):
+    """
+    compress_rom() input read back from a built FontRomCombined.bin and its address map:
+    every glyph's canvas is put together again from the parts of its section, in row byte
+    order whatever order the layout lists them in.
+    """
+    sections = []
+    for section in layout["sections"]:
+        parts = sorted(section["parts"], key=lambda part: part["byte_start"])
+        height = section["canvas_height"]
+        glyphs = []
+        for code_point, index in address_map["glyphs"][section["name"]]:
+            pieces = []
+            for part in parts:
+                width = part["byte_stop"] - part["byte_start"]
+                start = part["offset"] + index * height * width
+                pieces.append((width, image[start:start + height * width]))
+            rows = bytearray()
+            for row in range(height):
+                for width, piece in pieces:
+                    rows += piece[row * width:(row + 1) * width]
+            glyphs.append((chr(code_point), bytes(rows)))
+        sections.append((section["name"], section["canvas_width"], height, glyphs))
+    return sections
+
+def write_compressed_rom(layout, atlases, output_file):
+    """Writes the compressed image of rendered atlases, prints the ratios and returns the stats."""
+    image, stats = compress_rom(atlas_sections(layout, atlases))
+    with open(output_file, "wb") as f:
+        f.write(image)
+    print_compression_stats(stats, len(image))
+    print(f"Compressed ROM written to {output_file}")
+    return stats
+
+def print_compression_stats(stats, total_bytes):
+    for entry in stats:
+        print(f"{entry['name']}: {entry['glyphs']} glyphs, {entry['raw_bytes']} -> "
+              f"{entry['compressed_bytes']} bytes ({entry['ratio']:.1f}x), "
+              f"{entry['unique_rows']} unique rows")
+    raw = sum(entry["raw_bytes"] for entry in stats)
+    print(f"Total: {raw} -> {total_bytes} bytes ({raw / total_bytes:.1f}x)")
+
+class CompressedSection:
+    """One section of a CompressedRom; glyphs are decoded on demand."""
+    def __init__(self, data, name, canvas_width, canvas_height, glyph_count, dictionary_rows, id_size, offset):
+        self.name = name
+        self.canvas_width = canvas_width
+        self.canvas_height = canvas_height
+        self.bytes_per_row = (canvas_width + 7) // 8
+        self.id_size = id_size
+        self._data = data
+        code_points = struct.unpack_from(f">{glyph_count}I", data, offset)
+        self.index = {chr(code_point): glyph for glyph, code_point in enumerate(code_points)}
+        self._index_offset = offset + 4 * glyph_count
+        self._dictionary_offset = self._index_offset + 4 * glyph_count
+        self._records_offset = self._dictionary_offset + (dictionary_rows - 1) * self.bytes_per_row
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, char):
+        return char in self.index
+
+    def chars(self):
+        return list(self.index)
+
+    def _row(self, row_id):
+        if not row_id:
+            return bytes(self.bytes_per_row)
+        start = self._dictionary_offset + (row_id - 1) * self.bytes_per_row
+        return self._data[start:start + self.bytes_per_row]
+
+    def glyph_at(self, glyph):
+        """Canvas rows (canvas_height * bytes_per_row bytes) of the glyph with ROM index glyph."""
+        data = self._data
+        id_size = self.id_size
+        pos = self._records_offset + struct.unpack_from(">I", data, self._index_offset + 4 * glyph)[0]
+        top, run_count = data[pos], data[pos + 1]
+        pos += 2
+        rows = bytearray(top * self.bytes_per_row)
+        for _ in range(run_count):
+            count = data[pos]
+            row_id = data[pos + 1] if id_size == 1 else int.from_bytes(data[pos + 1:pos + 1 + id_size], "big")
+            pos += 1 + id_size
+            rows += self._row(row_id) * count
+        rows += bytes(self.canvas_height * self.bytes_per_row - len(rows))
+        return bytes(rows)
+
+    def glyph(self, char):
+        return self.glyph_at(self.index[char])
+
+    def words(self, byte_start=0, byte_stop=None):
+        """Like GlyphAtlas.words() flattened: the bytes a ROM part holds for this section."""
+        byte_stop = self.bytes_per_row if byte_stop is None else byte_stop
+        out = bytearray()
+        for glyph in range(len(self.index)):
+            rows = self.glyph_at(glyph)
+            for start in range(0, len(rows), self.bytes_per_row):
+                out += rows[start + byte_start:start + byte_stop]
+        return bytes(out)
+
+class CompressedRom:
+    """
+    Decoder for a compressed image. sections maps each section name to a
+    CompressedSection; rom.glyph(section, char) returns a glyph's canvas rows.
+    """
+    def __init__(self, data):
+        data = bytes(data)
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError("Not a compressed font ROM (bad magic)")
+        if len(data) < len(MAGIC) + 3:
+            raise ValueError("Compressed font ROM is truncated")
+        self.checksum = int.from_bytes(data[-2:], "big")
+        if sum(data[:-2]) & 0xFFFF != self.checksum:
+            raise ValueError(f"Checksum mismatch: stored 0x{self.checksum:04X}, "
+                             f"computed 0x{sum(data[:-2]) & 0xFFFF:04X}")
+        self.sections = {}
+        pos = len(MAGIC) + 1
+        for _ in range(data[len(MAGIC)]):
+            name_length = data[pos]
+            name = data[pos + 1:pos + 1 + name_length].decode("utf-8")
+            pos += 1 + name_length
+            canvas_width, canvas_height, glyph_count, dictionary_rows, id_size, offset, _ = \
+                _TABLE_ENTRY.unpack_from(data, pos)
+            pos += _TABLE_ENTRY.size
+            self.sections[name] = CompressedSection(data, name, canvas_width, canvas_height, glyph_count,
+                                                    dictionary_rows, id_size, offset)
+
+    def glyph(self, section, char):
+        return self.sections[section].glyph(char)
+
+def load_compressed_rom(path):
+    with open(path, "rb") as f:
+        return CompressedRom(f.read())
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="rom_compress",
+                                     description="Write the compressed form of a built font ROM.")
+    parser.add_argument("image", help="built image, e.g. FontRomCombined.bin")
+    parser.add_argument("--address-map", help="FontRomAddressMap.json (default: next to the image)")
+    parser.add_argument("--layout", help="ROM layout JSON (default: rom_layout.json)")
+    parser.add_argument("-o", "--output", help="output file (default: FontRomCompressed.bin next to the image)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    directory = os.path.dirname(args.image)
+    output = args.output or os.path.join(directory, "FontRomCompressed.bin")
+    try:
+        layout = load_rom_layout(args.layout)
+        with open(args.image, "rb") as f:
+            image = f.read()
+        with open(args.address_map or os.path.join(directory, "FontRomAddressMap.json"), "r", encoding="utf-8") as f:
+            address_map = json.load(f)
+        compressed, stats = compress_rom(image_sections(layout, image, address_map))
+        # Decode everything again before writing, so a bad file is never left behind.
+        rom = CompressedRom(compressed)
+        for section, part in iter_parts(layout):
+            used = len(address_map["glyphs"][section["name"]]) * section["canvas_height"] * \
+                (part["byte_stop"] - part["byte_start"])
+            if rom.sections[section["name"]].words(part["byte_start"], part["byte_stop"]) != \
+                    image[part["offset"]:part["offset"] + used]:
+                raise ValueError(f"{part['name']}: decoded data differs from the image")
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    with open(output, "wb") as f:
+        f.write(compressed)
+    print_compression_stats(stats, len(compressed))
+    print(f"Compressed ROM written to {output} ({len(image)} -> {len(compressed)} bytes)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
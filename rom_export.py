@@ -0,0 +1,334 @@
+"""
+Single-pass export of glyph atlases to memory-image formats.
+
+export_glyphs() walks the glyphs of one section once and hands every glyph to all the
+requested writers. Each glyph's rows are converted once per representation (bytes, hex
+words, binary words) and that conversion is shared by every writer that needs it. So
+adding a format adds its own formatting, not another pass over the data. Every writer
+writes one string per glyph into a large file buffer.
+
+Formats (FORMATS), with the file name each gets after the section's file_name:
+    mif      Quartus MIF, hex words                 FontRom64.mif
+    mif-bin  Quartus MIF, DATA_RADIX = BIN          FontRom64_Bin.mif
+    xbm      XBM C arrays (whole sections only)     FontRom64.xbm
+    ihex     Intel HEX, byte addressed from 0       FontRom64.hex
+    coe      Xilinx COE, hex radix                  FontRom64.coe
+    memh     Verilog $readmemh, one word per line   FontRom64.memh
+    bin      raw bytes, word 0 first                FontRom64.bin
+
+Sections split into two parts (the 32x64 ones) also get every format but xbm per part,
+e.g. FontRom64_High.mif and FontRom64_Low.coe, written in the same pass.
+
+Command line (re-exports a built image, no rendering):
+    python -m rom_export FontRomCombined.bin --formats coe,memh [--output-dir DIR]
+"""
+import abc
+import argparse
+import json
+import os
+import sys
+from functools import cached_property
+
+import numpy as np
+
+from mif import MifWriter
+from rom_layout import load_rom_layout
+
+FORMATS = ("mif", "mif-bin", "xbm", "ihex", "coe", "memh", "bin")
+_FILE_SUFFIXES = {
+    "mif": ".mif",
+    "mif-bin": "_Bin.mif",
+    "xbm": ".xbm",
+    "ihex": ".hex",
+    "coe": ".coe",
+    "memh": ".memh",
+    "bin": ".bin",
+}
+# Suffixes of the part files of a section split in two, most significant bytes first.
+PART_SUFFIXES = ("_High", "_Low")
+BUFFER_SIZE = 1 << 20
+
+# "0x00".."0xFF" lookup used when writing XBM rows.
+_XBM_BYTES = [f"0x{byte:02X}" for byte in range(256)]
+
+def parse_formats(text):
+    """Parses a comma-separated format list such as "mif,coe,memh"."""
+    formats = [name.strip().lower() for name in text.split(",") if name.strip()]
+    for name in formats:
+        if name not in FORMATS:
+            raise ValueError(f"Unknown export format '{name}' (known: {', '.join(FORMATS)})")
+    return list(dict.fromkeys(formats))
+
+def mif_depth(canvas_width, canvas_height, glyph_count):
+    """DEPTH of a section MIF: the usual ROM depth, or deeper when the character set needs it."""
+    depth = 8192 if canvas_width == 16 and canvas_height == 32 else 16384
+    return max(depth, glyph_count * canvas_height)
+
+class _Lane:
+    """The rows of one glyph in one byte range, converted at most once per representation."""
+    def __init__(self, rows):
+        self.rows = rows
+
+    @cached_property
+    def data(self):
+        return self.rows.tobytes()
+
+    @cached_property
+    def hex_words(self):
+        text = self.data.hex().upper()
+        step = 2 * self.rows.shape[1]
+        return [text[i:i + step] for i in range(0, len(text), step)]
+
+    @cached_property
+    def bin_words(self):
+        text = (np.unpackbits(self.rows, axis=-1) + ord("0")).tobytes().decode("ascii")
+        step = 8 * self.rows.shape[1]
+        return [text[i:i + step] for i in range(0, len(text), step)]
+
+class _Writer(abc.ABC):
+    """One output file for one byte range of a section. glyph() is called once per glyph."""
+    binary = False
+
+    def __init__(self, path, width, height, depth):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.depth = depth
+        if self.binary:
+            self.f = open(path, "wb", buffering=BUFFER_SIZE)
+        else:
+            self.f = open(path, "w", encoding="utf-8", buffering=BUFFER_SIZE)
+        self.begin()
+
+    def begin(self):
+        pass
+
+    @abc.abstractmethod
+    def glyph(self, char, lane):
+        """Writes one glyph, given as a _Lane."""
+
+    def end(self):
+        pass
+
+    def close(self):
+        try:
+            self.end()
+        finally:
+            self.f.close()
+
+class _MifWriter(_Writer):
+    radix = "HEX"
+
+    def begin(self):
+        self.mif = MifWriter(self.f)
+        self.mif.header(self.depth, self.width, data_radix=self.radix)
+        self.address = 0
+
+    def words(self, lane):
+        return lane.hex_words
+
+    def glyph(self, char, lane):
+        self.mif.comment(f"Character: '{char}'")
+        words = self.words(lane)
+        self.mif.words(self.address, words)
+        self.address += len(words)
+
+    def end(self):
+        self.mif.end()
+        self.mif.close()
+
+class _MifBinWriter(_MifWriter):
+    radix = "BIN"
+
+    def words(self, lane):
+        return lane.bin_words
+
+class _XbmWriter(_Writer):
+    def begin(self):
+        self.f.write("# XBM File\n\n")
+
+    def glyph(self, char, lane):
+        names = [_XBM_BYTES[byte] for byte in lane.data]
+        step = lane.rows.shape[1]
+        rows = "".join(["  " + ", ".join(names[i:i + step]) + ",\n" for i in range(0, len(names), step)])
+        self.f.write(f"/* Character: '{char}' */\n"
+                     f"#define {char}_width {self.width}\n"
+                     f"#define {char}_height {self.height}\n"
+                     f"static char {char}_bits[] = {{\n{rows}}};\n\n")
+
+def _ihex_record(address, record_type, data=b""):
+    record = bytes([len(data), (address >> 8) & 0xFF, address & 0xFF, record_type]) + data
+    return f":{record.hex().upper()}{-sum(record) & 0xFF:02X}\n"
+
+class _IntelHexWriter(_Writer):
+    record_size = 16
+
+    def begin(self):
+        self.address = 0
+        self.pending = bytearray()
+
+    def _records(self, final=False):
+        size = self.record_size
+        count = len(self.pending) // size
+        text = bytes(self.pending[:count * size]).hex().upper()
+        data = np.frombuffer(bytes(self.pending[:count * size]), dtype=np.uint8).reshape(count, size)
+        addresses = self.address + size * np.arange(count, dtype=np.int64)
+        # Record checksum: two's complement of the sum of length, address and data bytes.
+        checksums = (-(data.sum(axis=1, dtype=np.int64) + size + (addresses >> 8) + addresses)) & 0xFF
+        lines = []
+        for i, (address, checksum) in enumerate(zip(addresses.tolist(), checksums.tolist())):
+            if address & 0xFFFF == 0 and address:
+                # Extended linear address record for every 64 KB boundary crossed.
+                lines.append(_ihex_record(0, 0x04, (address >> 16).to_bytes(2, "big")))
+            lines.append(f":{size:02X}{address & 0xFFFF:04X}00{text[2 * size * i:2 * size * (i + 1)]}{checksum:02X}\n")
+        self.address += count * size
+        del self.pending[:count * size]
+        if final and self.pending:
+            if self.address & 0xFFFF == 0 and self.address:
+                lines.append(_ihex_record(0, 0x04, (self.address >> 16).to_bytes(2, "big")))
+            lines.append(_ihex_record(self.address & 0xFFFF, 0x00, bytes(self.pending)))
+            self.address += len(self.pending)
+            self.pending.clear()
+        return "".join(lines)
+
+    def glyph(self, char, lane):
+        self.pending += lane.data
+        self.f.write(self._records())
+
+    def end(self):
+        self.f.write(self._records(final=True) + _ihex_record(0, 0x01))
+
+class _CoeWriter(_Writer):
+    def begin(self):
+        self.f.write(f"; {os.path.basename(self.path)}: {self.width}-bit words\n"
+                     "memory_initialization_radix=16;\n"
+                     "memory_initialization_vector=\n")
+        self.started = False
+
+    def glyph(self, char, lane):
+        if lane.hex_words:
+            self.f.write((",\n" if self.started else "") + ",\n".join(lane.hex_words))
+            self.started = True
+
+    def end(self):
+        self.f.write(";\n" if self.started else "0;\n")
+
+class _MemhWriter(_Writer):
+    def begin(self):
+        self.f.write(f"// {os.path.basename(self.path)}: {self.width}-bit words for $readmemh\n")
+
+    def glyph(self, char, lane):
+        self.f.write(f"// Character: '{char}'\n" + "\n".join(lane.hex_words) + "\n")
+
+class _BinWriter(_Writer):
+    binary = True
+
+    def glyph(self, char, lane):
+        self.f.write(lane.data)
+
+_WRITERS = {
+    "mif": _MifWriter,
+    "mif-bin": _MifBinWriter,
+    "xbm": _XbmWriter,
+    "ihex": _IntelHexWriter,
+    "coe": _CoeWriter,
+    "memh": _MemhWriter,
+    "bin": _BinWriter,
+}
+
+def export_glyphs(glyphs, canvas_width, canvas_height, outputs):
+    """
+    Writes the glyphs of one section to every output in a single pass.
+    glyphs is a GlyphAtlas or a {char: rows} dict; outputs is a list of
+    (format, path, byte_start, byte_stop), the byte range selecting a slice of every row
+    (None, None for whole rows).
+    """
+    bytes_per_row = (canvas_width + 7) // 8
+    lanes = {}
+    writers = []
+    try:
+        for fmt, path, byte_start, byte_stop in outputs:
+            byte_range = slice(byte_start, byte_stop).indices(bytes_per_row)[:2]
+            width = canvas_width if byte_range == (0, bytes_per_row) else 8 * (byte_range[1] - byte_range[0])
+            writer = _WRITERS[fmt](path, width, canvas_height, mif_depth(canvas_width, canvas_height, len(glyphs)))
+            writers.append(writer)
+            lanes.setdefault(byte_range, []).append(writer)
+        for char, rows in glyphs.items():
+            rows = np.asarray(rows, dtype=np.uint8)
+            for (byte_start, byte_stop), lane_writers in lanes.items():
+                lane = _Lane(rows[:, byte_start:byte_stop])
+                for writer in lane_writers:
+                    writer.glyph(char, lane)
+    finally:
+        for writer in writers:
+            writer.close()
+
+def section_outputs(section, output_dir, formats):
+    """The export_glyphs() outputs of a layout section for the given formats."""
+    outputs = []
+    base = os.path.join(output_dir, section["file_name"])
+    for fmt in formats:
+        outputs.append((fmt, base + _FILE_SUFFIXES[fmt], None, None))
+        if len(section["parts"]) == 2 and fmt != "xbm":
+            parts = sorted(section["parts"], key=lambda part: part["byte_start"])
+            for suffix, part in zip(PART_SUFFIXES, parts):
+                outputs.append((fmt, base + suffix + _FILE_SUFFIXES[fmt], part["byte_start"], part["byte_stop"]))
+    return outputs
+
+def export_sections(layout, atlases, output_dir, formats=FORMATS):
+    """
+    Exports every section of the layout in every format (see the module docstring).
+    Returns the paths written.
+    """
+    written = []
+    for section in layout["sections"]:
+        outputs = section_outputs(section, output_dir, formats)
+        export_glyphs(atlases[section["name"]], section["canvas_width"], section["canvas_height"], outputs)
+        paths = [path for _, path, _, _ in outputs]
+        print(f"Exported {section['name']}: {', '.join(os.path.basename(path) for path in paths)}")
+        written += paths
+    return written
+
+def image_atlases(layout, image, address_map):
+    """{section name: GlyphAtlas} read back from a built FontRomCombined.bin and its address map."""
+    from fontrom import GlyphAtlas
+    from rom_compress import image_sections
+
+    atlases = {}
+    for name, canvas_width, canvas_height, glyphs in image_sections(layout, image, address_map):
+        atlas = atlases[name] = GlyphAtlas(canvas_width, canvas_height, capacity=len(glyphs))
+        for char, rows in glyphs:
+            atlas.add(char, np.frombuffer(rows, dtype=np.uint8).reshape(canvas_height, -1))
+    return atlases
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="rom_export", description="Export a built font ROM image to MIF, XBM, Intel HEX, COE, $readmemh or raw bin.")
+    parser.add_argument("image", help="FontRomCombined.bin")
+    parser.add_argument("--formats", default="mif,xbm",
+                        help=f"comma-separated list of: {', '.join(FORMATS)} (default %(default)s)")
+    parser.add_argument("--output-dir", help="directory for the exported files (default: next to the image)")
+    parser.add_argument("--address-map", help="FontRomAddressMap.json (default: next to the image)")
+    parser.add_argument("--layout", help="ROM layout JSON (default: rom_layout.json)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    directory = os.path.dirname(args.image)
+    try:
+        formats = parse_formats(args.formats)
+        layout = load_rom_layout(args.layout)
+        with open(args.image, "rb") as f:
+            image = f.read()
+        with open(args.address_map or os.path.join(directory, "FontRomAddressMap.json"), "r", encoding="utf-8") as f:
+            address_map = json.load(f)
+        output_dir = args.output_dir or directory
+        os.makedirs(output_dir, exist_ok=True)
+        export_sections(layout, image_atlases(layout, image, address_map), output_dir, formats)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+"""
+Inspector for built ROM images: look at any glyph of FontRomCombined.bin without
+re-rendering the font or keeping the XBM/MIF files.
+
+The image is memory-mapped, so opening even a large file reads nothing up front. A glyph's
+rows are memoryview slices of the map, one per part of its section (the 32x64 sections
+keep the high and low half of every row in different parts), located by arithmetic:
+
+    part offset + glyph index * canvas_height * part row bytes
+
+Characters are looked up in a dict built from FontRomAddressMap.json, so every lookup is
+O(1) however many glyphs the image holds. Without an address map the geometry comes from
+the ROM layout and glyphs are addressed by index only. base selects an image stored at an
+offset inside a larger file (several fonts in one flash dump).
+
+Command line:
+    python -m rom_inspect FontRomCombined.bin                     (checksum and summary)
+    python -m rom_inspect FontRomCombined.bin --section 16x32 --char A --char g
+    python -m rom_inspect FontRomCombined.bin --section 32x64_new --index 5 --png glyph.png
+"""
+import argparse
+import json
+import mmap
+import os
+import sys
+
+import numpy as np
+
+from rom_layout import load_rom_layout, iter_parts, CHECKSUM_SIZE
+
+class RomImage:
+    """
+    Read-only view of a built ROM image. sections maps each section name to
+    {"height", "row_bytes", "capacity", "parts": [(offset, byte_start, byte_stop)], "index"}
+    where index is {char: glyph index} (empty without an address map).
+    """
+    def __init__(self, path, address_map=None, layout=None, base=0):
+        if address_map is None and layout is None:
+            layout = load_rom_layout()
+        self.image_size = address_map["image_size"] if address_map else layout["image_size"]
+        self.base = base
+        self.sections = _sections_from_map(address_map) if address_map else _sections_from_layout(layout)
+        self._file = open(path, "rb")
+        try:
+            if os.fstat(self._file.fileno()).st_size < base + self.image_size:
+                raise ValueError(f"{path} is smaller than a {self.image_size}-byte image at offset {base}")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self._file.close()
+            raise
+        self.view = memoryview(self._map)[base:base + self.image_size]
+
+    def close(self):
+        self.view.release()
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def glyph_index(self, section, glyph):
+        """glyph is a character (looked up in the address map) or an index."""
+        info = self.sections[section]
+        if isinstance(glyph, str):
+            if not info["index"]:
+                raise ValueError(f"Cannot look up {glyph!r} without an address map; use a glyph index")
+            try:
+                return info["index"][glyph]
+            except KeyError:
+                raise ValueError(f"{glyph!r} is not in section '{section}'")
+        if not 0 <= glyph < info["capacity"]:
+            raise ValueError(f"Glyph index {glyph} is outside section '{section}' (0-{info['capacity'] - 1})")
+        return glyph
+
+    def glyph_parts(self, section, glyph):
+        """
+        Returns [(byte_start, byte_stop, view)] with view a zero-copy memoryview of the
+        glyph's rows in each part (canvas_height rows of byte_stop - byte_start bytes).
+        """
+        info = self.sections[section]
+        index = self.glyph_index(section, glyph)
+        parts = []
+        for offset, byte_start, byte_stop in info["parts"]:
+            size = info["height"] * (byte_stop - byte_start)
+            start = offset + index * size
+            parts.append((byte_start, byte_stop, self.view[start:start + size]))
+        return parts
+
+    def glyph_rows(self, section, glyph):
+        """The glyph's rows as ints, the first byte of a row in the highest bits."""
+        info = self.sections[section]
+        parts = self.glyph_parts(section, glyph)
+        rows = []
+        for row in range(info["height"]):
+            value = 0
+            for byte_start, byte_stop, view in parts:
+                width = byte_stop - byte_start
+                value = (value << (8 * width)) | int.from_bytes(view[row * width:(row + 1) * width], "big")
+            rows.append(value)
+        return rows
+
+    def render_ascii(self, section, glyph, on="#", off="."):
+        """The glyph as text, one line per row, leftmost pixel in the MSB (BIT_ORDER "big")."""
+        width = 8 * self.sections[section]["row_bytes"]
+        return "\n".join("".join(on if (row >> (width - 1 - x)) & 1 else off for x in range(width))
+                         for row in self.glyph_rows(section, glyph))
+
+    def glyph_pixels(self, section, glyph):
+        """The glyph as a (canvas_height, canvas_width) uint8 array of 0/1."""
+        info = self.sections[section]
+        rows = np.zeros((info["height"], info["row_bytes"]), dtype=np.uint8)
+        for byte_start, byte_stop, view in self.glyph_parts(section, glyph):
+            rows[:, byte_start:byte_stop] = np.frombuffer(view, dtype=np.uint8).reshape(info["height"], -1)
+        return np.unpackbits(rows, axis=1)
+
+    def render_png(self, section, glyphs, output_file, scale=4):
+        """Writes the glyphs side by side (white on black, scaled up) to a PNG file."""
+        from PIL import Image
+
+        strip = np.hstack([self.glyph_pixels(section, glyph) for glyph in glyphs]) * 255
+        strip = np.repeat(np.repeat(strip, scale, axis=0), scale, axis=1)
+        Image.fromarray(strip.astype(np.uint8), mode="L").save(output_file)
+
+    def checksum(self):
+        """Returns (stored, computed) 16-bit sums; they are equal for an intact image."""
+        data_end = self.image_size - CHECKSUM_SIZE
+        computed = int(np.frombuffer(self.view[:data_end], dtype=np.uint8).sum(dtype=np.uint64)) & 0xFFFF
+        stored = int.from_bytes(self.view[data_end:], "big")
+        return stored, computed
+
+def _sections_from_map(address_map):
+    sections = {}
+    for part in address_map["parts"]:
+        byte_start, byte_stop = part["row_bytes"]
+        width = byte_stop - byte_start
+        info = sections.get(part["section"])
+        if info is None:
+            info = sections[part["section"]] = {
+                "height": part["glyph_bytes"] // width,
+                "row_bytes": 0,
+                "capacity": part["size"] // part["glyph_bytes"],
+                "parts": [],
+                "index": {chr(code_point): index for code_point, index in address_map["glyphs"][part["section"]]},
+            }
+        info["row_bytes"] = max(info["row_bytes"], byte_stop)
+        info["capacity"] = min(info["capacity"], part["size"] // part["glyph_bytes"])
+        info["parts"].append((part["offset"], byte_start, byte_stop))
+    for info in sections.values():
+        info["parts"].sort(key=lambda part: part[1])
+    return sections
+
+def _sections_from_layout(layout):
+    sections = {}
+    for section, part in iter_parts(layout):
+        height = section["canvas_height"]
+        width = part["byte_stop"] - part["byte_start"]
+        info = sections.setdefault(section["name"], {
+            "height": height,
+            "row_bytes": (section["canvas_width"] + 7) // 8,
+            "capacity": part["size"] // (height * width),
+            "parts": [],
+            "index": {},
+        })
+        info["capacity"] = min(info["capacity"], part["size"] // (height * width))
+        info["parts"].append((part["offset"], part["byte_start"], part["byte_stop"]))
+    for info in sections.values():
+        info["parts"].sort(key=lambda part: part[1])
+    return sections
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="rom_inspect", description="Check a built ROM image and show its glyphs.")
+    parser.add_argument("image", help="built image, e.g. FontRomCombined.bin")
+    parser.add_argument("--address-map", help="FontRomAddressMap.json (default: next to the image, if present)")
+    parser.add_argument("--layout", help="ROM layout JSON, used when there is no address map")
+    parser.add_argument("--base", type=lambda text: int(text, 0), default=0,
+                        help="offset of the image inside the file")
+    parser.add_argument("--section", help="section to show glyphs from, e.g. 16x32")
+    parser.add_argument("--char", action="append", default=[], help="character to show (repeatable)")
+    parser.add_argument("--index", action="append", type=int, default=[], help="glyph index to show (repeatable)")
+    parser.add_argument("--png", help="write the selected glyphs to this PNG instead of printing them")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    map_path = args.address_map or os.path.join(os.path.dirname(args.image), "FontRomAddressMap.json")
+    try:
+        address_map = None
+        if args.address_map or os.path.exists(map_path):
+            with open(map_path, "r", encoding="utf-8") as f:
+                address_map = json.load(f)
+        layout = load_rom_layout(args.layout) if address_map is None else None
+        with RomImage(args.image, address_map, layout, args.base) as rom:
+            stored, computed = rom.checksum()
+            for name, info in rom.sections.items():
+                print(f"{name}: {len(info['index']) if address_map else '?'} glyphs of "
+                      f"{8 * info['row_bytes']}x{info['height']}, room for {info['capacity']}")
+            glyphs = args.char + args.index
+            if glyphs:
+                if args.section not in rom.sections:
+                    raise ValueError(f"--section must be one of: {', '.join(rom.sections)}")
+                if args.png:
+                    rom.render_png(args.section, glyphs, args.png)
+                    print(f"Saved {len(glyphs)} glyph(s) to {args.png}")
+                else:
+                    for glyph in glyphs:
+                        print(f"{args.section} glyph {rom.glyph_index(args.section, glyph)} ({glyph!r}):")
+                        print(rom.render_ascii(args.section, glyph))
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if stored != computed:
+        print(f"Checksum mismatch: stored 0x{stored:04X}, computed 0x{computed:04X}")
+        return 2
+    print(f"Checksum 0x{stored:04X} OK")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+import json
+import os
+
+# Layout used when no other spec is given: the FontRomCombined.bin layout
+# (16x32 at 0x0000, 32x64 high/low halves at 0x2000/0x6000 and 0xA000/0xD000).
+DEFAULT_LAYOUT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rom_layout.json")
+# The last 2 bytes of every image hold the 16-bit checksum.
+CHECKSUM_SIZE = 2
+
+def _to_int(value, what):
+    """Accepts ints as well as "0x..." strings from the JSON spec."""
+    if isinstance(value, int):
+        return value
+    try:
+        return int(str(value), 0)
+    except ValueError:
+        raise ValueError(f"{what}: expected a number, got {value!r}")
+
+def parse_rom_layout(spec):
+    """
+    Validates a layout spec (already decoded from JSON) and returns it with every
+    offset/size converted to int and defaults filled in.
+    """
+    layout = {
+        "image_size": _to_int(spec["image_size"], "image_size"),
+        "sections": [],
+    }
+    names = set()
+    for section in spec["sections"]:
+        name = section["name"]
+        canvas_width, canvas_height = section["canvas"]
+        grid = section.get("grid")
+        parsed = {
+            "name": name,
+            "file_name": section.get("file_name", name),
+            "canvas_width": _to_int(canvas_width, f"{name}.canvas"),
+            "canvas_height": _to_int(canvas_height, f"{name}.canvas"),
+            "grid_width": _to_int(grid[0], f"{name}.grid") if grid else None,
+            "grid_height": _to_int(grid[1], f"{name}.grid") if grid else None,
+            "forced_height": _to_int(section["forced_height"], f"{name}.forced_height"),
+            "max_width": _to_int(section["max_width"], f"{name}.max_width"),
+            "padding_top": _to_int(section.get("padding_top", 0), f"{name}.padding_top"),
+            "padding_bottom": _to_int(section.get("padding_bottom", 0), f"{name}.padding_bottom"),
+            "threshold": _to_int(section.get("threshold", 128), f"{name}.threshold"),
+            "parts": [],
+        }
+        bytes_per_row = (parsed["canvas_width"] + 7) // 8
+        for part in section["parts"]:
+            part_name = part["name"]
+            byte_start, byte_stop = part.get("bytes", [0, bytes_per_row])
+            if not 0 <= byte_start < byte_stop <= bytes_per_row:
+                raise ValueError(f"{part_name}: byte range {byte_start}:{byte_stop} "
+                                 f"is outside a {bytes_per_row}-byte row")
+            parsed["parts"].append({
+                "name": part_name,
+                "byte_start": byte_start,
+                "byte_stop": byte_stop,
+                "offset": _to_int(part["offset"], f"{part_name}.offset"),
+                "size": _to_int(part["size"], f"{part_name}.size"),
+            })
+        for item in [("section", name)] + [("part", part["name"]) for part in parsed["parts"]]:
+            if item in names:
+                raise ValueError(f"Duplicate {item[0]} name '{item[1]}' in ROM layout")
+            names.add(item)
+        layout["sections"].append(parsed)
+    return layout
+
+def load_rom_layout(path=None):
+    """Loads and validates a JSON layout spec (DEFAULT_LAYOUT_FILE if path is empty)."""
+    with open(path or DEFAULT_LAYOUT_FILE, "r", encoding="utf-8") as f:
+        return parse_rom_layout(json.load(f))
+
+def rom_layout_spec(layout):
+    """The JSON spec of a parsed layout (the inverse of parse_rom_layout)."""
+    sections = []
+    for section in layout["sections"]:
+        grid = None
+        if section["grid_width"] is not None:
+            grid = [section["grid_width"], section["grid_height"]]
+        sections.append({
+            "name": section["name"],
+            "file_name": section["file_name"],
+            "canvas": [section["canvas_width"], section["canvas_height"]],
+            "grid": grid,
+            "forced_height": section["forced_height"],
+            "max_width": section["max_width"],
+            "padding_top": section["padding_top"],
+            "padding_bottom": section["padding_bottom"],
+            "threshold": section["threshold"],
+            "parts": [{"name": part["name"], "bytes": [part["byte_start"], part["byte_stop"]],
+                       "offset": f"0x{part['offset']:04X}", "size": f"0x{part['size']:04X}"}
+                      for part in section["parts"]],
+        })
+    return {"image_size": f"0x{layout['image_size']:X}", "sections": sections}
+
+def save_rom_layout(layout, path):
+    """Writes a parsed layout back out as a JSON spec that load_rom_layout() accepts."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(rom_layout_spec(layout), f, indent=2)
+        f.write("\n")
+
+# Section render parameters that can be overridden without editing the spec.
+SECTION_PARAMETERS = ("forced_height", "max_width", "padding_top", "padding_bottom",
+                      "grid_width", "grid_height", "threshold")
+
+def apply_section_overrides(layout, overrides):
+    """
+    Returns a copy of layout with render parameters replaced per section.
+    overrides is {section name: {"forced_height": 40, ...}}, see SECTION_PARAMETERS.
+    """
+    sections = {section["name"]: dict(section) for section in layout["sections"]}
+    for name, values in overrides.items():
+        if name not in sections:
+            raise ValueError(f"Unknown section '{name}' (layout has: {', '.join(sections)})")
+        for key, value in values.items():
+            if key not in SECTION_PARAMETERS:
+                raise ValueError(f"Cannot override '{key}' for section '{name}'")
+            sections[name][key] = value
+    return dict(layout, sections=list(sections.values()))
+
+def iter_parts(layout):
+    """Yields (section, part) for every part of every section, in spec order."""
+    for section in layout["sections"]:
+        for part in section["parts"]:
+            yield section, part
+
+def part_offsets(layout):
+    """Returns {part name: base offset}."""
+    return {part["name"]: part["offset"] for _, part in iter_parts(layout)}
+
+def part_used_bytes(section, part, glyph_count):
+    """Bytes of glyph data a part needs for glyph_count glyphs."""
+    return glyph_count * section["canvas_height"] * (part["byte_stop"] - part["byte_start"])
+
+def check_rom_layout(layout, glyph_counts=None):
+    """
+    Checks a layout before anything is written and raises ValueError listing every problem:
+      - parts that overlap each other,
+      - parts running past the data area (image_size minus the checksum bytes),
+      - sections whose glyph data would not fit in their parts (when glyph_counts,
+        {section name: number of glyphs}, is given).
+    """
+    problems = []
+    data_end = layout["image_size"] - CHECKSUM_SIZE
+    regions = sorted(((part["offset"], part["offset"] + part["size"], part["name"])
+                      for _, part in iter_parts(layout)))
+    for start, end, name in regions:
+        if start < 0 or end > data_end:
+            problems.append(f"{name} (0x{start:05X}-0x{end - 1:05X}) runs past the data area "
+                            f"ending at 0x{data_end:05X}")
+    # Regions are sorted by start, so every region that overlaps region i starts at or
+    # after it and before its end; a large part covering several others reports each one.
+    for i, (start_a, end_a, name_a) in enumerate(regions):
+        for start_b, end_b, name_b in regions[i + 1:]:
+            if start_b >= end_a:
+                break
+            problems.append(f"{name_a} (0x{start_a:05X}-0x{end_a - 1:05X}) overlaps "
+                            f"{name_b} (0x{start_b:05X}-0x{end_b - 1:05X})")
+    if glyph_counts is not None:
+        for section, part in iter_parts(layout):
+            used = part_used_bytes(section, part, glyph_counts.get(section["name"], 0))
+            if used > part["size"]:
+                problems.append(f"{part['name']} needs {used} bytes for "
+                                f"{glyph_counts[section['name']]} glyphs but only has {part['size']}")
+    if problems:
+        raise ValueError("Invalid ROM layout:\n  " + "\n  ".join(problems))
+
+def pack_rom_sections(layout, atlases):
+    """
+    Returns the (base_offset, block) list for build_rom_image.
+    atlases maps each section name to its GlyphAtlas.
+    """
+    sections = []
+    for section, part in iter_parts(layout):
+        atlas = atlases[section["name"]]
+        sections.append((part["offset"], atlas.words(part["byte_start"], part["byte_stop"])))
+    return sections
+
+def rom_address_map(layout, atlases):
+    """
+    Describes where everything landed in the ROM image:
+    every part's byte range and fill, and every glyph's code point and index.
+    A glyph's data in a part starts at offset + index * canvas_height * part_bytes.
+    """
+    parts = []
+    glyphs = {}
+    for section, part in iter_parts(layout):
+        atlas = atlases[section["name"]]
+        parts.append({
+            "name": part["name"],
+            "section": section["name"],
+            "offset": part["offset"],
+            "size": part["size"],
+            "used": part_used_bytes(section, part, len(atlas)),
+            "row_bytes": [part["byte_start"], part["byte_stop"]],
+            "glyph_bytes": section["canvas_height"] * (part["byte_stop"] - part["byte_start"]),
+        })
+    for section in layout["sections"]:
+        atlas = atlases[section["name"]]
+        glyphs[section["name"]] = [[ord(char), index] for char, index in atlas.index.items()]
+    return {
+        "image_size": layout["image_size"],
+        "checksum_offset": layout["image_size"] - CHECKSUM_SIZE,
+        "parts": parts,
+        "glyphs": glyphs,
+    }
+
+def write_address_map(layout, atlases, output_file):
+    """Writes rom_address_map() as JSON."""
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(rom_address_map(layout, atlases), f, indent=1)
+    print(f"Address map saved as {output_file}")
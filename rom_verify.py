@@ -0,0 +1,173 @@
+"""
+Verifies a flashed ROM without reading the whole image back.
+
+The board is asked for the 16-bit sum of every block (eeprom_link.OPCODE_SUM) and the
+answers are compared with the same sums of the built image. Blocks that differ are split
+in half and asked again until the halves are leaf_size bytes (one packet); only those
+leaves are read back to find the exact bytes. Every bad range is then located in the ROM
+address map (FontRomAddressMap.json): which part, section and glyph it belongs to.
+
+A 16-bit sum misses some errors (two bytes swapped, changes that cancel out), so this is
+a fast check, not a proof; --full-read compares every byte instead. Boards that do not
+answer OPCODE_SUM (the current Mcu.c / Mcu2.c) get the full read as well, since reading
+blocks back to sum them on the host already costs a full read.
+
+Command line:
+    python -m rom_verify FontRomCombined.bin --port COM3 [--address-map FontRomAddressMap.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from delta_flash import changed_ranges
+from eeprom_link import EepromLink, MAX_PAYLOAD, address_size_for
+from frame_codec import FrameCodec, SPECS, sum16
+
+DEFAULT_BLOCK_SIZE = 1024
+
+def _split(blocks):
+    halves = []
+    for address, size in blocks:
+        half = size // 2
+        halves += [(address, half), (address + half, size - half)]
+    return halves
+
+def verify_image(link, image, base_address=0, block_size=DEFAULT_BLOCK_SIZE, leaf_size=None):
+    """
+    Checks that the board holds image at base_address. Returns (bad, stats) where bad is
+    the list of (start, stop) image offsets whose bytes differ, and stats counts
+    sum_requests, read_bytes, rounds and seconds.
+    """
+    if image and not link.supports_sum(base_address):
+        return verify_full_read(link, image, base_address)
+    leaf_size = leaf_size or link.chunk_size
+    started = time.perf_counter()
+    stats = {"sum_requests": 0, "read_bytes": 0, "rounds": 0}
+
+    blocks = [(start, min(block_size, len(image) - start)) for start in range(0, len(image), block_size)]
+    suspects = []
+    while blocks:
+        stats["rounds"] += 1
+        stats["sum_requests"] += len(blocks)
+        sums, _ = link.block_sums([(base_address + start, size) for start, size in blocks])
+        mismatched = [(start, size) for (start, size), total in zip(blocks, sums)
+                      if total != sum16(image[start:start + size])]
+        suspects += [block for block in mismatched if block[1] <= leaf_size]
+        blocks = _split([block for block in mismatched if block[1] > leaf_size])
+
+    bad = []
+    if suspects:
+        suspects.sort()
+        contents, _ = link.read_ranges([(base_address + start, size) for start, size in suspects])
+        stats["read_bytes"] = sum(size for _, size in suspects)
+        for (start, size), data in zip(suspects, contents):
+            bad += [(start + a, start + b) for a, b in changed_ranges(data, image[start:start + size])]
+    stats["seconds"] = time.perf_counter() - started
+    return bad, stats
+
+def verify_full_read(link, image, base_address=0):
+    """Reads the whole image back and compares every byte; same result as verify_image."""
+    started = time.perf_counter()
+    data, _ = link.read_image(len(image), base_address)
+    bad = changed_ranges(data, image)
+    return bad, {"sum_requests": 0, "read_bytes": len(image), "rounds": 1,
+                 "seconds": time.perf_counter() - started}
+
+def load_address_map(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def locate(address_map, offset):
+    """
+    Describes what lives at an image offset, using a rom_address_map() dict:
+    {"part", "section", "glyph_index", "char"} inside a part's glyph data,
+    {"part", "section", "unused": True} in a part's unused tail,
+    {"checksum": True} for the checksum bytes, or {} for anything else.
+    """
+    if offset >= address_map["checksum_offset"]:
+        return {"checksum": True}
+    for part in address_map["parts"]:
+        if part["offset"] <= offset < part["offset"] + part["size"]:
+            where = {"part": part["name"], "section": part["section"]}
+            relative = offset - part["offset"]
+            if relative >= part["used"]:
+                where["unused"] = True
+                return where
+            index = relative // part["glyph_bytes"]
+            where["glyph_index"] = index
+            for code_point, glyph_index in address_map["glyphs"][part["section"]]:
+                if glyph_index == index:
+                    where["char"] = chr(code_point)
+                    break
+            return where
+    return {}
+
+def describe_range(address_map, start, stop):
+    """One line naming every part/glyph touched by the bad range [start, stop)."""
+    places = []
+    for offset in range(start, stop):
+        where = locate(address_map, offset)
+        if where.get("checksum"):
+            text = "checksum"
+        elif "glyph_index" in where:
+            text = f"{where['part']} glyph {where['glyph_index']} ({where.get('char', '?')!r})"
+        elif where:
+            text = f"{where['part']} (unused)"
+        else:
+            text = "outside the layout"
+        if text not in places:
+            places.append(text)
+    return f"0x{start:05X}-0x{stop - 1:05X}: " + ", ".join(places)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="rom_verify", description="Check a flashed ROM against the built image.")
+    parser.add_argument("image", help="built image, e.g. FontRomCombined.bin")
+    parser.add_argument("--port", required=True, help="serial port (COM3, /dev/ttyUSB0, ...)")
+    parser.add_argument("--baud", type=int, default=9600)
+    parser.add_argument("--address-map", help="FontRomAddressMap.json (default: next to the image)")
+    parser.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE, help="first-round block size")
+    parser.add_argument("--full-read", action="store_true", help="read everything back instead of using sums")
+    parser.add_argument("--address", type=lambda text: int(text, 0), default=0, help="start address")
+    parser.add_argument("--address-size", type=int,
+                        help="address bytes per frame (default: enough for the image)")
+    parser.add_argument("--framing", choices=sorted(SPECS), default="xor8", help="checksum variant")
+    parser.add_argument("--window", type=int, default=8, help="packets in flight")
+    parser.add_argument("--chunk-size", type=int, default=32, help=f"bytes per packet (max {MAX_PAYLOAD})")
+    parser.add_argument("--timeout", type=float, default=0.5, help="seconds before a packet is resent")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    import serial  # pyserial is only needed for real hardware
+
+    with open(args.image, "rb") as f:
+        image = f.read()
+    map_path = args.address_map or os.path.join(os.path.dirname(args.image), "FontRomAddressMap.json")
+    address_map = load_address_map(map_path) if os.path.exists(map_path) else None
+    try:
+        with serial.Serial(args.port, args.baud, timeout=0.05) as port:
+            address_size = args.address_size or address_size_for(args.address + len(image))
+            link = EepromLink(port, FrameCodec(args.framing, address_size), args.window,
+                              args.chunk_size, args.timeout)
+            if args.full_read:
+                bad, stats = verify_full_read(link, image, args.address)
+            else:
+                bad, stats = verify_image(link, image, args.address, args.block_size)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"{stats['sum_requests']} block sums, {stats['read_bytes']} bytes read back, "
+          f"{stats['seconds']:.2f} s")
+    if not bad:
+        print("ROM matches the image")
+        return 0
+    print(f"{sum(stop - start for start, stop in bad)} bytes differ:")
+    for start, stop in bad:
+        print("  " + (describe_range(address_map, start, stop) if address_map
+                      else f"0x{start:05X}-0x{stop - 1:05X}"))
+    return 2
+
+if __name__ == "__main__":
+    sys.exit(main())
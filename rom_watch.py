@@ -0,0 +1,276 @@
+"""
+Watch mode: keeps a font ROM build warm and rebuilds only what changed.
+
+RomWatcher holds everything a build produces in memory: the opened font faces
+(fontrom.load_font), every glyph rendered so far (a MemoryGlyphCache, so going back to an
+earlier setting costs no rendering) and the atlas of every section, together with the
+render key it was made with (font hash, characters, render parameters). rebuild()
+re-reads the inputs and re-renders only the sections whose key changed. In the ROM image
+it rewrites only those sections' parts plus the checksum. If the parts were not moved,
+FontRomCombined.bin is patched in place at those regions. The address map and code point
+table are written only when a glyph index or the layout changed.
+
+The watched inputs are the font, the layout JSON (per-section forced_height, max_width,
+padding, threshold, grid: the "config" edited while iterating) and an optional charset
+file. They are polled with os.stat every --interval seconds. A change is built once the
+files have stopped changing for --settle seconds, because editors often save in several
+writes. A build that fails (half-written font, JSON typo, locked output file) is
+reported once, the previous outputs are kept and the build is tried again on every poll
+until it succeeds or the inputs change.
+
+Command line:
+    python -m rom_watch --ttf font.ttf --output-dir out [--layout rom_layout.json] [--charset-file chars.txt]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from charset import CodePointTable, write_code_point_tables, parse_charset, load_charset
+from fontrom import (DEFAULT_CHAR_LIST, RASTER_ENGINES, render_sections, _section_render_args,
+                     build_rom_image, export_xbm_mif_files, drop_stale_fonts)
+from glyph_cache import MemoryGlyphCache, font_file_hash
+from rom_export import parse_formats
+from rom_layout import (DEFAULT_LAYOUT_FILE, CHECKSUM_SIZE, load_rom_layout, check_rom_layout,
+                        pack_rom_sections, rom_address_map, write_address_map)
+
+DEFAULT_INTERVAL = 0.05
+DEFAULT_SETTLE = 0.02
+
+def _stamp(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def _geometry(layout):
+    """Everything about a layout that decides where bytes land in the image."""
+    return (layout["image_size"],
+            tuple((section["name"], section["canvas_height"], part["offset"], part["size"],
+                   part["byte_start"], part["byte_stop"])
+                  for section in layout["sections"] for part in section["parts"]))
+
+class RomWatcher:
+    """
+    Incremental builds of one font into output_dir (see the module docstring).
+    The characters come from charset_file if given, else char_list, else DEFAULT_CHAR_LIST.
+    """
+    def __init__(self, ttf_path, output_dir, layout_path=None, charset_file=None, char_list=None,
+                 raster="resample", export_xbm_mif=False, cache=None, export_formats=None):
+        self.ttf_path = ttf_path
+        self.output_dir = output_dir
+        self.layout_path = layout_path or DEFAULT_LAYOUT_FILE
+        self.charset_file = charset_file
+        self.char_list = char_list
+        self.raster = raster
+        self.export_formats = list(dict.fromkeys((["xbm", "mif"] if export_xbm_mif else []) +
+                                                 list(export_formats or [])))
+        self.cache = cache if cache is not None else MemoryGlyphCache()
+        self.atlases = {}
+        self.section_keys = {}
+        self.image = None
+        self.geometry = None
+        self.address_map = None
+        self.builds = 0
+        self.last_error = None
+
+    def watched_files(self):
+        files = [self.ttf_path, self.layout_path]
+        if self.charset_file:
+            files.append(self.charset_file)
+        return files
+
+    def _chars(self):
+        if self.charset_file:
+            chars = load_charset(self.charset_file, DEFAULT_CHAR_LIST)
+        else:
+            chars = self.char_list or DEFAULT_CHAR_LIST
+        return list(dict.fromkeys(chars))
+
+    def rebuild(self):
+        """
+        Brings the outputs up to date with the inputs. Returns the names of the sections
+        that were re-rendered (empty when nothing changed).
+        """
+        started = time.perf_counter()
+        layout = load_rom_layout(self.layout_path)
+        check_rom_layout(layout)
+        chars = self._chars()
+        drop_stale_fonts()
+        font_hash = font_file_hash(self.ttf_path)
+
+        changed = []
+        for section in layout["sections"]:
+            render_args = _section_render_args(section) + (self.raster,)
+            key = (font_hash, tuple(chars), render_args)
+            if self.section_keys.get(section["name"]) != key:
+                changed.append((section, render_args, key))
+        geometry = _geometry(layout)
+        if not changed and geometry == self.geometry:
+            return []
+
+        hits, misses = self.cache.hits, self.cache.misses
+        atlases = render_sections(self.ttf_path, chars, [render_args for _, render_args, _ in changed],
+                                  cache=self.cache, section_names=[section["name"] for section, _, _ in changed])
+        # Nothing is kept until the new glyphs are known to fit, so after a failed build the
+        # next call starts again from the last good one.
+        names = {section["name"] for section in layout["sections"]}
+        new_atlases = {name: atlas for name, atlas in self.atlases.items() if name in names}
+        new_keys = {name: key for name, key in self.section_keys.items() if name in names}
+        for (section, _, key), atlas in zip(changed, atlases):
+            new_atlases[section["name"]] = atlas
+            new_keys[section["name"]] = key
+        check_rom_layout(layout, {name: len(atlas) for name, atlas in new_atlases.items()})
+
+        # The new state is kept only once everything is on disk. A failed write (disk full,
+        # file locked) leaves the files in an unknown state, so the next build writes the
+        # whole image again instead of patching it.
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            rom_file = os.path.join(self.output_dir, "FontRomCombined.bin")
+            stamp = _stamp(rom_file)
+            if geometry == self.geometry and stamp is not None and stamp[1] == len(self.image):
+                image, written = self._patch_image(layout, new_atlases, [section for section, _, _ in changed],
+                                                   rom_file)
+            else:
+                image, _ = build_rom_image(pack_rom_sections(layout, new_atlases), layout["image_size"])
+                with open(rom_file, "wb") as f:
+                    f.write(image)
+                written = len(image)
+
+            address_map = rom_address_map(layout, new_atlases)
+            if address_map != self.address_map:
+                write_address_map(layout, new_atlases, os.path.join(self.output_dir, "FontRomAddressMap.json"))
+                write_code_point_tables({name: CodePointTable.from_index(atlas.index)
+                                         for name, atlas in new_atlases.items()},
+                                        os.path.join(self.output_dir, "FontRomCodePoints.bin"))
+                self.address_map = address_map
+            if self.export_formats and changed:
+                export_xbm_mif_files(dict(layout, sections=[section for section, _, _ in changed]),
+                                     new_atlases, self.output_dir, self.export_formats)
+        except Exception:
+            self.geometry = None
+            raise
+        self.atlases, self.section_keys = new_atlases, new_keys
+        self.image, self.geometry = image, geometry
+
+        self.builds += 1
+        checksum = (image[-2] << 8) | image[-1]
+        print(f"Rebuilt {', '.join(section['name'] for section, _, _ in changed) or 'layout'} "
+              f"in {(time.perf_counter() - started) * 1000:.1f} ms: "
+              f"{self.cache.misses - misses} glyphs rendered, {self.cache.hits - hits} reused, "
+              f"{written} bytes written, checksum 0x{checksum:04X}")
+        return [section["name"] for section, _, _ in changed]
+
+    def _patch_image(self, layout, atlases, sections, rom_file):
+        """
+        Re-places the parts of sections in a copy of the image kept from the last build,
+        updates the checksum and writes just those regions into rom_file.
+        The checksum is a plain 16-bit sum, so it is updated region by region: the old
+        bytes of a part are subtracted and the new ones added.
+        Returns (new image, bytes written).
+        """
+        image = bytearray(self.image)
+        checksum = (image[-2] << 8) | image[-1]
+        regions = []
+        for section in sections:
+            words = pack_rom_sections(dict(layout, sections=[section]), atlases)
+            for part, (offset, block) in zip(section["parts"], words):
+                block = np.ascontiguousarray(block, dtype=np.uint8).reshape(-1)
+                old = np.frombuffer(image, dtype=np.uint8, count=part["size"], offset=offset)
+                checksum += int(block.sum(dtype=np.uint64)) - int(old.sum(dtype=np.uint64))
+                image[offset:offset + part["size"]] = bytes(part["size"])
+                image[offset:offset + len(block)] = block.tobytes()
+                regions.append((offset, offset + part["size"]))
+        checksum &= 0xFFFF
+        image[-2] = (checksum >> 8) & 0xFF
+        image[-1] = checksum & 0xFF
+        regions.append((len(image) - CHECKSUM_SIZE, len(image)))
+        with open(rom_file, "r+b") as f:
+            for start, stop in regions:
+                f.seek(start)
+                f.write(image[start:stop])
+        return image, sum(stop - start for start, stop in regions)
+
+    def watch(self, interval=DEFAULT_INTERVAL, settle=DEFAULT_SETTLE):
+        """
+        Builds, then polls the watched files and rebuilds on every change until interrupted.
+        While the last build has failed, every poll tries again.
+        """
+        stamps = {path: _stamp(path) for path in self.watched_files()}
+        failed = self._try_rebuild() is None
+        print(f"Watching {', '.join(self.watched_files())} (Ctrl+C to stop)")
+        while True:
+            time.sleep(interval)
+            current = {path: _stamp(path) for path in self.watched_files()}
+            if current == stamps and not failed:
+                continue
+            time.sleep(settle)
+            settled = {path: _stamp(path) for path in self.watched_files()}
+            if settled != current:
+                continue  # still being written; look again next round
+            stamps = settled
+            failed = self._try_rebuild() is None
+
+    def _try_rebuild(self):
+        """rebuild(), or None after printing the error (once while it repeats)."""
+        try:
+            rebuilt = self.rebuild()
+        except (OSError, ValueError, KeyError) as e:
+            message = f"Error: {e} (keeping the previous outputs)"
+            if message != self.last_error:
+                print(message, file=sys.stderr)
+            self.last_error = message
+            return None
+        self.last_error = None
+        return rebuilt
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="rom_watch",
+        description="Rebuild FontRomCombined.bin whenever the font, layout or charset file changes.")
+    parser.add_argument("--ttf", required=True, help="TTF/TTC font file")
+    parser.add_argument("--output-dir", required=True, help="directory for the generated files")
+    parser.add_argument("--layout", help="ROM layout JSON to watch (default: rom_layout.json)")
+    chars = parser.add_mutually_exclusive_group()
+    chars.add_argument("--chars", help="characters to render, in ROM order (default: built-in list)")
+    chars.add_argument("--charset", help="character ranges/sets, e.g. 'default,latin1'")
+    chars.add_argument("--charset-file", help="file of character ranges/sets to watch (see charset.py)")
+    parser.add_argument("--raster", choices=RASTER_ENGINES, default="resample")
+    parser.add_argument("--export-xbm-mif", action="store_true",
+                        help="also rewrite the XBM/MIF files of every rebuilt section")
+    parser.add_argument("--export", metavar="FORMATS",
+                        help="also rewrite these formats (see rom_export) for every rebuilt section")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL,
+                        help="seconds between polls of the watched files (default %(default)s)")
+    parser.add_argument("--settle", type=float, default=DEFAULT_SETTLE,
+                        help="seconds a change must be stable before it is built (default %(default)s)")
+    parser.add_argument("--once", action="store_true", help="build once and exit")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        char_list = list(args.chars) if args.chars else None
+        if args.charset:
+            char_list = parse_charset(args.charset, DEFAULT_CHAR_LIST)
+        export_formats = parse_formats(args.export) if args.export else None
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    watcher = RomWatcher(args.ttf, args.output_dir, args.layout, args.charset_file, char_list,
+                         raster=args.raster, export_xbm_mif=args.export_xbm_mif,
+                         export_formats=export_formats)
+    if args.once:
+        return 0 if watcher._try_rebuild() is not None else 1
+    try:
+        watcher.watch(args.interval, args.settle)
+    except KeyboardInterrupt:
+        print(f"Stopped after {watcher.builds} build(s).")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
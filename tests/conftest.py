@@ -0,0 +1,13 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def ttf_path():
+    """The font bundled with the benchmarks, so every machine renders the same glyphs."""
+    return os.path.join(ROOT, "benchmarks", "fonts", "DejaVuSans.ttf")
@@ -0,0 +1,62 @@
+import asyncio
+import random
+
+import pytest
+
+from async_link import AsyncEepromClient, PollingTransport, provision
+from device_sim import SimulatedDevice, SimulatedPort
+from frame_codec import FrameCodec
+
+# The ports deliver bytes instantly, so a short resend timeout is plenty.
+TIMEOUT = 0.05
+
+def _image(size, seed=1):
+    return random.Random(seed).randbytes(size)
+
+def _transport(device, seed, **faults):
+    return PollingTransport(SimulatedPort(device, timeout=0, seed=seed, **faults), 0.0005)
+
+def test_provision_writes_every_board_over_noisy_lines():
+    # CRC16, since XOR8 can pass a write damaged in both its address and its data.
+    codec = FrameCodec("crc16", 3)
+    image = _image(0x4000)
+    devices = [SimulatedDevice(codec=codec) for _ in range(2)]
+    transports = [_transport(device, seed, drop_rate=0.002, corrupt_rate=0.002)
+                  for seed, device in enumerate(devices, 1)]
+    results = asyncio.run(provision(transports, image, framing=codec, timeout=TIMEOUT))
+    for device, stats in zip(devices, results):
+        assert not isinstance(stats, BaseException), stats
+        assert device.eeprom_sim[:len(image)] == image
+        assert stats["bytes"] == len(image)
+        assert stats["packets"] == len(image) // 32
+        # Damaged requests come back NACKed, lost ones time out; both are resent.
+        assert stats["nacks"] > 0 and stats["timeouts"] > 0
+        assert stats["retransmits"] >= stats["nacks"] + stats["timeouts"]
+
+def test_provision_reports_each_failure_separately():
+    codec = FrameCodec("xor8", 2)
+    image = _image(0x120)
+    small = SimulatedDevice(memory_size=0x100, codec=codec)
+    good = SimulatedDevice(memory_size=0x200, codec=codec)
+    results = asyncio.run(provision([_transport(small, 1), _transport(good, 2)], image,
+                                    framing=codec, timeout=TIMEOUT, max_retries=2))
+    assert isinstance(results[0], OSError)
+    assert results[1]["retransmits"] == 0
+    assert good.eeprom_sim[:len(image)] == image
+
+async def _read(device, pieces, **options):
+    async with AsyncEepromClient(_transport(device, 1), device.codec, timeout=TIMEOUT, **options) as client:
+        return [await client.read(address, count) for address, count in pieces]
+
+def test_reads():
+    device = SimulatedDevice(codec=FrameCodec("crc16", 3))
+    image = _image(0x100)
+    device.eeprom_sim[:len(image)] = image
+    pieces = [(0, 1), (0x41, 1), (0x10, 33)]
+    assert asyncio.run(_read(device, pieces)) == [image[:1], image[0x41:0x42], image[0x10:0x31]]
+
+def test_reads_are_not_fooled_by_an_echoing_board():
+    # Mcu.c ACKs a 1-byte READ with its payload, the count byte 0x01.
+    device = SimulatedDevice(codec=FrameCodec("xor8", 3), echo=True)
+    with pytest.raises(OSError):
+        asyncio.run(_read(device, [(0x40, 1)], max_retries=2))
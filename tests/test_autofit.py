@@ -0,0 +1,16 @@
+import pytest
+
+from autofit import score_forced_height
+from rom_layout import load_rom_layout
+
+def _section(name="16x32"):
+    return next(section for section in load_rom_layout()["sections"] if section["name"] == name)
+
+def test_candidates_are_scored(ttf_path):
+    candidates = score_forced_height(ttf_path, ["A", "0", "O"], _section(), 28, [13], [128])
+    assert len(candidates) == 1
+    assert candidates[0]["metrics"]["failed"] == 0
+
+def test_no_drawable_glyphs_is_a_clear_error(ttf_path):
+    with pytest.raises(ValueError, match="No glyphs to score"):
+        score_forced_height(ttf_path, [" "], _section(), 28, [13], [128])
@@ -0,0 +1,27 @@
+import pytest
+
+from charset import CodePointTable, load_charset, parse_charset
+
+def test_code_points_are_hex_with_either_prefix():
+    assert parse_charset("0x41 U+42, u+43 0X44 0xB0") == ["A", "B", "C", "D", "°"]
+
+def test_ranges_named_sets_and_repeats():
+    assert parse_charset("0x30-0x32 U+2190..U+2191 0x31") == ["0", "1", "2", "←", "↑"]
+    assert parse_charset("ascii")[:3] == [" ", "!", '"']
+    assert parse_charset("default,0x41", default=["Z", "A"]) == ["Z", "A"]
+
+@pytest.mark.parametrize("item", ["41", "B0", "2190-21FF", "0o101", "0x", "0x7E-0x20", "U+D800", "0x110000"])
+def test_bare_and_invalid_items_are_rejected(item):
+    with pytest.raises(ValueError):
+        parse_charset(item)
+
+def test_charset_file(tmp_path):
+    path = tmp_path / "chars.txt"
+    path.write_text("# digits and a few symbols\n0x30-0x39  # digits\ntext: ©#\nU+41\n", encoding="utf-8")
+    assert load_charset(path) == list("0123456789") + ["©", "#", "A"]
+
+def test_code_point_table_merges_runs():
+    table = CodePointTable.from_index({char: index for index, char in enumerate("ABCxyz")})
+    assert len(table.entries) == 2
+    assert table.lookup("C") == 2 and table.lookup("z") == 5
+    assert "D" not in table
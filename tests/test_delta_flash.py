@@ -0,0 +1,99 @@
+import random
+
+import pytest
+
+from delta_flash import changed_ranges, delta_chunks, flash_and_save, flash_delta, load_manifest, save_manifest
+from device_sim import SimulatedDevice, SimulatedPort
+from eeprom_link import EepromLink, OPCODE_WRITE
+from frame_codec import FrameCodec
+
+class RecordingDevice(SimulatedDevice):
+    """Keeps the (address, length) of every WRITE it stores."""
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.writes = []
+
+    def _execute(self):
+        if self.opcode == OPCODE_WRITE and self.address + len(self.data) <= len(self.eeprom_sim):
+            self.writes.append((self.address, len(self.data)))
+        return super()._execute()
+
+def _image(size, seed=1):
+    return random.Random(seed).randbytes(size)
+
+def _changed(image, offsets):
+    new = bytearray(image)
+    for offset in offsets:
+        new[offset] ^= 0xFF
+    return bytes(new)
+
+def _link(device):
+    return EepromLink(SimulatedPort(device, timeout=0.002, seed=3), device.codec, timeout=0.02)
+
+def test_changed_ranges():
+    old = _image(1000)
+    assert changed_ranges(old, old) == []
+    assert changed_ranges(old, _changed(old, [0, 1, 2, 999])) == [(0, 3), (999, 1000)]
+    # Found across the coarse comparison blocks.
+    assert changed_ranges(old, _changed(old, [255, 256])) == [(255, 257)]
+
+def test_gap_of_exactly_merge_gap_is_merged():
+    old = _image(600)
+    new = _changed(old, [100, 105, 300, 306])
+    # 4 equal bytes between 100 and 105, 5 between 300 and 306.
+    assert changed_ranges(old, new, merge_gap=4) == [(100, 106), (300, 301), (306, 307)]
+    assert changed_ranges(old, new, merge_gap=5) == [(100, 106), (300, 307)]
+    assert changed_ranges(old, new, merge_gap=3) == [(100, 101), (105, 106), (300, 301), (306, 307)]
+
+def test_new_image_longer_than_old():
+    old = _image(500)
+    longer = old + _image(20, seed=2)
+    assert changed_ranges(old, longer) == [(500, 520)]
+    # A change merge_gap bytes before the end of old joins the new tail, one more does not.
+    assert changed_ranges(old, _changed(longer, [495]), merge_gap=4) == [(495, 520)]
+    assert changed_ranges(old, _changed(longer, [495]), merge_gap=3) == [(495, 496), (500, 520)]
+    # A shorter new image only compares what it has.
+    assert changed_ranges(longer, _changed(old, [10])) == [(10, 11)]
+
+def test_without_an_old_image_everything_is_sent():
+    new = _image(100)
+    assert changed_ranges(None, new) == [(0, 100)]
+    assert changed_ranges(None, b"") == []
+    assert delta_chunks(None, new, chunk_size=32, base_address=0x1000) == \
+        [(0x1000 + offset, new[offset:offset + 32]) for offset in range(0, 100, 32)]
+
+def test_flash_delta_writes_only_the_changed_ranges():
+    device = RecordingDevice(memory_size=0x2000, codec=FrameCodec("xor8", 2))
+    old = _image(0x2000)
+    device.eeprom_sim[:] = old
+    changes = [0x10, 0x11, 0x18, 0x400, 0x1FFF] + list(range(0x1000, 0x1050))
+    new = _changed(old, changes)
+    stats = flash_delta(_link(device), new, old)
+    assert device.eeprom_sim == new
+    # Frame overhead is 6 bytes: the gap 0x12..0x17 is resent, the rest of the image is not.
+    written = sorted(set(address + i for address, length in device.writes for i in range(length)))
+    assert written == sorted(set(changes) | set(range(0x12, 0x18)))
+    assert stats["changed_bytes"] == len(changes)
+    assert stats["sent_bytes"] == len(written)
+    assert stats["ranges"] == 4
+
+def test_manifest_is_saved_only_after_a_successful_flash(tmp_path):
+    manifest = str(tmp_path / "FontRomCombined.bin.flashed")
+    old = _image(0x200)
+    save_manifest(manifest, old)
+    new = _changed(old, [3, 0x1F0])
+
+    device = RecordingDevice(memory_size=0x100, codec=FrameCodec("xor8", 2))
+    link = _link(device)
+    link.max_retries = 2
+    with pytest.raises(OSError):
+        # 0x1F0 is past the end of the board's memory, so that packet is always NACKed.
+        flash_and_save(link, new, manifest, load_manifest(manifest))
+    assert load_manifest(manifest) == old
+
+    device = RecordingDevice(memory_size=0x200, codec=FrameCodec("xor8", 2))
+    device.eeprom_sim[:] = old
+    stats = flash_and_save(_link(device), new, manifest, load_manifest(manifest))
+    assert stats["changed_bytes"] == 2
+    assert load_manifest(manifest) == new == device.eeprom_sim
+    assert [path.name for path in tmp_path.iterdir()] == ["FontRomCombined.bin.flashed"]
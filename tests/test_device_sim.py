@@ -0,0 +1,160 @@
+import random
+
+import pytest
+
+from device_sim import SimulatedDevice, SimulatedPort, DEFAULT_MEMORY_SIZE
+from eeprom_link import EepromLink, OPCODE_ACK, OPCODE_SUM
+from frame_codec import FrameCodec, sum16
+from rom_verify import verify_image, verify_full_read
+
+# The port delivers bytes instantly, so a short resend timeout is plenty.
+TIMEOUT = 0.02
+
+class NackingDevice(SimulatedDevice):
+    """NACKs the first copy of every nack_every-th good frame, as if its checksum had failed."""
+    def __init__(self, nack_every, **options):
+        super().__init__(**options)
+        self.nack_every = nack_every
+        self.seen = set()
+
+    def _execute(self):
+        key = (self.opcode, self.address)
+        if key not in self.seen:
+            self.seen.add(key)
+            if len(self.seen) % self.nack_every == 0:
+                return self._nack()
+        return super()._execute()
+
+class NoSumDevice(SimulatedDevice):
+    """
+    A board without OPCODE_SUM: answers it like Mcu.c ("echo", an ACK with the payload),
+    Mcu2.c ("silent", no reply) or with a NACK.
+    """
+    def __init__(self, answer, **options):
+        super().__init__(**options)
+        self.answer = answer
+
+    def _execute(self):
+        if self.opcode != OPCODE_SUM:
+            return super()._execute()
+        if self.answer == "echo":
+            return self.codec.encode(OPCODE_ACK, self.address, bytes(self.data))
+        if self.answer == "silent":
+            return b""
+        return self._nack()
+
+def _image(size=DEFAULT_MEMORY_SIZE, seed=1):
+    return random.Random(seed).randbytes(size)
+
+def _link(device, **faults):
+    port = SimulatedPort(device, timeout=0.002, seed=3, **faults)
+    return EepromLink(port, device.codec, timeout=TIMEOUT)
+
+def test_clean_write_needs_no_retransmits():
+    device = SimulatedDevice(codec=FrameCodec("xor8", 3))
+    image = _image()
+    stats = _link(device).write_image(image)
+    assert device.eeprom_sim == image
+    assert stats["packets"] == len(image) // 32
+    assert stats["retransmits"] == 0
+
+# XOR8 lets about 1 in 256 damaged frames through: a read reply is only checked by its
+# length, and a write whose address and data both took a flip in the same bit lands at
+# the wrong address. Noisy transfers therefore use CRC16, as any bulk transfer should.
+@pytest.mark.parametrize("faults", [
+    {"drop_rate": 0.002},
+    {"corrupt_rate": 0.002},
+    {"drop_rate": 0.002, "corrupt_rate": 0.002},
+])
+def test_write_image_survives_a_noisy_line(faults):
+    device = SimulatedDevice(codec=FrameCodec("crc16", 3))
+    image = _image()
+    stats = _link(device, **faults).write_image(image)
+    assert device.eeprom_sim == image
+    assert stats["retransmits"] > 0
+
+def test_nacked_packets_are_resent():
+    device = NackingDevice(5, codec=FrameCodec("xor8", 3))
+    image = _image(0x2000)
+    stats = _link(device).write_image(image)
+    assert device.eeprom_sim[:len(image)] == image
+    assert stats["nacks"] == stats["retransmits"] == len(image) // 32 // 5
+
+def test_write_gives_up_when_every_copy_is_nacked():
+    device = SimulatedDevice(memory_size=0x100, codec=FrameCodec("xor8", 2))
+    link = _link(device)
+    link.max_retries = 2
+    with pytest.raises(OSError, match="0x100 after 2 retries"):
+        link.write_image(bytes(0x120))
+
+def test_read_image_survives_a_noisy_line():
+    device = SimulatedDevice(codec=FrameCodec("crc16", 3))
+    image = _image(0x4000)
+    device.eeprom_sim[:len(image)] = image
+    data, _ = _link(device, drop_rate=0.002, corrupt_rate=0.002).read_image(len(image))
+    assert data == image
+
+@pytest.mark.parametrize("framing, faults", [
+    ("xor8", {}),
+    ("crc16", {"drop_rate": 0.002, "corrupt_rate": 0.002}),
+])
+def test_verify_finds_exactly_the_damaged_bytes(framing, faults):
+    device = SimulatedDevice(codec=FrameCodec(framing, 3))
+    image = bytearray(_image())
+    device.eeprom_sim[:] = image
+    # Every damaged byte reads one too high, so no two errors cancel out in a block sum.
+    for offset in (0x10, 0x11, 0x5000, DEFAULT_MEMORY_SIZE - 1):
+        image[offset] = 0x10
+        device.eeprom_sim[offset] = 0x11
+    link = _link(device, **faults)
+    expected = [(0x10, 0x12), (0x5000, 0x5001), (DEFAULT_MEMORY_SIZE - 1, DEFAULT_MEMORY_SIZE)]
+    bad, stats = verify_image(link, image)
+    assert bad == expected
+    assert stats["read_bytes"] == 3 * 32
+    assert verify_full_read(link, image)[0] == expected
+
+def test_verify_passes_a_good_image():
+    device = SimulatedDevice(codec=FrameCodec("xor8", 3))
+    image = _image()
+    device.eeprom_sim[:] = image
+    bad, stats = verify_image(_link(device), image)
+    assert bad == []
+    assert stats["rounds"] == 1 and stats["read_bytes"] == 0
+
+@pytest.mark.parametrize("answer", ["echo", "silent", "nack"])
+def test_block_sums_fall_back_to_read(answer):
+    device = NoSumDevice(answer, codec=FrameCodec("xor8", 3))
+    image = _image(0x1000)
+    device.eeprom_sim[:len(image)] = image
+    link = _link(device)
+    blocks = [(0, 0x400), (0x400, 0x123), (0x800, 0x800)]
+    sums, _ = link.block_sums(blocks)
+    assert link.sum_supported is False
+    assert sums == [sum16(image[start:start + size]) for start, size in blocks]
+
+def test_verify_without_sum_reads_everything_back():
+    device = NoSumDevice("echo", codec=FrameCodec("xor8", 3))
+    image = bytearray(_image(0x2000))
+    device.eeprom_sim[:len(image)] = image
+    device.eeprom_sim[0x1234] ^= 0xFF
+    bad, stats = verify_image(_link(device), image)
+    assert bad == [(0x1234, 0x1235)]
+    assert stats["read_bytes"] == len(image) and stats["sum_requests"] == 0
+
+def test_single_byte_reads():
+    device = SimulatedDevice(codec=FrameCodec("xor8", 3))
+    image = _image(0x100)
+    device.eeprom_sim[:len(image)] = image
+    link = _link(device)
+    results, _ = link.read_ranges([(0, 1), (0x41, 1), (0x10, 33)])
+    assert results == [image[:1], image[0x41:0x42], image[0x10:0x31]]
+    link.chunk_size = 1
+    assert link.read_image(8, 0x20)[0] == image[0x20:0x28]
+
+def test_reads_are_not_fooled_by_an_echoing_board():
+    # Mcu.c ACKs a 1-byte READ with its payload, the count byte 0x01.
+    device = SimulatedDevice(codec=FrameCodec("xor8", 3), echo=True)
+    link = _link(device)
+    link.max_retries = 2
+    with pytest.raises(OSError):
+        link.read_ranges([(0x40, 1)])
@@ -0,0 +1,93 @@
+import binascii
+
+import pytest
+
+from frame_codec import CRC16_TABLE, FrameCodec, SPECS, crc16, sum16, xor8
+
+OPCODE = 0x02
+READ = 0x55
+
+def _table_crc16(data, crc=0xFFFF):
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFF) ^ CRC16_TABLE[(crc >> 8) ^ byte]
+    return crc
+
+def test_checksums():
+    assert xor8(b"\x01\x02\x04\x80") == 0x87
+    assert xor8(b"") == 0
+    assert sum16(b"\xFF" * 300) == (255 * 300) & 0xFFFF
+    assert crc16(b"123456789") == 0x29B1  # the CRC-16/CCITT-FALSE check value
+    data = bytes(range(256)) * 2
+    assert crc16(data) == _table_crc16(data) == binascii.crc_hqx(data, 0xFFFF)
+
+def test_frame_layout():
+    frame = FrameCodec("xor8", 2).encode(OPCODE, 0x1234, b"\x10\x20")
+    assert frame == bytes([0xAA, OPCODE, 0x12, 0x34, 2, 0x10, 0x20, OPCODE ^ 0x12 ^ 0x34 ^ 2 ^ 0x10 ^ 0x20])
+    frame = FrameCodec("sum16").encode(OPCODE, 0x10, b"\x01")
+    assert frame[-2:] == (0xAA + OPCODE + 0x10 + 1 + 1).to_bytes(2, "big")
+
+@pytest.mark.parametrize("name", sorted(SPECS))
+@pytest.mark.parametrize("address_size", [1, 2, 3])
+def test_round_trip(name, address_size):
+    codec = FrameCodec(name, address_size)
+    messages = [(OPCODE, 0, b""), (OPCODE, 1, b"\xAA"), (0xCC, codec.max_address, bytes(range(59))),
+                (0x33, codec.max_address // 3, b"\xAA\xAA\x00")]
+    stream = b"".join(codec.encode(opcode, address, data) for opcode, address, data in messages)
+    frames = codec.decoder().feed(stream)
+    assert [(frame.opcode, frame.address, frame.data) for frame in frames] == messages
+    assert [frame.length for frame in frames] == [len(data) for _, _, data in messages]
+
+def test_encode_rejects_what_does_not_fit():
+    codec = FrameCodec("xor8", 1)
+    with pytest.raises(ValueError, match="does not fit in 1 address byte"):
+        codec.encode(OPCODE, 0x100)
+    with pytest.raises(ValueError, match="length byte"):
+        codec.encode(OPCODE, 0, bytes(256))
+    with pytest.raises(ValueError):
+        FrameCodec("parity")
+    with pytest.raises(ValueError):
+        FrameCodec("xor8", 0)
+
+@pytest.mark.parametrize("name", sorted(SPECS))
+def test_corrupted_checksum_is_rejected(name):
+    codec = FrameCodec(name, 3)
+    bad = bytearray(codec.encode(OPCODE, 0x1234, b"abc"))
+    bad[-1] ^= 0x01
+    good = codec.encode(OPCODE, 0x5678, b"def")
+    decoder = codec.decoder()
+    frames = decoder.feed(bytes(bad) + good)
+    assert [(frame.address, frame.data) for frame in frames] == [(0x5678, b"def")]
+    assert decoder.bad_frames >= 1
+
+@pytest.mark.parametrize("name", sorted(SPECS))
+def test_resync_after_garbage_in_any_split(name):
+    codec = FrameCodec(name, 2)
+    stream = (b"\x00\xAA\x13" + codec.encode(OPCODE, 0x0102, b"\xAA\x55")
+              + b"\xAA\xAA\xFF" + codec.encode(READ, 0x0304, b"xyz"))
+    for split in range(len(stream) + 1):
+        # The second false start reads 0x55 as its length; the cap rejects it at once.
+        decoder = codec.decoder(max_length=59)
+        frames = decoder.feed(stream[:split]) + decoder.feed(stream[split:])
+        assert [(frame.opcode, frame.address, frame.data) for frame in frames] == \
+            [(OPCODE, 0x0102, b"\xAA\x55"), (READ, 0x0304, b"xyz")], split
+
+def test_false_start_with_a_long_length_does_not_hold_up_frames():
+    codec = FrameCodec("xor8", 1)
+    good = codec.encode(0xCC, 0x20, b"ok")
+    # A stray 0xAA whose "length" byte says 0xF0: without a cap the decoder would wait
+    # for 240 more bytes before giving up on it.
+    decoder = codec.decoder(max_length=59)
+    assert decoder.feed(b"\xAA\xCC\x00") == []
+    frames = decoder.feed(b"\xF0" + good)
+    assert [(frame.address, frame.data) for frame in frames] == [(0x20, b"ok")]
+    assert decoder.buffer == bytearray()
+
+def test_no_payload_requests():
+    codec = FrameCodec(SPECS["sum16"]._replace(no_payload=(READ,)), 3)
+    request = codec.encode(READ, 0x10000, length=40)
+    assert len(request) == codec.header_size + codec.checksum_size
+    frames = codec.decoder(requests=True).feed(request + codec.encode(OPCODE, 1, b"\x07"))
+    assert [(frame.opcode, frame.address, frame.data, frame.length) for frame in frames] == \
+        [(READ, 0x10000, b"", 40), (OPCODE, 1, b"\x07", 1)]
+    with pytest.raises(ValueError):
+        codec.encode(READ, 0, b"\x01", length=1)
@@ -0,0 +1,112 @@
+import random
+
+import pytest
+
+import baseline_reference
+import Swap
+from mif import (BEGIN, DATA, END, HEADER, OTHER, MifReader, MifWriter, format_mif_number, radix_base,
+                 reshape_mif, split_mif_lanes)
+
+def _write_mif(path, width, depth, radix="HEX", seed=1):
+    """A MIF of random words with a comment every 16 words, like the font MIFs."""
+    rng = random.Random(seed)
+    with MifWriter(str(path)) as mif:
+        mif.header(depth, width, data_radix=radix)
+        for address in range(depth):
+            if address % 16 == 0:
+                mif.comment(f"Character: '{address // 16}'")
+            mif.word(address, rng.getrandbits(width))
+        mif.end()
+    return str(path)
+
+def _read(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+def _data(path):
+    """[(address, word text)] of the data records of a MIF."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [(record.address, record.data) for record in MifReader(f) if record.kind == DATA]
+
+@pytest.mark.parametrize("word_order", ["big", "little"])
+def test_reshape_there_and_back(tmp_path, word_order):
+    original = _write_mif(tmp_path / "in.mif", 16, 256)
+    wide = reshape_mif(original, str(tmp_path / "wide.mif"), 32, word_order)
+    with open(wide, "r", encoding="utf-8") as f:
+        reader = MifReader(f)
+        records = [record for record in reader if record.kind == DATA]
+    assert (reader.depth, reader.width, len(records)) == (128, 32, 128)
+    first, second = _data(original)[:2]
+    expected = first[1] + second[1] if word_order == "big" else second[1] + first[1]
+    assert records[0].data == expected
+    back = reshape_mif(wide, str(tmp_path / "back.mif"), 16, word_order)
+    assert _read(back) == _read(original)
+
+def test_reshape_between_radixes(tmp_path):
+    original = _write_mif(tmp_path / "in.mif", 16, 64)
+    binary = reshape_mif(original, str(tmp_path / "bin.mif"), 16, data_radix="BIN")
+    assert "DATA_RADIX = BIN;" in _read(binary)
+    assert [int(word, 2) for _, word in _data(binary)] == [int(word, 16) for _, word in _data(original)]
+    assert all(len(word) == 16 for _, word in _data(binary))
+    back = reshape_mif(binary, str(tmp_path / "hex.mif"), 16, data_radix="HEX")
+    assert _read(back) == _read(original)
+
+def test_combine_matches_the_old_swap(tmp_path):
+    original = _write_mif(tmp_path / "in.mif", 16, 256)
+    old = baseline_reference.combine_mif_8words(original, str(tmp_path / "old.mif"))
+    new = Swap.combine_mif_8words(original, str(tmp_path / "new.mif"))
+    # The old tool kept every eighth input address and the 16-bit header; the words agree.
+    old_words = [(address // 8, word) for address, word in _data(old)]
+    assert _data(new) == old_words
+    assert "WIDTH = 128;" in _read(new) and "DEPTH = 32;" in _read(new)
+
+def test_split_lanes_match_the_old_split(tmp_path):
+    original = _write_mif(tmp_path / "in.mif", 32, 128)
+    old_high, old_low = tmp_path / "old_high.mif", tmp_path / "old_low.mif"
+    baseline_reference.split_mif(original, str(old_high), str(old_low))
+    high, low = split_mif_lanes(original, [str(tmp_path / "high.mif"), str(tmp_path / "low.mif")])
+    assert _data(high) == _data(old_high)
+    assert _data(low) == _data(old_low)
+    comments = lambda path: [line for line in _read(path).split("\n") if line.startswith("--")]
+    assert comments(high) == comments(old_high) == comments(original)
+    with open(low, "r", encoding="utf-8") as f:
+        reader = MifReader(f)
+        list(reader)
+    assert (reader.depth, reader.width) == (128, 16)
+
+def test_split_into_four_lanes(tmp_path):
+    original = _write_mif(tmp_path / "in.mif", 32, 32, radix="BIN")
+    lanes = split_mif_lanes(original, [str(tmp_path / f"lane{i}.mif") for i in range(4)])
+    words = [_data(path) for path in lanes]
+    for index, (address, word) in enumerate(_data(original)):
+        assert [lane[index] for lane in words] == [(address, word[i:i + 8]) for i in range(0, 32, 8)]
+
+@pytest.mark.parametrize("address_radix, data_radix", [("HEX", "HEX"), ("DEC", "BIN"), ("OCT", "HEX")])
+def test_writer_and_reader_round_trip(tmp_path, address_radix, data_radix):
+    path = str(tmp_path / "round.mif")
+    rng = random.Random(2)
+    values = [rng.getrandbits(12) for _ in range(40)]
+    with MifWriter(path, buffer_lines=7) as mif:
+        mif.header(100, 12, address_radix, data_radix)
+        mif.comment("first half")
+        for address, value in enumerate(values[:20]):
+            mif.word(address, value)
+        mif.comment("second half")
+        digits = 3 if data_radix == "HEX" else 12
+        mif.words(20, [format_mif_number(value, data_radix, digits) for value in values[20:]])
+        mif.end()
+    with open(path, "r", encoding="utf-8") as f:
+        reader = MifReader(f)
+        records = list(reader)
+    assert (reader.depth, reader.width, reader.address_radix, reader.data_radix) == \
+        (100, 12, address_radix, data_radix)
+    assert [(record.address, record.data) for record in records if record.kind == HEADER] == \
+        [("DEPTH", "100"), ("WIDTH", "12"), ("ADDRESS_RADIX", address_radix), ("DATA_RADIX", data_radix)]
+    data = [(record.address, int(record.data, radix_base(data_radix))) for record in records if record.kind == DATA]
+    assert data == list(enumerate(values))
+    assert [record.line for record in records if record.kind == OTHER] == ["-- first half", "-- second half"]
+    assert [record.kind for record in records][4] == BEGIN and records[-1].kind == END
+    # word() and words() format addresses the same way.
+    lines = _read(path).split("\n")
+    assert lines[lines.index("-- second half") - 1].split(" : ")[0] == reader.format_address(19)
+    assert lines[lines.index("-- second half") + 1].split(" : ")[0] == reader.format_address(20)
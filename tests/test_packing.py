@@ -0,0 +1,100 @@
+import os
+
+import numpy as np
+import pytest
+
+import baseline_reference
+import fontrom
+
+# A few glyphs of every kind: space, punctuation (bottom-aligned), the narrow "I",
+# digits, letters and a symbol outside Latin-1.
+CHARS = [" ", ".", ",", "I", "0", "8", "A", "g", "W", "~", "←", "✓"]
+
+def loop_pack(pixels, reverse):
+    """The per-pixel row/byte/bit loop generate_xbm_data used before pack_glyph_bits."""
+    canvas_width = pixels.shape[1]
+    xbm_data = []
+    for row in pixels:
+        row_bytes = []
+        for byte_index in range(0, canvas_width, 8):
+            byte = 0
+            for bit_index in range(8):
+                col = byte_index + bit_index
+                if col < canvas_width and row[col]:
+                    byte |= (1 << (7 - bit_index))
+            row_bytes.append(reverse(byte))
+        xbm_data.append(row_bytes)
+    return np.array(xbm_data, dtype=np.uint8)
+
+def real_reverse_bits(byte):
+    """What reverse_bits does with its body uncommented."""
+    reversed_byte = 0
+    for i in range(8):
+        if byte & (1 << i):
+            reversed_byte |= (1 << (7 - i))
+    return reversed_byte
+
+@pytest.mark.parametrize("width", [8, 12, 16, 32])
+def test_pack_glyph_bits_matches_the_pixel_loop(width):
+    rng = np.random.default_rng(width)
+    pixels = rng.integers(0, 2, size=(64, width), dtype=np.uint8)
+    assert np.array_equal(fontrom.pack_glyph_bits(pixels, "big"),
+                          loop_pack(pixels, baseline_reference.reverse_bits))
+    assert np.array_equal(fontrom.pack_glyph_bits(pixels, "little"),
+                          loop_pack(pixels, real_reverse_bits))
+
+def test_pack_glyph_bits_packs_a_glyph_set_like_single_glyphs():
+    rng = np.random.default_rng(0)
+    glyphs = rng.integers(0, 2, size=(5, 32, 16), dtype=np.uint8)
+    packed = fontrom.pack_glyph_bits(glyphs)
+    for glyph, rows in zip(glyphs, packed):
+        assert np.array_equal(rows, loop_pack(glyph, baseline_reference.reverse_bits))
+
+def _baseline_outputs(ttf_path, output_dir):
+    """The files the GUI wrote before the rework, with its default settings."""
+    sections = [
+        ("FontRom32", dict(forced_height=28, max_width=13, canvas_width=16, canvas_height=32,
+                           padding_top=2, padding_bottom=2)),
+        ("FontRom64", dict(forced_height=39, max_width=17, canvas_width=32, canvas_height=64,
+                           padding_top=0, padding_bottom=2)),
+        ("FontRomCustom", dict(forced_height=58, max_width=26, canvas_width=32, canvas_height=64,
+                               padding_top=0, padding_bottom=2,
+                               grid_width_override=26, grid_height_override=58)),
+    ]
+    for name, settings in sections:
+        data = baseline_reference.generate_xbm_data(ttf_path, CHARS, **settings)
+        size = (settings["canvas_width"], settings["canvas_height"])
+        baseline_reference.write_xbm(data, os.path.join(output_dir, f"{name}.xbm"), *size)
+        baseline_reference.write_mif(data, os.path.join(output_dir, f"{name}.mif"), *size)
+    for name in ("FontRom64", "FontRomCustom"):
+        baseline_reference.split_mif(os.path.join(output_dir, f"{name}.mif"),
+                                     os.path.join(output_dir, f"{name}_High.mif"),
+                                     os.path.join(output_dir, f"{name}_Low.mif"))
+    path = lambda name: os.path.join(output_dir, name)
+    baseline_reference.write_combined_binary(
+        path("FontRom32.mif"), path("FontRom64_Low.mif"), path("FontRom64_High.mif"),
+        path("FontRomCustom_Low.mif"), path("FontRomCustom_High.mif"), path("FontRomCombined.bin"))
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+def test_outputs_are_byte_identical_to_the_baseline(ttf_path, tmp_path):
+    baseline_dir = tmp_path / "baseline"
+    new_dir = tmp_path / "new"
+    baseline_dir.mkdir()
+    _baseline_outputs(ttf_path, str(baseline_dir))
+    fontrom.build_font_rom(ttf_path, str(new_dir), char_list=CHARS, export_xbm_mif=True)
+
+    for name in ("FontRom32", "FontRom64", "FontRomCustom"):
+        for suffix in (".xbm", ".mif"):
+            assert _read(new_dir / (name + suffix)) == _read(baseline_dir / (name + suffix)), name + suffix
+    assert _read(new_dir / "FontRomCombined.bin") == _read(baseline_dir / "FontRomCombined.bin")
+
+def test_generate_xbm_data_matches_the_baseline_rows(ttf_path):
+    settings = (39, 17, 32, 64, 0, 2)
+    baseline = baseline_reference.generate_xbm_data(ttf_path, CHARS, *settings)
+    atlas = fontrom.generate_xbm_data(ttf_path, CHARS, *settings)
+    assert atlas.chars() == list(baseline)
+    for char, rows in baseline.items():
+        assert np.array_equal(atlas[char], np.array(rows, dtype=np.uint8)), char
@@ -0,0 +1,109 @@
+import shutil
+
+import numpy as np
+import pytest
+
+import fontrom
+from glyph_cache import GlyphCache, MemoryGlyphCache
+
+# Enough characters that every worker of the pool gets a shard of its own.
+CHARS = fontrom.DEFAULT_CHAR_LIST[:40] + ["←", "✓"]
+
+def _assert_same_atlases(atlases, expected):
+    assert list(atlases) == list(expected)
+    for name, atlas in expected.items():
+        assert atlases[name].chars() == atlas.chars(), name
+        assert atlases[name].bits.tobytes() == atlas.bits.tobytes(), name
+
+def test_pool_renders_the_same_atlases_as_serial(ttf_path):
+    serial = fontrom.render_rom_sections(ttf_path, CHARS)
+    _assert_same_atlases(fontrom.render_rom_sections(ttf_path, CHARS, workers=3), serial)
+
+def test_pool_build_writes_the_same_image(ttf_path, tmp_path):
+    fontrom.build_font_rom(ttf_path, str(tmp_path / "serial"), char_list=CHARS)
+    fontrom.build_font_rom(ttf_path, str(tmp_path / "pool"), char_list=CHARS, workers=2)
+    for name in ("FontRomCombined.bin", "FontRomAddressMap.json", "FontRomCodePoints.bin"):
+        assert (tmp_path / "pool" / name).read_bytes() == (tmp_path / "serial" / name).read_bytes(), name
+
+def test_shards_keep_the_address_order():
+    chars = list("abcdefghij")
+    assert fontrom._shard(chars, 3) == [list("abcd"), list("efgh"), list("ij")]
+    assert fontrom._shard(chars, 20) == [[char] for char in chars]
+    assert fontrom._shard([], 4) == []
+
+def test_cached_rebuild_renders_nothing_and_matches_uncached(ttf_path, tmp_path):
+    uncached = fontrom.render_rom_sections(ttf_path, CHARS)
+    cache = GlyphCache(str(tmp_path / "cache"))
+    _assert_same_atlases(fontrom.render_rom_sections(ttf_path, CHARS, cache=cache), uncached)
+    assert (cache.hits, cache.misses) == (0, 3 * len(CHARS))
+    # A fresh cache object on the same directory, as in the next run of the tool.
+    cache = GlyphCache(str(tmp_path / "cache"))
+    _assert_same_atlases(fontrom.render_rom_sections(ttf_path, CHARS, workers=2, cache=cache), uncached)
+    assert (cache.hits, cache.misses) == (3 * len(CHARS), 0)
+
+    fontrom.build_font_rom(ttf_path, str(tmp_path / "uncached"), char_list=CHARS)
+    fontrom.build_font_rom(ttf_path, str(tmp_path / "cached"), char_list=CHARS, cache=cache)
+    assert (tmp_path / "cached" / "FontRomCombined.bin").read_bytes() == \
+        (tmp_path / "uncached" / "FontRomCombined.bin").read_bytes()
+
+@pytest.mark.parametrize("cache_type", [GlyphCache, MemoryGlyphCache])
+def test_a_changed_parameter_misses(ttf_path, tmp_path, cache_type, monkeypatch):
+    cache = cache_type(str(tmp_path / "cache")) if cache_type is GlyphCache else cache_type()
+    render_args = (28, 13, 16, 32, 2, 2, None, None, 128, "resample")
+    fontrom.render_sections(ttf_path, CHARS, [render_args], cache=cache)
+    assert len(fontrom._cache_lookup(cache, ttf_path, CHARS, render_args)) == len(CHARS)
+    # Any render argument, or a module-level setting that changes glyphs.
+    assert fontrom._cache_lookup(cache, ttf_path, CHARS, render_args[:8] + (127, "resample")) == {}
+    assert fontrom._cache_lookup(cache, ttf_path, CHARS, render_args[:9] + ("direct",)) == {}
+    monkeypatch.setattr(fontrom, "PUNCTUATION_SCALE", 0.3)
+    assert fontrom._cache_lookup(cache, ttf_path, CHARS, render_args) == {}
+
+def test_a_changed_font_misses(ttf_path, tmp_path):
+    cache = GlyphCache(str(tmp_path / "cache"))
+    font = tmp_path / "font.ttf"
+    shutil.copyfile(ttf_path, font)
+    render_args = (28, 13, 16, 32, 2, 2, None, None, 128, "resample")
+    fontrom.render_sections(str(font), CHARS, [render_args], cache=cache)
+    # The key is the font's contents, not its path or time stamp.
+    assert len(fontrom._cache_lookup(cache, ttf_path, CHARS, render_args)) == len(CHARS)
+    font.write_bytes(font.read_bytes() + b"\0")
+    assert fontrom._cache_lookup(cache, str(font), CHARS, render_args) == {}
+
+def _ink_box(rows):
+    """(top, bottom, left, right) of the set pixels of packed rows, inclusive."""
+    pixels = np.unpackbits(rows, axis=1)
+    ink_rows = np.nonzero(pixels.any(axis=1))[0]
+    ink_columns = np.nonzero(pixels.any(axis=0))[0]
+    return ink_rows[0], ink_rows[-1], ink_columns[0], ink_columns[-1]
+
+def test_direct_raster_fills_the_target_box(ttf_path):
+    chars = [" ", ".", "I", "0", "A", "g", "W", "H", "~", "←", "✓"]
+    # max_width 32 keeps every aspect ratio, so the direct engine draws most glyphs.
+    args = (chars, 28, 32, 32, 32, 2, 2)
+    direct = fontrom.generate_xbm_data(ttf_path, *args, raster="direct")
+    resample = fontrom.generate_xbm_data(ttf_path, *args, raster="resample")
+    assert direct.bits.shape == (len(chars), 32, 4)
+    assert len(direct) == len(chars) and direct.chars() == chars
+    assert not direct[" "].any()
+    for char in "0AgWH":
+        # Full-height glyphs span exactly forced_height rows below padding_top.
+        top, bottom, _, _ = _ink_box(direct[char])
+        assert (top, bottom) == (2, 29), char
+    assert any(not np.array_equal(direct[char], resample[char]) for char in chars)
+
+def test_render_direct_shape(ttf_path):
+    grey = fontrom.render_direct(ttf_path, "H", 56, 40, 20, 30)
+    assert grey.shape == (30, 20) and grey.dtype == np.uint8
+    ink = np.nonzero((grey > 128).any(axis=1))[0]
+    assert (ink[0], ink[-1]) == (0, 29)
+
+def test_default_layout_direct_build(ttf_path):
+    atlases = fontrom.render_rom_sections(ttf_path, CHARS, raster="direct")
+    for section in fontrom.ROM_LAYOUT["sections"]:
+        atlas = atlases[section["name"]]
+        assert atlas.bits.shape == (len(CHARS), section["canvas_height"], section["canvas_width"] // 8)
+        assert atlas.chars() == CHARS
+
+def test_unknown_raster_engine(ttf_path):
+    with pytest.raises(ValueError, match="Unknown raster engine"):
+        fontrom.generate_xbm_data(ttf_path, ["A"], 28, 13, 16, 32, raster="vector")
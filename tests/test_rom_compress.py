@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+import fontrom
+from rom_compress import CompressedRom, atlas_sections, compress_rom, image_sections
+from rom_layout import load_rom_layout, pack_rom_sections, parse_rom_layout, rom_address_map
+
+CHARS = [" ", ".", "I", "0", "A", "g", "W", "~", "←", "✓"]
+
+def _atlas(canvas_width, canvas_height, count, seed):
+    """Random glyphs with blank rows above and below, like rendered ones."""
+    rng = np.random.default_rng(seed)
+    atlas = fontrom.GlyphAtlas(canvas_width, canvas_height)
+    for i in range(count):
+        rows = rng.integers(0, 256, size=(canvas_height, (canvas_width + 7) // 8), dtype=np.uint8)
+        top, bottom = sorted(rng.integers(0, canvas_height + 1, size=2))
+        rows[:top] = rows[bottom:] = 0
+        atlas.add(chr(0x41 + i), rows)
+    return atlas.trim()
+
+def _assert_decodes_to(rom, atlases):
+    for name, atlas in atlases.items():
+        section = rom.sections[name]
+        assert section.chars() == atlas.chars()
+        for char, rows in atlas.items():
+            assert rom.glyph(name, char) == rows.tobytes(), (name, char)
+        assert section.words(0, 2) == atlas.words(0, 2).tobytes()
+
+def test_rendered_atlases_round_trip(ttf_path):
+    layout = load_rom_layout()
+    atlases = fontrom.render_rom_sections(ttf_path, CHARS, layout)
+    image, stats = compress_rom(atlas_sections(layout, atlases))
+    _assert_decodes_to(CompressedRom(image), atlases)
+    assert all(entry["compressed_bytes"] < entry["raw_bytes"] for entry in stats)
+
+def test_many_distinct_rows_use_two_byte_ids():
+    atlases = {"wide": _atlas(32, 64, 40, seed=1)}
+    image, _ = compress_rom([("wide", 32, 64, [(char, rows.tobytes()) for char, rows in atlases["wide"].items()])])
+    rom = CompressedRom(image)
+    assert rom.sections["wide"].id_size == 2
+    _assert_decodes_to(rom, atlases)
+
+@pytest.mark.parametrize("low_first", [False, True])
+def test_image_sections_join_parts_in_row_order(low_first):
+    halves = [{"name": "high", "bytes": [0, 2], "offset": "0x0000", "size": "0x1000"},
+              {"name": "low", "bytes": [2, 4], "offset": "0x1000", "size": "0x1000"}]
+    layout = parse_rom_layout({
+        "image_size": "0x2002",
+        "sections": [{"name": "32x64", "canvas": [32, 64], "forced_height": 58, "max_width": 26,
+                      "parts": halves[::-1] if low_first else halves}],
+    })
+    atlases = {"32x64": _atlas(32, 64, 12, seed=2)}
+    image = bytearray(layout["image_size"])
+    for offset, block in pack_rom_sections(layout, atlases):
+        image[offset:offset + block.size] = block.tobytes()
+    compressed, _ = compress_rom(image_sections(layout, bytes(image), rom_address_map(layout, atlases)))
+    _assert_decodes_to(CompressedRom(compressed), atlases)
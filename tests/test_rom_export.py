@@ -0,0 +1,96 @@
+import os
+
+import numpy as np
+import pytest
+
+import fontrom
+import rom_export
+from rom_layout import load_rom_layout
+
+CHARS = [" ", ".", "I", "0", "A", "g", "W", "~", "←", "✓"]
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+def _ihex_bytes(path):
+    """The data of an Intel HEX file as {address: byte}; checks every record's checksum."""
+    memory = {}
+    upper = 0
+    with open(path, "r", encoding="ascii") as f:
+        lines = f.read().splitlines()
+    for line in lines:
+        assert line.startswith(":"), line
+        record = bytes.fromhex(line[1:])
+        assert sum(record) & 0xFF == 0, line
+        length, address, record_type, data = record[0], int.from_bytes(record[1:3], "big"), record[3], record[4:-1]
+        assert len(data) == length, line
+        if record_type == 0x00:
+            for i, byte in enumerate(data):
+                memory[upper + address + i] = byte
+        elif record_type == 0x04:
+            upper = int.from_bytes(data, "big") << 16
+        else:
+            assert record_type == 0x01 and line == lines[-1], line
+    assert lines[-1] == ":00000001FF"
+    return memory
+
+@pytest.fixture
+def built(ttf_path, tmp_path):
+    """A build with the XBM/MIF files and every export format of its FontRomCombined.bin."""
+    build_dir = tmp_path / "build"
+    fontrom.build_font_rom(ttf_path, str(build_dir), char_list=CHARS, export_xbm_mif=True)
+    export_dir = tmp_path / "export"
+    assert rom_export.main([str(build_dir / "FontRomCombined.bin"), "--formats", ",".join(rom_export.FORMATS),
+                            "--output-dir", str(export_dir)]) == 0
+    return build_dir, export_dir
+
+def test_reexported_mif_and_xbm_match_the_build(built):
+    build_dir, export_dir = built
+    names = sorted(name for name in os.listdir(build_dir) if name.endswith((".mif", ".xbm")))
+    assert "FontRom64_High.mif" in names and "FontRom32.xbm" in names
+    for name in names:
+        assert _read(export_dir / name) == _read(build_dir / name), name
+
+def test_bin_parts_make_up_the_combined_image(built):
+    build_dir, export_dir = built
+    layout = load_rom_layout()
+    combined = _read(build_dir / "FontRomCombined.bin")
+    image = bytearray(layout["image_size"])
+    for section in layout["sections"]:
+        suffixes = rom_export.PART_SUFFIXES if len(section["parts"]) == 2 else ("",)
+        for suffix, part in zip(suffixes, section["parts"]):
+            data = _read(export_dir / (section["file_name"] + suffix + ".bin"))
+            image[part["offset"]:part["offset"] + len(data)] = data
+    image[-2:] = (sum(image) & 0xFFFF).to_bytes(2, "big")
+    assert bytes(image) == combined
+
+def test_ihex_matches_bin(built):
+    _, export_dir = built
+    for name in ("FontRom32", "FontRom64_Low", "FontRomCustom"):
+        data = _read(export_dir / (name + ".bin"))
+        assert _ihex_bytes(export_dir / (name + ".hex")) == dict(enumerate(data)), name
+
+def test_ihex_past_64k_and_a_short_last_record(tmp_path):
+    # 8x9 glyphs are 9 bytes each, so records straddle glyphs and the last one is short.
+    rng = np.random.default_rng(0)
+    glyphs = {f"g{i}": rng.integers(0, 256, size=(9, 1), dtype=np.uint8) for i in range(7400)}
+    outputs = [("ihex", str(tmp_path / "a.hex"), None, None), ("bin", str(tmp_path / "a.bin"), None, None)]
+    rom_export.export_glyphs(glyphs, 8, 9, outputs)
+    data = _read(tmp_path / "a.bin")
+    assert len(data) == 7400 * 9 > 0x10000 and len(data) % 16
+    assert _ihex_bytes(tmp_path / "a.hex") == dict(enumerate(data))
+
+def test_writers_must_write_glyphs():
+    class Incomplete(rom_export._Writer):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete("unused", 8, 8, 8)
+
+def test_part_files_are_named_by_byte_range_not_layout_order():
+    layout = load_rom_layout()
+    section = dict(layout["sections"][1], parts=layout["sections"][1]["parts"][::-1])
+    outputs = rom_export.section_outputs(section, "out", ["mif"])
+    assert [(os.path.basename(path), start, stop) for _, path, start, stop in outputs] == \
+        [("FontRom64.mif", None, None), ("FontRom64_High.mif", 0, 2), ("FontRom64_Low.mif", 2, 4)]
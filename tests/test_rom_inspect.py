@@ -0,0 +1,71 @@
+import json
+
+import numpy as np
+import pytest
+
+import fontrom
+import rom_inspect
+from rom_inspect import RomImage
+
+CHARS = [" ", ".", "I", "0", "A", "g", "W", "~", "←", "✓"]
+
+@pytest.fixture
+def built(ttf_path, tmp_path):
+    """(build directory, {section: GlyphAtlas}, address map) of a small build."""
+    atlases = fontrom.build_font_rom(ttf_path, str(tmp_path), char_list=CHARS)
+    with open(tmp_path / "FontRomAddressMap.json", "r", encoding="utf-8") as f:
+        address_map = json.load(f)
+    return tmp_path, atlases, address_map
+
+def test_glyphs_by_char(built):
+    directory, atlases, address_map = built
+    with RomImage(str(directory / "FontRomCombined.bin"), address_map) as rom:
+        assert set(rom.sections) == set(atlases)
+        for name, atlas in atlases.items():
+            for char, rows in atlas.items():
+                assert rom.glyph_index(name, char) == atlas.index[char]
+                assert np.array_equal(rom.glyph_pixels(name, char), np.unpackbits(rows, axis=1)), (name, char)
+        # The 32x64 glyphs are put together from their high and low parts.
+        text = rom.render_ascii("32x64_new", "A").split("\n")
+        assert len(text) == 64 and {len(line) for line in text} == {32}
+        assert text == ["".join("#" if bit else "." for bit in row)
+                        for row in np.unpackbits(atlases["32x64_new"]["A"], axis=1)]
+        with pytest.raises(ValueError, match="not in section"):
+            rom.glyph_index("16x32", "Z")
+        with pytest.raises(ValueError, match="outside section"):
+            rom.glyph_index("16x32", rom.sections["16x32"]["capacity"])
+
+def test_without_an_address_map_glyphs_are_found_by_index(built):
+    directory, atlases, _ = built
+    with RomImage(str(directory / "FontRomCombined.bin")) as rom:
+        index = atlases["32x64_orig"].index["g"]
+        assert np.array_equal(rom.glyph_pixels("32x64_orig", index),
+                              np.unpackbits(atlases["32x64_orig"]["g"], axis=1))
+        with pytest.raises(ValueError, match="without an address map"):
+            rom.glyph_index("32x64_orig", "g")
+
+def test_checksum_reports_stored_and_computed(built, capsys):
+    directory, _, address_map = built
+    image = bytearray((directory / "FontRomCombined.bin").read_bytes())
+    stored = int.from_bytes(image[-2:], "big")
+    with RomImage(str(directory / "FontRomCombined.bin"), address_map) as rom:
+        assert rom.checksum() == (stored, stored)
+    assert rom_inspect.main([str(directory / "FontRomCombined.bin")]) == 0
+    assert f"Checksum 0x{stored:04X} OK" in capsys.readouterr().out
+
+    # A damaged image, stored 0x100 bytes into a larger dump.
+    image[0x1234] = (image[0x1234] + 1) & 0xFF
+    computed = (stored + 1 if image[0x1234] else stored - 0xFF) & 0xFFFF
+    dump = directory / "dump.bin"
+    dump.write_bytes(bytes(0x100) + image + bytes(0x10))
+    with RomImage(str(dump), address_map, base=0x100) as rom:
+        assert rom.checksum() == (stored, computed)
+    assert rom_inspect.main([str(dump), "--base", "0x100"]) == 2
+    assert f"stored 0x{stored:04X}, computed 0x{computed:04X}" in capsys.readouterr().out
+
+def test_an_image_too_small_is_rejected(built):
+    directory, _, address_map = built
+    short = directory / "short.bin"
+    short.write_bytes((directory / "FontRomCombined.bin").read_bytes()[:-1])
+    with pytest.raises(ValueError, match="smaller than"):
+        RomImage(str(short), address_map)
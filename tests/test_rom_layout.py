@@ -0,0 +1,31 @@
+import pytest
+
+from rom_layout import check_rom_layout, load_rom_layout, parse_rom_layout
+
+def _layout(parts, image_size=0x1000):
+    return parse_rom_layout({
+        "image_size": image_size,
+        "sections": [{"name": "s", "canvas": [16, 8], "forced_height": 8, "max_width": 8,
+                      "parts": [{"name": name, "offset": offset, "size": size}
+                                for name, offset, size in parts]}],
+    })
+
+def test_default_layout_is_valid():
+    check_rom_layout(load_rom_layout())
+
+def test_every_overlapping_pair_is_reported():
+    layout = _layout([("big", 0x000, 0x400), ("a", 0x100, 0x100), ("b", 0x300, 0x100), ("c", 0x400, 0x100)])
+    with pytest.raises(ValueError) as error:
+        check_rom_layout(layout)
+    message = str(error.value)
+    assert "big (0x00000-0x003FF) overlaps a (0x00100-0x001FF)" in message
+    assert "big (0x00000-0x003FF) overlaps b (0x00300-0x003FF)" in message
+    assert "overlaps c" not in message
+
+def test_parts_past_the_data_area_and_overfull_parts_are_reported():
+    layout = _layout([("a", 0x000, 0x100), ("b", 0xF00, 0x100)])
+    with pytest.raises(ValueError) as error:
+        check_rom_layout(layout, {"s": 17})
+    message = str(error.value)
+    assert "b (0x00F00-0x00FFF) runs past the data area" in message
+    assert "a needs 272 bytes for 17 glyphs but only has 256" in message
@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+import rom_watch
+from rom_layout import DEFAULT_LAYOUT_FILE
+from rom_watch import RomWatcher
+
+CHARS = ["A", "B", "0"]
+
+def _layout_file(path, threshold=128):
+    with open(DEFAULT_LAYOUT_FILE, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+    spec["sections"][0]["threshold"] = threshold
+    path.write_text(json.dumps(spec), encoding="utf-8")
+    return str(path)
+
+def _rom(output_dir):
+    return (output_dir / "FontRomCombined.bin").read_bytes()
+
+def test_only_changed_sections_are_rebuilt(ttf_path, tmp_path):
+    layout = _layout_file(tmp_path / "layout.json")
+    watcher = RomWatcher(ttf_path, str(tmp_path / "out"), layout, char_list=CHARS)
+    assert len(watcher.rebuild()) == 3
+    assert watcher.rebuild() == []
+    _layout_file(tmp_path / "layout.json", threshold=100)
+    assert watcher.rebuild() == ["16x32"]
+
+    fresh = RomWatcher(ttf_path, str(tmp_path / "fresh"), layout, char_list=CHARS)
+    fresh.rebuild()
+    assert _rom(tmp_path / "out") == _rom(tmp_path / "fresh")
+
+def test_failed_write_keeps_the_previous_state(ttf_path, tmp_path, monkeypatch):
+    layout = _layout_file(tmp_path / "layout.json")
+    watcher = RomWatcher(ttf_path, str(tmp_path / "out"), layout, char_list=CHARS)
+    watcher.rebuild()
+    keys, image = dict(watcher.section_keys), bytes(watcher.image)
+
+    def disk_full(path, mode="r", *args, **kwargs):
+        raise OSError("No space left on device")
+
+    _layout_file(tmp_path / "layout.json", threshold=100)
+    monkeypatch.setattr(rom_watch, "open", disk_full, raising=False)
+    with pytest.raises(OSError):
+        watcher.rebuild()
+    assert watcher.section_keys == keys
+    assert bytes(watcher.image) == image
+
+    monkeypatch.undo()
+    assert watcher.rebuild() == ["16x32"]
+    fresh = RomWatcher(ttf_path, str(tmp_path / "fresh"), layout, char_list=CHARS)
+    fresh.rebuild()
+    assert _rom(tmp_path / "out") == _rom(tmp_path / "fresh")
+
+def test_patched_image_keeps_a_correct_checksum(ttf_path, tmp_path, capsys):
+    layout = _layout_file(tmp_path / "layout.json")
+    watcher = RomWatcher(ttf_path, str(tmp_path / "out"), layout, char_list=CHARS)
+    watcher.rebuild()
+    for threshold in (100, 160, 128, 60):
+        _layout_file(tmp_path / "layout.json", threshold=threshold)
+        capsys.readouterr()
+        assert watcher.rebuild() == ["16x32"]
+        # Only the 16x32 part (0x2000 bytes) and the checksum were written.
+        assert f"{0x2000 + 2} bytes written" in capsys.readouterr().out
+        image = _rom(tmp_path / "out")
+        assert int.from_bytes(image[-2:], "big") == sum(image[:-2]) & 0xFFFF
+        assert image == bytes(watcher.image)
+
+def test_watch_retries_a_failed_build_on_the_next_poll(ttf_path, tmp_path, monkeypatch, capsys):
+    layout = _layout_file(tmp_path / "layout.json")
+    watcher = RomWatcher(ttf_path, str(tmp_path / "out"), layout, char_list=CHARS)
+
+    def locked(path, mode="r", *args, **kwargs):
+        raise OSError("file is locked")
+
+    polls = []
+
+    def sleep(seconds):
+        # The output stays locked for two polls, then the next one must build without
+        # any watched file having changed.
+        polls.append(seconds)
+        if len(polls) == 3:
+            monkeypatch.setattr(rom_watch, "open", open, raising=False)
+        if len(polls) > 4:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(rom_watch, "open", locked, raising=False)
+    monkeypatch.setattr(rom_watch.time, "sleep", sleep)
+    with pytest.raises(KeyboardInterrupt):
+        watcher.watch(interval=0.01, settle=0)
+    assert watcher.builds == 1
+    assert _rom(tmp_path / "out") == bytes(watcher.image)
+    # The repeated error is printed once.
+    assert capsys.readouterr().err.count("file is locked") == 1